@@ -1,52 +1,69 @@
-import streamlit as st
-from firebase_admin import firestore, initialize_app, credentials
-from langchain import PromptTemplate, LLMChain
-from langchain.chat_models import ChatOpenAI
-from langchain.embeddings.openai import OpenAIEmbeddings
-from langchain.vectorstores import FAISS
-from config import get_openai_api_key
-
-# Initialize Firebase if not already initialized
-try:
-    db = firestore.client()
-except ValueError:
-    # Replace 'path/to/serviceAccountKey.json' with the actual path to your Firebase service account key
-    cred = credentials.Certificate("path/to/serviceAccountKey.json")
-    initialize_app(cred)
-    db = firestore.client()
-
-# Initialize OpenAI LLM
-openai_api_key = get_openai_api_key()
-llm = ChatOpenAI(temperature=0.7, model="gpt-4", openai_api_key=openai_api_key)
-
-# Initialize Embeddings
-embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
+import json
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def create_resume_index(resume_data):
-    documents = []
-
-    experience = resume_data.get('experience', '')
-    if experience:
-        documents.append(experience)
-
-    skills = resume_data.get('skills', [])
-    for skill in skills:
-        documents.append(skill)
-
-    vector_store = FAISS.from_texts(documents, embeddings)
-    return vector_store
+import streamlit as st
+import config
+import document_store
+import identity
+import job_index
+import job_ingest
+import job_queue
+import llm_cache
+import metering
+import metrics
+import repository
+import resources
+from resume_chunker import chunk_resume, select_within_budget
+from resume_index import create_index_store, get_resume_index, hash_resume
+
+GENERATION_MODEL = "gpt-4"
+GENERATION_TEMPERATURE = 0.7
+
+# Seconds between status checks while a generation job runs
+JOB_POLL_SECONDS = 1
+
+# How long the Save button waits for the background writer's commit
+SAVE_TIMEOUT_SECONDS = 15
+
+def build_messages(template, relevant_text, job_description):
+    prompt = template.format(relevant_info=relevant_text,
+                             job_description=job_description)
+    return [{"role": "user", "content": prompt}]
+
+# Resume indexes are persisted here; embeddings come from the shared,
+# cache-backed model in resources
+index_store = create_index_store()
+
+def create_resume_index(resume_data, user_id=None):
+    documents = chunk_resume(resume_data)
+
+    # Without a user, key the stored index by the resume content itself
+    index_owner = user_id or hash_resume(resume_data)
+    return get_resume_index(index_owner, resume_data, documents,
+                            resources.get_embeddings(), index_store)
+
+RESUME_QUERY = "Identify the most relevant experiences and skills for the following job:"
+COVER_LETTER_QUERY = "Identify key qualifications and experiences relevant to the following job:"
+
+# Chunks scored per search before the token budget is applied
+RETRIEVAL_CANDIDATES = 40
+
+RESUME_TEMPLATE = """
+    Given the following relevant resume information and job description, create a tailored resume:
 
-def generate_resume(resume_data, job_description):
-    resume_index = create_resume_index(resume_data)
+    Relevant Resume Information:
+    {relevant_info}
 
-    query = "Identify the most relevant experiences and skills for the following job:"
-    relevant_info = resume_index.similarity_search(
-        f"{query}\n\n{job_description}", k=5)
+    Job Description:
+    {job_description}
 
-    relevant_text = "\n".join([doc.page_content for doc in relevant_info])
+    Tailored Resume:
+    """
 
-    resume_template = """
-    Given the following relevant resume information and job description, create a tailored resume:
+COVER_LETTER_TEMPLATE = """
+    Write a compelling cover letter for the following job based on the given relevant resume information:
 
     Relevant Resume Information:
     {relevant_info}
@@ -54,49 +71,381 @@ def generate_resume(resume_data, job_description):
     Job Description:
     {job_description}
 
-    Tailored Resume:
+    Cover Letter:
     """
 
-    resume_prompt = PromptTemplate(
-        input_variables=["relevant_info", "job_description"],
-        template=resume_template)
+def retrieve_relevant_text(resume_index, query_vector, token_budget=None):
+    """
+    Returns the most relevant resume chunks that fit in a token budget.
 
-    resume_chain = LLMChain(llm=llm, prompt=resume_prompt)
-    tailored_resume = resume_chain.run(relevant_info=relevant_text,
-                                       job_description=job_description)
+    Args:
+        resume_index (FAISS): Index of the resume's chunks.
+        query_vector (list): Embedding of the search query.
+        token_budget (int, optional): Defaults to RETRIEVAL_TOKEN_BUDGET.
 
-    return tailored_resume
+    Returns:
+        str: The selected chunks, in resume order.
+    """
+    if token_budget is None:
+        token_budget = config.get_retrieval_token_budget()
+    scored = resume_index.similarity_search_with_score_by_vector(
+        query_vector, k=RETRIEVAL_CANDIDATES)
+    selected = select_within_budget(scored, token_budget)
+    return "\n".join(document.page_content for document in selected)
 
-def generate_cover_letter(resume_data, job_description):
-    resume_index = create_resume_index(resume_data)
+def run_generation_chain(template, relevant_text, job_description, user_id=None):
+    return resources.get_llm_gateway().chat(
+        GENERATION_MODEL, build_messages(template, relevant_text, job_description),
+        user_id=user_id, temperature=GENERATION_TEMPERATURE)
 
-    query = "Identify key qualifications and experiences relevant to the following job:"
-    relevant_info = resume_index.similarity_search(
-        f"{query}\n\n{job_description}", k=5)
+def generate_resume(resume_data, job_description, user_id=None):
+    if user_id:
+        metering.check_quota(user_id)
+    resume_index = create_resume_index(resume_data, user_id)
 
-    relevant_text = "\n".join([doc.page_content for doc in relevant_info])
+    query_vector = resources.get_embeddings().embed_query(f"{RESUME_QUERY}\n\n{job_description}")
+    relevant_text = retrieve_relevant_text(resume_index, query_vector)
 
-    cover_letter_template = """
-    Write a compelling cover letter for the following job based on the given relevant resume information:
+    return run_generation_chain(RESUME_TEMPLATE, relevant_text, job_description,
+                                user_id)
 
-    Relevant Resume Information:
-    {relevant_info}
+def generate_cover_letter(resume_data, job_description, user_id=None):
+    if user_id:
+        metering.check_quota(user_id)
+    resume_index = create_resume_index(resume_data, user_id)
 
-    Job Description:
-    {job_description}
+    query_vector = resources.get_embeddings().embed_query(f"{COVER_LETTER_QUERY}\n\n{job_description}")
+    relevant_text = retrieve_relevant_text(resume_index, query_vector)
 
-    Cover Letter:
+    return run_generation_chain(COVER_LETTER_TEMPLATE, relevant_text,
+                                job_description, user_id)
+
+def find_similar_job(resume_data, job_description, user_id):
     """
+    Looks up an earlier job, processed against the same resume, whose
+    description is nearly identical to this one.
 
-    cover_letter_prompt = PromptTemplate(
-        input_variables=["relevant_info", "job_description"],
-        template=cover_letter_template)
+    Returns:
+        tuple or None: (metadata, similarity) of the match, where metadata
+        holds the earlier job's job_id, title and retrieved resume text.
+    """
+    if not user_id:
+        return None
+    embeddings = resources.get_embeddings()
+    query_vector = embeddings.embed_query(job_description)
+    return job_index.find_similar_job(user_id, query_vector, embeddings,
+                                      hash_resume(resume_data))
 
-    cover_letter_chain = LLMChain(llm=llm, prompt=cover_letter_prompt)
-    cover_letter = cover_letter_chain.run(relevant_info=relevant_text,
-                                          job_description=job_description)
+def prepare_relevant_text(resume_data, job_description, user_id, timings):
+    """
+    Returns the resume text relevant to a job, retrieving it only once.
+
+    The job description is embedded once. If a near-identical job was
+    already processed against the same resume, its retrieval results are
+    reused; otherwise the resume index is searched and the job is added to
+    the job index for next time.
+    """
+    embeddings = resources.get_embeddings()
+    with metrics.timer("generation.job_lookup", timings):
+        query_vector = embeddings.embed_query(job_description)
+        similar = None
+        if user_id:
+            similar = job_index.find_similar_job(user_id, query_vector, embeddings,
+                                                 hash_resume(resume_data))
+        if similar:
+            metrics.increment("generation.retrieval_reused")
+            return similar[0]["relevant_text"]
+
+    with metrics.timer("generation.index", timings):
+        resume_index = create_resume_index(resume_data, user_id)
+
+    with metrics.timer("generation.retrieval", timings):
+        relevant_text = retrieve_relevant_text(resume_index, query_vector)
+        if user_id:
+            job_index.add_job(user_id, job_description, query_vector, embeddings, {
+                "job_id": document_store.job_id_for(job_description),
+                "title": document_store.job_title(job_description),
+                "resume_hash": hash_resume(resume_data),
+                "relevant_text": relevant_text,
+            })
+    return relevant_text
+
+def _timed_chain(stage, timings, template, relevant_text, job_description,
+                 user_id):
+    with metrics.timer(stage, timings):
+        return run_generation_chain(template, relevant_text, job_description,
+                                    user_id)
+
+def _charge(user_id):
+    """
+    Charges one application, once per queued job: a job queued again after
+    its worker stalled was already charged by its first attempt.
 
-    return cover_letter
+    Returns:
+        bool: Whether this call charged (and should refund on failure).
+    """
+    running = job_queue.current_job()
+    if running is None:
+        metering.charge_application(user_id)
+        return True
+    jobs, job = running
+    if not jobs.mark_charged(job["id"]):
+        return False
+    try:
+        metering.charge_application(user_id)
+    except Exception:
+        jobs.clear_charged(job["id"])
+        raise
+    return True
+
+def _refund(user_id):
+    metering.refund_application(user_id)
+    running = job_queue.current_job()
+    if running is not None:
+        jobs, job = running
+        jobs.clear_charged(job["id"])
+
+def generate_application_documents(resume_data, job_description, user_id=None,
+                                   relevant_text=None):
+    """
+    Generates the tailored resume and cover letter in a single pipeline.
+
+    The job description is embedded and searched once for both documents
+    (or the retrieval of a near-identical earlier job is reused), and the
+    two LLM chains run concurrently, so the total time is roughly that of the slower call.
+
+    Args:
+        resume_data (dict): Parsed resume data.
+        job_description (str): The job posting text.
+        user_id (str, optional): Owner of the resume index, charged one
+            application against their plan's quota.
+        relevant_text (str, optional): Resume text already retrieved for
+            this job (e.g. by a batch); skips retrieval.
+
+    Returns:
+        tuple: (tailored_resume, cover_letter, timings) where timings maps
+        each stage name to its duration in seconds.
+
+    Raises:
+        metering.QuotaExceeded: Before any LLM call, if the user's plan
+            allows no more applications.
+    """
+    charged = bool(user_id) and _charge(user_id)
+    try:
+        timings = {}
+        with metrics.timer("generation.total", timings):
+            if relevant_text is None:
+                relevant_text = prepare_relevant_text(resume_data, job_description,
+                                                      user_id, timings)
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                resume_future = executor.submit(
+                    _timed_chain, "generation.llm.resume", timings,
+                    RESUME_TEMPLATE, relevant_text, job_description, user_id)
+                cover_letter_future = executor.submit(
+                    _timed_chain, "generation.llm.cover_letter", timings,
+                    COVER_LETTER_TEMPLATE, relevant_text, job_description, user_id)
+                tailored_resume = resume_future.result()
+                cover_letter = cover_letter_future.result()
+    except Exception:
+        if charged:
+            _refund(user_id)
+        raise
+
+    return tailored_resume, cover_letter, timings
+
+def stream_generation_chain(template, relevant_text, job_description, user_id=None):
+    yield from resources.get_llm_gateway().stream_chat(
+        GENERATION_MODEL, build_messages(template, relevant_text, job_description),
+        user_id=user_id, temperature=GENERATION_TEMPERATURE)
+
+def _stream_into_queue(document, timings, events, template, relevant_text,
+                       job_description, user_id):
+    start = time.perf_counter()
+    try:
+        first_token = True
+        for token in stream_generation_chain(template, relevant_text,
+                                             job_description, user_id):
+            if first_token:
+                ttft = time.perf_counter() - start
+                metrics.record(f"generation.ttft.{document}", ttft)
+                timings[f"generation.ttft.{document}"] = ttft
+                first_token = False
+            events.put((document, token))
+    except Exception as e:
+        events.put(("error", e))
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.record(f"generation.llm.{document}", elapsed)
+        timings[f"generation.llm.{document}"] = elapsed
+        events.put((document, None))
+
+def stream_application_documents(resume_data, job_description, user_id=None):
+    """
+    Streaming variant of generate_application_documents.
+
+    Both documents are generated concurrently and their tokens are yielded
+    as they arrive, interleaved, as ``(document, token)`` pairs where
+    document is "resume" or "cover_letter". The final event is
+    ``("timings", timings)`` with per-stage durations, including the time
+    to first token of each document.
+
+    Args:
+        resume_data (dict): Parsed resume data.
+        job_description (str): The job posting text.
+        user_id (str, optional): Owner of the resume index, charged one
+            application against their plan's quota.
+
+    Yields:
+        tuple: (document, token) events followed by ("timings", dict).
+
+    Raises:
+        metering.QuotaExceeded: Before any LLM call, if the user's plan
+            allows no more applications.
+    """
+    if user_id:
+        metering.charge_application(user_id)
+    try:
+        yield from _stream_documents(resume_data, job_description, user_id)
+    except Exception:
+        if user_id:
+            metering.refund_application(user_id)
+        raise
+
+def _stream_documents(resume_data, job_description, user_id):
+    timings = {}
+    start = time.perf_counter()
+
+    relevant_text = prepare_relevant_text(resume_data, job_description,
+                                          user_id, timings)
+
+    events = queue.Queue()
+    streams = {
+        "resume": RESUME_TEMPLATE,
+        "cover_letter": COVER_LETTER_TEMPLATE,
+    }
+    with ThreadPoolExecutor(max_workers=len(streams)) as executor:
+        for document, template in streams.items():
+            executor.submit(_stream_into_queue, document, timings, events,
+                            template, relevant_text, job_description, user_id)
+
+        remaining = len(streams)
+        while remaining:
+            document, token = events.get()
+            if document == "error":
+                raise token
+            if token is None:
+                remaining -= 1
+                continue
+            yield document, token
+
+    total = time.perf_counter() - start
+    metrics.record("generation.total", total)
+    timings["generation.total"] = total
+    yield "timings", timings
+
+def _documents_cache_key(resume_data, job_description):
+    inputs = f"{hash_resume(resume_data)}\n{llm_cache.hash_text(job_description)}"
+    params = {
+        "temperature": GENERATION_TEMPERATURE,
+        "templates": llm_cache.hash_text(RESUME_TEMPLATE + COVER_LETTER_TEMPLATE),
+    }
+    return llm_cache.make_key(GENERATION_MODEL, inputs, params)
+
+def get_cached_documents(resume_data, job_description):
+    """
+    Looks up previously generated documents for the same resume and job.
+
+    Returns:
+        tuple or None: (tailored_resume, cover_letter) on a cache hit.
+    """
+    cached = llm_cache.get_cache("documents").get(
+        _documents_cache_key(resume_data, job_description))
+    if cached is None:
+        return None
+    documents = json.loads(cached)
+    return documents["resume"], documents["cover_letter"]
+
+def cache_documents(resume_data, job_description, tailored_resume, cover_letter):
+    """
+    Stores generated documents keyed by the resume and job description hashes.
+    """
+    llm_cache.get_cache("documents").set(
+        _documents_cache_key(resume_data, job_description),
+        json.dumps({"resume": tailored_resume, "cover_letter": cover_letter}))
+
+def _format_timings(timings):
+    return " · ".join(f"{stage.split('.', 1)[1]}: {seconds:.2f}s"
+                      for stage, seconds in timings.items())
+
+def show_saved_documents(user_id):
+    with st.expander("Saved Documents"):
+        saved = document_store.list_documents(user_id)
+        if not saved:
+            st.write("No saved documents yet.")
+            return
+
+        titles = {entry['job_id']: entry['title'] for entry in saved}
+        job_id = st.selectbox("Job", list(titles), format_func=titles.get)
+        if st.button("Open"):
+            document = document_store.get_document(user_id, job_id)
+            if document:
+                st.text_area("Tailored Resume", document['resume'], height=300)
+                st.text_area("Cover Letter", document['cover_letter'], height=300)
+
+def show_extension_documents(user_id):
+    """
+    Lists documents generated for postings sent from the browser extension,
+    and the key the extension needs to send them.
+    """
+    with st.expander("From the Browser Extension"):
+        jobs = [job for job in job_queue.get_queue().list_jobs(user_id, "generate_documents")
+                if job['payload'].get('source') == job_ingest.SOURCE]
+        ready = {job['id']: job for job in jobs if job['status'] == job_queue.DONE}
+        pending = sum(job['status'] in (job_queue.QUEUED, job_queue.RUNNING) for job in jobs)
+        if pending:
+            st.info(f"Generating documents for {pending} posting(s)...")
+        if ready:
+            job_id = st.selectbox("Posting", list(ready),
+                                  format_func=lambda id: ready[id]['payload']['title'])
+            if st.button("Open Documents"):
+                job = ready[job_id]
+                _show_result(job['payload']['job_description'], job['result']['resume'],
+                             job['result']['cover_letter'],
+                             _format_timings(job['result']['timings']))
+        elif not pending:
+            st.write("Click \"Apply with AI\" on a LinkedIn job to prepare documents here.")
+
+        if not config.get_extension_key_secret():
+            return
+        # A key is shown once, when created; creating or revoking one
+        # invalidates the keys issued before it
+        col1, col2 = st.columns(2)
+        if col1.button("Create Extension Key"):
+            st.session_state.extension_key = identity.issue_extension_key(user_id)
+        if col2.button("Revoke Extension Keys"):
+            identity.revoke_extension_keys(user_id)
+            st.session_state.pop('extension_key', None)
+            st.success("Extension keys revoked.")
+        key = st.session_state.get('extension_key')
+        if key:
+            st.caption("Extension key (paste it into the extension's popup; "
+                       "it replaces any earlier key):")
+            st.code(key, language=None)
+
+def show_similar_job(resume_data, job_description, user_id):
+    similar = find_similar_job(resume_data, job_description, user_id)
+    if not similar:
+        return
+    metadata, similarity = similar
+    document = document_store.get_document(user_id, metadata["job_id"])
+    if not document:
+        return
+    st.info(f"This posting is {similarity:.0%} similar to one you already "
+            f"generated documents for: {metadata['title']}")
+    if st.button("Show earlier documents"):
+        st.text_area("Earlier Tailored Resume", document['resume'], height=300)
+        st.text_area("Earlier Cover Letter", document['cover_letter'], height=300)
 
 def generate_documents():
     st.subheader("Generate Tailored Resume and Cover Letter")
@@ -106,38 +455,153 @@ def generate_documents():
         st.warning("User not authenticated!")
         return
 
-    user_doc = db.collection('users').document(user_id).get()
+    resume_data = repository.get_parsed_resume(user_id)
 
-    if not user_doc.exists or 'resume_data' not in user_doc.to_dict():
+    if not resume_data:
         st.warning("Please upload your resume first!")
         return
 
-    resume_data = user_doc.to_dict().get('resume_data', {})
+    show_saved_documents(user_id)
+    show_extension_documents(user_id)
 
     job_description = st.text_area("Paste the job description here:")
+    if job_description.strip():
+        show_similar_job(resume_data, job_description, user_id)
+    stream_output = st.checkbox(
+        "Stream output as it is generated (stay on this page until it finishes)",
+        value=False)
+    use_cache = st.checkbox(
+        "Reuse documents previously generated for this exact job description",
+        value=False)
 
     if st.button("Generate Documents"):
         if not job_description.strip():
             st.warning("Please provide a job description.")
             return
 
-        with st.spinner("Generating tailored resume and cover letter..."):
-            tailored_resume = generate_resume(resume_data, job_description)
-            cover_letter = generate_cover_letter(resume_data, job_description)
-
-        st.subheader("Tailored Resume")
-        st.text_area("", tailored_resume, height=300)
-
-        st.subheader("Cover Letter")
-        st.text_area("", cover_letter, height=300)
-
-        if st.button("Save Generated Documents"):
-            db.collection('users').document(user_id).set(
-                {
-                    'generated_documents': {
-                        'resume': tailored_resume,
-                        'cover_letter': cover_letter
-                    }
-                },
-                merge=True)
-            st.success("Documents saved successfully!")
\ No newline at end of file
+        cached_documents = None
+        if use_cache:
+            cached_documents = get_cached_documents(resume_data, job_description)
+
+        if not cached_documents:
+            # Reject over-quota requests before any LLM work is queued
+            try:
+                metering.check_quota(user_id)
+            except metering.QuotaExceeded as e:
+                st.error(str(e))
+                return
+
+        if cached_documents:
+            tailored_resume, cover_letter = cached_documents
+            _show_result(job_description, tailored_resume, cover_letter,
+                         "Loaded from cache")
+        elif stream_output:
+            st.subheader("Tailored Resume")
+            resume_placeholder = st.empty()
+            st.subheader("Cover Letter")
+            cover_letter_placeholder = st.empty()
+
+            placeholders = {
+                "resume": resume_placeholder,
+                "cover_letter": cover_letter_placeholder,
+            }
+            texts = {"resume": "", "cover_letter": ""}
+            timings = {}
+            try:
+                for document, token in stream_application_documents(
+                        resume_data, job_description, user_id):
+                    if document == "timings":
+                        timings = token
+                        continue
+                    texts[document] += token
+                    placeholders[document].markdown(texts[document])
+            except metering.QuotaExceeded as e:
+                st.error(str(e))
+                return
+
+            if use_cache:
+                cache_documents(resume_data, job_description, texts["resume"],
+                                texts["cover_letter"])
+            _show_result(job_description, texts["resume"], texts["cover_letter"],
+                         _format_timings(timings))
+            st.rerun()
+        else:
+            st.session_state.generate_job_id = job_queue.get_queue().enqueue(
+                "generate_documents", {
+                    "resume_data": resume_data,
+                    "job_description": job_description,
+                    "user_id": user_id,
+                    "use_cache": use_cache,
+                }, user_id=user_id)
+            st.session_state.pop('generated_documents', None)
+
+    show_generated_documents(user_id)
+
+def _show_result(job_description, tailored_resume, cover_letter, caption):
+    # Kept in the session so the Save button (which reruns the page) and
+    # returning to the page still find the documents
+    st.session_state.generated_documents = {
+        "job_description": job_description,
+        "resume": tailored_resume,
+        "cover_letter": cover_letter,
+        "caption": caption,
+    }
+    st.session_state.pop('generate_job_id', None)
+
+@job_queue.handler("generate_documents")
+def generate_documents_job(payload):
+    resume_data = payload["resume_data"]
+    job_description = payload["job_description"]
+    tailored_resume, cover_letter, timings = generate_application_documents(
+        resume_data, job_description, payload["user_id"], payload.get("relevant_text"))
+    if payload.get("use_cache"):
+        cache_documents(resume_data, job_description, tailored_resume, cover_letter)
+    return {"resume": tailored_resume, "cover_letter": cover_letter,
+            "timings": timings}
+
+def show_generated_documents(user_id):
+    """
+    Shows the session's generated documents, or the status of the
+    background job generating them.
+    """
+    job_id = st.session_state.get('generate_job_id')
+    if job_id:
+        job = job_queue.get_queue().get(job_id)
+        if job is None:
+            return
+        if job['status'] in (job_queue.QUEUED, job_queue.RUNNING):
+            st.info("Generating tailored resume and cover letter... "
+                    "You can leave this page and come back.")
+            time.sleep(JOB_POLL_SECONDS)
+            st.rerun()
+        if job['status'] == job_queue.FAILED:
+            st.error(f"Error generating documents: {job['error']}")
+            return
+        _show_result(job['payload']['job_description'], job['result']['resume'],
+                     job['result']['cover_letter'],
+                     _format_timings(job['result']['timings']))
+
+    generated = st.session_state.get('generated_documents')
+    if not generated:
+        return
+
+    st.caption(generated['caption'])
+
+    st.subheader("Tailored Resume")
+    st.text_area("", generated['resume'], height=300)
+
+    st.subheader("Cover Letter")
+    st.text_area("", generated['cover_letter'], height=300)
+
+    if st.button("Save Generated Documents"):
+        saved = document_store.save_documents(user_id, generated['job_description'],
+                                              generated['resume'], generated['cover_letter'])
+        try:
+            with st.spinner("Saving documents..."):
+                saved.result(timeout=SAVE_TIMEOUT_SECONDS)
+            st.success("Documents saved successfully!")
+        except TimeoutError:
+            st.warning("Saving is taking longer than usual; the documents will "
+                       "appear under saved documents once stored.")
+        except Exception as e:
+            st.error(f"Error saving documents: {str(e)}")
@@ -1,21 +1,22 @@
 # app.py
 
+import importlib
+
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
 import config
 import auth as auth_module
-import resume_parser
-import ai_generator
-import application_tracker
-import payment
-
-# Initialize Firebase
-if not firebase_admin._apps:
-    cred = credentials.Certificate(config.get_firebase_config())
-    initialize_app(cred)
+import repository
 
-db = firestore.client()
+# Each page's module and entry point. Modules are imported the first time
+# their page is opened, so heavy dependencies (langchain, FAISS, pdfminer,
+# pandas, plotly, stripe, ...) don't slow down the first page load.
+PAGES = {
+    "Upload Resume": ("resume_parser", "upload_resume"),
+    "Generate Documents": ("ai_generator", "generate_documents"),
+    "Batch Generate": ("batch_generation", "show_batch_generation"),
+    "Application Tracker": ("application_tracker", "show_tracker"),
+    "Upgrade Plan": ("payment", "show_upgrade_options"),
+}
 
 
 def main():
@@ -29,6 +30,11 @@ def main():
     # Handle Google Sign-In
     auth_module.handle_google_signin()
 
+    # Restore a signed-in session from its cookie, and write any cookie
+    # change queued by the previous run
+    auth_module.restore_session()
+    auth_module.sync_session_cookie()
+
     # Check if user is logged in
     if 'user' not in st.session_state:
         auth_module.login_signup()
@@ -43,20 +49,19 @@ def show_main_app():
     st.sidebar.title(f"Welcome, {st.session_state.user['name']}!")
     st.sidebar.button("Logout", on_click=auth_module.logout)
 
-    menu = [
-        "Upload Resume", "Generate Documents", "Application Tracker",
-        "Upgrade Plan"
-    ]
-    choice = st.sidebar.selectbox("Menu", menu)
-
-    if choice == "Upload Resume":
-        resume_parser.upload_resume()
-    elif choice == "Generate Documents":
-        ai_generator.generate_documents()
-    elif choice == "Application Tracker":
-        application_tracker.show_tracker()
-    elif choice == "Upgrade Plan":
-        payment.show_upgrade_options()
+    choice = st.sidebar.selectbox("Menu", list(PAGES))
+
+    module_name, function_name = PAGES[choice]
+    page = getattr(importlib.import_module(module_name), function_name)
+
+    stats_before = repository.get_io_stats()
+    page()
+    stats_after = repository.get_io_stats()
+    if config.show_firestore_stats():
+        st.sidebar.caption(
+            f"Firestore this page view: "
+            f"{stats_after['reads'] - stats_before['reads']} reads, "
+            f"{stats_after['writes'] - stats_before['writes']} writes")
 
 
 if __name__ == "__main__":
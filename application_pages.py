@@ -0,0 +1,92 @@
+# application_pages.py
+"""
+Paginated queries over a user's applications.
+
+The tracker's application list reads one page at a time, newest first,
+with the time window and status filter pushed down into the Firestore
+query and ``start_after`` cursors for the following pages. A page view
+costs at most ``page_size`` document reads plus one count aggregation,
+however many applications the user has.
+
+Filtering on status while ordering by date needs the composite index
+declared in firestore.indexes.json:
+    firebase deploy --only firestore:indexes
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from firebase_admin import firestore
+
+import repository
+
+# Choices for the list's time window, in days (None for no limit)
+TIME_WINDOWS = {
+    'Last 30 days': 30,
+    'Last 90 days': 90,
+    'Last 365 days': 365,
+    'All time': None,
+}
+
+PAGE_SIZES = (25, 50, 100)
+
+
+def applications_query(db, user_id, days=None, status=None):
+    """
+    Builds the query for a user's applications, newest first.
+
+    Args:
+        db: Firestore client.
+        user_id (str): Owner of the applications.
+        days (int, optional): Only applications from the last ``days`` days.
+        status (str, optional): Only applications with this status.
+
+    Returns:
+        Query: The filtered, ordered query.
+    """
+    query = (db.collection('users').document(user_id)
+             .collection('applications'))
+    if status:
+        query = query.where(filter=firestore.FieldFilter('status', '==', status))
+    if days:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+        query = query.where(filter=firestore.FieldFilter('date', '>=', cutoff))
+    return query.order_by('date', direction=firestore.Query.DESCENDING)
+
+
+def count_applications(query):
+    """
+    Counts the documents matching a query with a server-side aggregation.
+
+    Billed as one read per 1,000 index entries rather than one per document.
+    """
+    result = query.count().get()
+    repository.record_reads(max(1, -(-result[0][0].value // 1000)))
+    return result[0][0].value
+
+
+def fetch_page(query, page_size, cursor=None):
+    """
+    Reads one page of a query.
+
+    Args:
+        query (Query): Output of applications_query.
+        page_size (int): Maximum number of applications on the page.
+        cursor (DocumentSnapshot, optional): Last document of the previous
+            page; None for the first page.
+
+    Returns:
+        tuple: (applications, next_cursor) where applications is a list of
+        dicts including their document ``id``, and next_cursor is None on
+        the last page.
+    """
+    if cursor is not None:
+        query = query.start_after(cursor)
+    # One extra document tells whether another page follows
+    snapshots = list(query.limit(page_size + 1).stream())
+    repository.record_reads(max(1, len(snapshots)))
+
+    has_more = len(snapshots) > page_size
+    snapshots = snapshots[:page_size]
+    applications = [{'id': snapshot.id, **snapshot.to_dict()} for snapshot in snapshots]
+    next_cursor = snapshots[-1] if has_more else None
+    return applications, next_cursor
@@ -1,96 +1,158 @@
 import streamlit as st
-from firebase_admin import firestore
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import calendar
-from collections import Counter
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 
-# Download NLTK data
-nltk.download('punkt')
-nltk.download('stopwords')
-
-db = firestore.client()
+import application_pages
+import applications_cache
+import resources
+import tracker_aggregates
+
+def render_insights(insights):
+    # 1. Application Success Rate over time
+    st.subheader("Application Success Rate Over Time")
+    fig_success_rate = px.line(insights['weekly_success'], x='date', y='is_successful', title="Weekly Application Success Rate")
+    st.plotly_chart(fig_success_rate)
+
+    # 2. Average Response Time by Company
+    st.subheader("Average Response Time by Company")
+    fig_response_time = px.bar(insights['response_time'], title="Average Response Time by Company (Days)")
+    st.plotly_chart(fig_response_time)
+
+    # 3. Job Application Seasonality Analysis
+    st.subheader("Job Application Seasonality")
+    monthly_apps = insights['monthly']
+    fig_seasonality = px.bar(x=monthly_apps.index.map(lambda x: calendar.month_abbr[x]),
+                             y=monthly_apps.values,
+                             title="Job Applications by Month",
+                             labels={'x': 'Month', 'y': 'Number of Applications'})
+    st.plotly_chart(fig_seasonality)
+
+    # 4. Skills Gap Analysis
+    st.subheader("Skills Gap Analysis")
+    skills_freq = insights['top_terms']
+    fig_skills = px.bar(x=[skill[0] for skill in skills_freq],
+                        y=[skill[1] for skill in skills_freq],
+                        title="Top 10 Skills in Job Listings",
+                        labels={'x': 'Skill', 'y': 'Frequency'})
+    st.plotly_chart(fig_skills)
+
+    # 5. Geographical Distribution of Applications
+    st.subheader("Geographical Distribution of Applications")
+    location_counts = insights['locations']
+    fig_geo = px.pie(values=location_counts.values, names=location_counts.index, title="Application Distribution by Location")
+    st.plotly_chart(fig_geo)
+
+def add_application_form(db, user_id):
+    with st.expander("Add Application"):
+        with st.form(key="add_application_form", clear_on_submit=True):
+            company = st.text_input("Company")
+            position = st.text_input("Position")
+            location = st.text_input("Location")
+            status = st.selectbox("Status", tracker_aggregates.APPLICATION_STATUSES)
+            applied_on = st.date_input("Date Applied", value=datetime.now().date())
+            submitted = st.form_submit_button("Add Application")
+
+        if submitted:
+            if not company.strip() or not position.strip():
+                st.warning("Please provide a company and a position.")
+                return
+            tracker_aggregates.add_application(db, user_id, {
+                'company': company.strip(),
+                'position': position.strip(),
+                'location': location.strip(),
+                'status': status,
+                'date': datetime.combine(applied_on, datetime.min.time()),
+            })
+            _reset_application_pages()
+            st.success("Application added!")
+
+def _reset_application_pages():
+    st.session_state.pop('application_pages', None)
+
+def show_applications(db, user_id):
+    st.subheader("Your Applications")
+
+    window_column, status_column, size_column = st.columns(3)
+    window = window_column.selectbox("Time window", list(application_pages.TIME_WINDOWS),
+                                     index=1)
+    status = status_column.selectbox("Status filter",
+                                     ('All',) + tracker_aggregates.APPLICATION_STATUSES)
+    page_size = size_column.selectbox("Per page", application_pages.PAGE_SIZES)
+
+    # Pages already read are kept with their cursors until the filters or
+    # the applications change, so reruns don't read them again
+    filters = (user_id, window, status, page_size)
+    paging = st.session_state.get('application_pages')
+    if paging is None or paging['filters'] != filters:
+        query = application_pages.applications_query(
+            db, user_id, application_pages.TIME_WINDOWS[window],
+            None if status == 'All' else status)
+        paging = {'filters': filters, 'query': query, 'page': 0, 'pages': {},
+                  'cursors': [None], 'total': application_pages.count_applications(query)}
+        st.session_state.application_pages = paging
+
+    page = paging['page']
+    if page not in paging['pages']:
+        paging['pages'][page] = application_pages.fetch_page(
+            paging['query'], page_size, paging['cursors'][page])
+    applications, next_cursor = paging['pages'][page]
+
+    if not applications:
+        st.info("No applications in this time window.")
+        return
+
+    df = pd.DataFrame(applications).set_index('id')
+    columns = [column for column in ('date', 'company', 'position', 'location', 'status')
+               if column in df]
+    st.dataframe(df[columns], use_container_width=True)
+
+    page_count = max(1, -(-paging['total'] // page_size))
+    previous_column, caption_column, next_column = st.columns([1, 3, 1])
+    caption_column.caption(f"Page {page + 1} of {page_count} · {paging['total']} applications")
+    if previous_column.button("Previous", disabled=page == 0):
+        paging['page'] -= 1
+        st.rerun()
+    if next_column.button("Next", disabled=next_cursor is None):
+        if len(paging['cursors']) == page + 1:
+            paging['cursors'].append(next_cursor)
+        paging['page'] += 1
+        st.rerun()
+
+    with st.form(key="update_status_form"):
+        application_id = st.selectbox(
+            "Application", df.index,
+            format_func=lambda doc_id: f"{df.at[doc_id, 'company']} - {df.at[doc_id, 'position']}")
+        new_status = st.selectbox("New Status", tracker_aggregates.APPLICATION_STATUSES)
+        if st.form_submit_button("Update Status"):
+            tracker_aggregates.update_application_status(db, user_id, application_id, new_status)
+            _reset_application_pages()
+            st.success("Status updated!")
 
 def show_tracker():
     st.subheader("Application Tracker")
 
     user_id = st.session_state.user['uid']
-    applications_ref = db.collection('users').document(user_id).collection('applications')
-
-    # Add new application (existing code)
-    # ...
+    db = resources.get_db()
 
-    # Fetch all applications
-    applications = list(applications_ref.stream())
-    
-    # Convert to DataFrame for easier analysis
-    df = pd.DataFrame([doc.to_dict() for doc in applications])
-    if not df.empty:
-        df['date'] = pd.to_datetime(df['date'])
+    add_application_form(db, user_id)
 
-    # Display applications (existing code)
-    # ...
+    show_applications(db, user_id)
 
     # Advanced Analytics
     st.subheader("Advanced Application Insights")
 
-    if not df.empty:
-        # Existing visualizations (Status Distribution, Trend, etc.)
-        # ...
-
-        # New Advanced Analytics
-        
-        # 1. Application Success Rate over time
-        st.subheader("Application Success Rate Over Time")
-        df['is_successful'] = df['status'].isin(['Offer Received', 'Interview Scheduled'])
-        df_success = df.set_index('date').resample('W')['is_successful'].mean().reset_index()
-        fig_success_rate = px.line(df_success, x='date', y='is_successful', title="Weekly Application Success Rate")
-        st.plotly_chart(fig_success_rate)
-
-        # 2. Average Response Time by Company
-        st.subheader("Average Response Time by Company")
-        df['response_time'] = (df['date'] - df['date'].min()).dt.days
-        avg_response_time = df.groupby('company')['response_time'].mean().sort_values(ascending=False)
-        fig_response_time = px.bar(avg_response_time, title="Average Response Time by Company (Days)")
-        st.plotly_chart(fig_response_time)
-
-        # 3. Job Application Seasonality Analysis
-        st.subheader("Job Application Seasonality")
-        df['month'] = df['date'].dt.month
-        monthly_apps = df['month'].value_counts().sort_index()
-        fig_seasonality = px.bar(x=monthly_apps.index.map(lambda x: calendar.month_abbr[x]), 
-                                 y=monthly_apps.values, 
-                                 title="Job Applications by Month",
-                                 labels={'x': 'Month', 'y': 'Number of Applications'})
-        st.plotly_chart(fig_seasonality)
-
-        # 4. Skills Gap Analysis
-        st.subheader("Skills Gap Analysis")
-        all_skills = ' '.join(df['position'].tolist())
-        stop_words = set(stopwords.words('english'))
-        word_tokens = word_tokenize(all_skills.lower())
-        filtered_skills = [word for word in word_tokens if word.isalnum() and word not in stop_words]
-        skills_freq = Counter(filtered_skills).most_common(10)
-        fig_skills = px.bar(x=[skill[0] for skill in skills_freq], 
-                            y=[skill[1] for skill in skills_freq],
-                            title="Top 10 Skills in Job Listings",
-                            labels={'x': 'Skill', 'y': 'Frequency'})
-        st.plotly_chart(fig_skills)
-
-        # 5. Geographical Distribution of Applications
-        st.subheader("Geographical Distribution of Applications")
-        location_counts = df['location'].value_counts()
-        fig_geo = px.pie(values=location_counts.values, names=location_counts.index, title="Application Distribution by Location")
-        st.plotly_chart(fig_geo)
+    # The incrementally maintained summary comes from a listener, so reruns
+    # cost no reads however many applications the user has
+    summary = applications_cache.get_summary(db, user_id)
+    if summary is None or not tracker_aggregates.is_current(summary):
+        # No summary yet, or term counts from an older tokenizer: build one
+        # from the applications once, after which the listener keeps it current
+        summary = tracker_aggregates.ensure_summary(db, user_id)
 
+    if summary.get('total', 0) > 0:
+        render_insights(tracker_aggregates.insights_from_summary(summary))
     else:
         st.info("No applications added yet. Start by adding your job applications!")
-
-    # Application Statistics (existing code)
-    # ...
-
@@ -0,0 +1,104 @@
+# applications_cache.py
+"""
+Per-user, in-process cache of the applications summary.
+
+The first request for a user attaches a Firestore ``on_snapshot`` listener
+to their summary documents (the ``aggregates`` collection, see
+tracker_aggregates). The listener delivers the documents once and
+afterwards only those an application write changes, so dashboard reruns
+read from memory and cost no Firestore reads, and the listener is billed
+a read per changed summary document rather than per changed application. Users are evicted on logout or when the
+cache holds too many users.
+
+This module first cached each user's whole applications DataFrame. The
+aggregated summary (tracker_aggregates) and the paginated application
+list (application_pages, whose pages are kept per session) replaced every
+use of that frame, so only the summary is cached now.
+"""
+
+import threading
+from collections import OrderedDict
+
+import config
+import repository
+import tracker_aggregates
+
+# How long to wait for a new listener's initial snapshot
+INITIAL_SNAPSHOT_TIMEOUT = 10
+
+_users = OrderedDict()
+_users_lock = threading.Lock()
+
+
+class _UserSummary:
+    def __init__(self, aggregates_ref):
+        self.aggregates_ref = aggregates_ref
+        self.summary = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._watch = aggregates_ref.on_snapshot(self._on_snapshot)
+
+    def _set_documents(self, snapshots):
+        documents = {snapshot.id: snapshot.to_dict()
+                     for snapshot in snapshots if snapshot.exists}
+        self.summary = tracker_aggregates.summary_from_documents(documents)
+
+    def _on_snapshot(self, snapshots, changes, read_time):
+        # Each snapshot carries every document of the collection
+        with self._lock:
+            self._set_documents(snapshots)
+        self._ready.set()
+
+    def get(self):
+        if not self._ready.wait(INITIAL_SNAPSHOT_TIMEOUT):
+            # The listener is slow to start; read the document directly
+            # rather than block the page
+            with self._lock:
+                if not self._ready.is_set():
+                    snapshots = list(self.aggregates_ref.stream())
+                    repository.record_reads(max(1, len(snapshots)))
+                    self._set_documents(snapshots)
+
+        with self._lock:
+            return self.summary
+
+    def close(self):
+        self._watch.unsubscribe()
+
+
+def get_summary(db, user_id):
+    """
+    Returns a user's applications summary from the listener's copy.
+
+    Args:
+        db: Firestore client.
+        user_id (str): Owner of the applications.
+
+    Returns:
+        dict or None: The summary, or None if it doesn't exist yet.
+        Shared between callers; do not modify.
+    """
+    with _users_lock:
+        entry = _users.get(user_id)
+        if entry is None:
+            entry = _UserSummary(tracker_aggregates.aggregates_ref(db, user_id))
+            _users[user_id] = entry
+        _users.move_to_end(user_id)
+
+        evicted = []
+        while len(_users) > config.get_applications_cache_max_users():
+            evicted.append(_users.popitem(last=False)[1])
+
+    for stale in evicted:
+        stale.close()
+    return entry.get()
+
+
+def evict(user_id):
+    """
+    Drops a user's cached summary and stops their listener.
+    """
+    with _users_lock:
+        entry = _users.pop(user_id, None)
+    if entry is not None:
+        entry.close()
@@ -1,36 +1,73 @@
 # auth.py
 
-import streamlit as st
-from firebase_admin import auth, firestore, initialize_app, credentials
-import requests
 import json
+
+import streamlit as st
+import streamlit.components.v1 as components
+from firebase_admin import auth
 from urllib.parse import urlencode
 
 import config
+import identity
+import repository
+import resources
 
 # Initialize Firebase Admin SDK if not already initialized
 def initialize_firebase():
-    if not firebase_admin._apps:
-        try:
-            config.set_firebase_project_id()  # Set the Project ID
-            cred = credentials.Certificate(config.get_firebase_config())
-            initialize_app(cred)
-        except ValueError as e:
-            st.error(f"Firebase initialization error: {str(e)}")
-            return False
+    try:
+        resources.get_db()
+    except ValueError as e:
+        st.error(f"Firebase initialization error: {str(e)}")
+        return False
     return True
 
-# Import firebase_admin after defining initialize_firebase to avoid NameError
-import firebase_admin
+def _session_url(path, **params):
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{config.get_server_url()}/session/{path}{query}"
 
-if initialize_firebase():
-    db = firestore.client()
-else:
-    st.error("Failed to initialize Firebase. Please check your configuration.")
-    st.stop()
+def _sign_in(user, refresh_token=None):
+    """
+    Starts a session for a verified user and, when sessions persist, queues
+    the redirect that sets their session cookie.
+    """
+    st.session_state.user = user
+    st.session_state.pop('logged_out', None)
+    if identity.sessions_enabled():
+        code = identity.create_session(user, refresh_token)
+        st.session_state.pending_session_redirect = _session_url("start", code=code)
 
-# Firebase REST API key
-FIREBASE_API_KEY = config.get_firebase_api_key()
+def restore_session():
+    """
+    Signs the user in from their session cookie, if it names a live
+    session. The session is checked on the server, so one revoked by a
+    logout elsewhere no longer works.
+    """
+    if 'user' in st.session_state or st.session_state.get('logged_out'):
+        return
+    value = st.context.cookies.get(identity.SESSION_COOKIE)
+    if not value or not identity.sessions_enabled():
+        return
+    try:
+        user = identity.restore_session(value)
+    except Exception:
+        user = None
+    if user is None:
+        # Drop an unusable cookie so it isn't checked on every visit
+        st.session_state.pending_session_redirect = _session_url("end")
+        return
+    st.session_state.user = user
+
+def sync_session_cookie():
+    """
+    Follows the redirect queued by sign-in or logout. The session cookie is
+    HttpOnly, so only the server's response can set or clear it; the
+    server sends the browser back to the app.
+    """
+    url = st.session_state.pop('pending_session_redirect', None)
+    if url is None:
+        return
+    components.html(f"<script>window.parent.location.replace({json.dumps(url)});</script>",
+                    height=0)
 
 def login_signup():
     """
@@ -46,28 +83,21 @@ def login_signup():
             login_password = st.text_input("Password", type="password", key="login_password")
             submit_login = st.form_submit_button(label="Login")
 
-        if submit_login:
+        if submit_login and initialize_firebase():
             try:
                 # Firebase Authentication via REST API
-                login_url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={FIREBASE_API_KEY}"
-                payload = {
+                result = identity.identity_toolkit("signInWithPassword", {
                     "email": login_email,
                     "password": login_password,
                     "returnSecureToken": True
-                }
-                response = requests.post(login_url, data=json.dumps(payload))
-                result = response.json()
+                })
 
                 if "error" in result:
                     st.error(result["error"]["message"])
                 else:
                     # Verify ID Token and retrieve user information
-                    user = auth.verify_id_token(result["idToken"])
-                    st.session_state.user = {
-                        "name": user.get("name") or user.get("email"),
-                        "email": user.get("email"),
-                        "uid": user.get("uid")
-                    }
+                    claims = identity.verify_id_token(result["idToken"])
+                    _sign_in(identity.user_from_claims(claims), result.get("refreshToken"))
                     st.success("Logged in successfully!")
                     st.rerun()
             except Exception as e:
@@ -82,17 +112,14 @@ def login_signup():
             signup_password = st.text_input("Password", type="password", key="signup_password")
             submit_signup = st.form_submit_button(label="Sign Up")
 
-        if submit_signup:
+        if submit_signup and initialize_firebase():
             try:
                 # Firebase Authentication via REST API
-                signup_url = f"https://identitytoolkit.googleapis.com/v1/accounts:signUp?key={FIREBASE_API_KEY}"
-                payload = {
+                result = identity.identity_toolkit("signUp", {
                     "email": signup_email,
                     "password": signup_password,
                     "returnSecureToken": True
-                }
-                response = requests.post(signup_url, data=json.dumps(payload))
-                result = response.json()
+                })
 
                 if "error" in result:
                     st.error(result["error"]["message"])
@@ -131,21 +158,12 @@ def handle_google_signin():
     """
     # Parse the URL to get the authorization code
     query_params = st.query_params
-    if "code" in query_params:
+    if "code" in query_params and initialize_firebase():
         code = query_params["code"]
         # Exchange code for tokens
-        token_url = "https://oauth2.googleapis.com/token"
-        redirect_uri = config.get_redirect_uri()
-        google_oauth_credentials = config.get_google_oauth_credentials()
-        payload = {
-            "code": code,
-            "client_id": google_oauth_credentials["client_id"],
-            "client_secret": google_oauth_credentials["client_secret"],
-            "redirect_uri": redirect_uri,
-            "grant_type": "authorization_code"
-        }
-        response = requests.post(token_url, data=payload)
-        tokens = response.json()
+        tokens = identity.exchange_google_code(code)
+        # The code is single-use; drop it so reruns don't exchange it again
+        del st.query_params["code"]
 
         if "error" in tokens:
             st.error(tokens["error"])
@@ -153,12 +171,8 @@ def handle_google_signin():
             id_token = tokens["id_token"]
             try:
                 # Verify the ID token and get user info
-                user = auth.verify_id_token(id_token)
-                st.session_state.user = {
-                    "name": user.get("name") or user.get("email"),
-                    "email": user.get("email"),
-                    "uid": user.get("uid")
-                }
+                claims = identity.verify_id_token(id_token)
+                _sign_in(identity.user_from_claims(claims))
                 st.success("Logged in with Google successfully!")
                 st.rerun()
             except Exception as e:
@@ -166,8 +180,21 @@ def handle_google_signin():
 
 def logout():
     """
-    Logs the user out by clearing the session state.
+    Logs the user out by clearing the session state and revoking their
+    session.
     """
-    st.session_state.pop('user', None)
+    user = st.session_state.pop('user', None)
+    st.session_state.logged_out = True
+    value = st.context.cookies.get(identity.SESSION_COOKIE)
+    if value and identity.sessions_enabled():
+        # Revoked here, so the cookie is useless even if the redirect that
+        # clears it never happens
+        identity.revoke_session(value)
+        st.session_state.pending_session_redirect = _session_url("end")
+    if user:
+        # Imported here to keep pandas out of the login page's startup path
+        import applications_cache
+        applications_cache.evict(user.get('uid'))
+    repository.clear_session()
     st.success("Logged out successfully!")
     st.rerun()
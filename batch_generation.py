@@ -0,0 +1,372 @@
+# batch_generation.py
+"""
+Batch mode: tailored documents for many job postings at once.
+
+Postings come from a pasted list, a CSV upload or postings sent by the
+browser extension. Work shared by the whole batch is done once when it is
+submitted:
+
+* the resume is loaded and its index built (or loaded) once;
+* postings with the same normalized description are generated once;
+* all job descriptions are embedded in one batched call, and the vectors
+  are used to search the resume index, once per group of near-identical
+  postings (each of which is still generated);
+* the quota is checked once for the whole batch.
+
+Each distinct posting then becomes one ``generate_documents`` job on the
+job queue with its retrieved resume text attached, so generation runs with
+the queue's bounded concurrency (JOB_WORKERS per process) and survives
+reruns. The page polls the jobs, showing results as they finish, and
+offers them all as a zip file.
+"""
+
+import csv
+import io
+import re
+import time
+import uuid
+import zipfile
+
+import numpy as np
+import streamlit as st
+
+import ai_generator
+import config
+import document_store
+import job_ingest
+import job_queue
+import llm_cache
+import metering
+import metrics
+import repository
+import resources
+
+MAX_BATCH_JOBS = 50
+
+# Separates postings in the pasted list
+PASTE_SEPARATOR = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+
+SOURCES = ("Paste", "CSV upload", "From the extension")
+
+
+def jobs_from_text(text):
+    """
+    Splits pasted text into postings separated by lines of "---".
+
+    Returns:
+        list: Dicts with title and description.
+    """
+    return [{"title": document_store.job_title(part), "description": part.strip()}
+            for part in PASTE_SEPARATOR.split(text) if part.strip()]
+
+
+def jobs_from_csv(data):
+    """
+    Reads postings from CSV bytes with a description (or job_description)
+    column and optional title and company columns.
+
+    Returns:
+        list: Dicts with title and description.
+
+    Raises:
+        ValueError: If the CSV has no description column.
+    """
+    reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+    columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+    description_column = columns.get("description") or columns.get("job_description")
+    if not description_column:
+        raise ValueError("The CSV needs a 'description' column.")
+
+    jobs = []
+    for row in reader:
+        description = (row.get(description_column) or "").strip()
+        if not description:
+            continue
+        title = (row.get(columns.get("title", "")) or "").strip()
+        company = (row.get(columns.get("company", "")) or "").strip()
+        if title and company:
+            title = f"{title} at {company}"
+        jobs.append({"title": title or document_store.job_title(description),
+                     "description": description})
+    return jobs
+
+
+def jobs_from_postings(postings):
+    return [{"title": f"{posting.get('title') or 'Untitled'} at {posting.get('company') or 'Unknown'}",
+             "description": posting["description"]}
+            for posting in postings if posting.get("description")]
+
+
+def group_duplicates(jobs):
+    """
+    Maps each posting to the first earlier posting with the same
+    description after normalization, whose documents it reuses.
+
+    Returns:
+        list: For each job, the index of the job it duplicates, or None.
+    """
+    first = {}
+    duplicate_of = []
+    for index, job in enumerate(jobs):
+        key = llm_cache.hash_text(job["description"])
+        duplicate_of.append(first.get(key))
+        first.setdefault(key, index)
+    return duplicate_of
+
+
+def group_similar(vectors, threshold, duplicate_of):
+    """
+    Maps each distinct posting to the first earlier distinct posting whose
+    embedding's cosine similarity reaches ``threshold``. Such near-duplicates
+    reuse its retrieved resume text but are still generated separately,
+    since small differences in a posting matter to its documents.
+
+    Returns:
+        list: For each job, the index of the job it resembles, or None.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    similarity = matrix @ matrix.T
+
+    similar_to = [None] * len(vectors)
+    for index in range(len(vectors)):
+        if duplicate_of[index] is not None:
+            continue
+        for earlier in range(index):
+            if (duplicate_of[earlier] is None and similar_to[earlier] is None
+                    and similarity[index, earlier] >= threshold):
+                similar_to[index] = earlier
+                break
+    return similar_to
+
+
+def submit_batch(resume_data, jobs, user_id, use_cache=False):
+    """
+    Does the batch's shared work and queues one generation job per
+    distinct posting.
+
+    Args:
+        resume_data (dict): Parsed resume data.
+        jobs (list): Dicts with title and description.
+        user_id (str): The user, charged one application per job generated.
+        use_cache (bool): Reuse and store documents in the response cache,
+            as the user chose on the page.
+
+    Returns:
+        dict: The batch: id and a list of entries with title, description,
+        duplicate_of and either job_id or (for cache hits) result.
+
+    Raises:
+        metering.QuotaExceeded: If the plan doesn't cover the distinct
+            postings that need generating.
+    """
+    timings = {}
+    embeddings = resources.get_embeddings()
+    with metrics.timer("batch.embed", timings):
+        vectors = embeddings.embed_documents([job["description"] for job in jobs])
+    duplicate_of = group_duplicates(jobs)
+    similar_to = group_similar(vectors, config.get_job_similarity_threshold(), duplicate_of)
+
+    entries = []
+    for job, original in zip(jobs, duplicate_of):
+        entry = {**job, "duplicate_of": original}
+        if original is None and use_cache:
+            cached = ai_generator.get_cached_documents(resume_data, job["description"])
+            if cached:
+                entry["result"] = {"resume": cached[0], "cover_letter": cached[1],
+                                   "timings": {}}
+        entries.append(entry)
+
+    to_generate = [index for index, entry in enumerate(entries)
+                   if entry["duplicate_of"] is None and "result" not in entry]
+    if to_generate:
+        metering.check_quota(user_id, applications=len(to_generate))
+        with metrics.timer("batch.index", timings):
+            resume_index = ai_generator.create_resume_index(resume_data, user_id)
+
+    queue = job_queue.get_queue()
+    batch_id = uuid.uuid4().hex
+    retrieved = {}
+    with metrics.timer("batch.retrieval", timings):
+        for index in to_generate:
+            entry = entries[index]
+            source = index if similar_to[index] is None else similar_to[index]
+            if source not in retrieved:
+                retrieved[source] = ai_generator.retrieve_relevant_text(
+                    resume_index, vectors[source])
+            relevant_text = retrieved[source]
+            entry["job_id"] = queue.enqueue("generate_documents", {
+                "resume_data": resume_data,
+                "job_description": entry["description"],
+                "user_id": user_id,
+                "use_cache": use_cache,
+                "relevant_text": relevant_text,
+                "batch_id": batch_id,
+            }, user_id=user_id)
+
+    metrics.increment("batch.jobs", len(jobs))
+    metrics.increment("batch.duplicates", sum(original is not None for original in duplicate_of))
+    metrics.increment("batch.shared_retrievals", len(to_generate) - len(retrieved))
+    return {"id": batch_id, "entries": entries, "timings": timings}
+
+
+def refresh_batch(batch):
+    """
+    Copies finished jobs' results and errors into the batch's entries.
+
+    Returns:
+        int: Number of entries still generating.
+    """
+    queue = job_queue.get_queue()
+    pending = 0
+    for entry in batch["entries"]:
+        if "job_id" not in entry or "result" in entry or "error" in entry:
+            continue
+        job = queue.get(entry["job_id"])
+        if job is None or job["status"] == job_queue.FAILED:
+            entry["error"] = job["error"] if job else "Job not found"
+        elif job["status"] == job_queue.DONE:
+            entry["result"] = job["result"]
+        else:
+            pending += 1
+    return pending
+
+
+def _original(batch, entry):
+    if entry["duplicate_of"] is not None:
+        return batch["entries"][entry["duplicate_of"]]
+    return entry
+
+
+def entry_result(batch, entry):
+    """
+    Returns an entry's result, following duplicates to their original.
+    """
+    return _original(batch, entry).get("result")
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:60] or "job"
+
+
+def batch_zip(batch):
+    """
+    Packs every finished entry's documents into a zip file.
+
+    Returns:
+        bytes: The zip archive, with one folder per posting.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for number, entry in enumerate(batch["entries"], start=1):
+            result = entry_result(batch, entry)
+            if not result:
+                continue
+            folder = f"{number:02d}-{_slug(entry['title'])}"
+            archive.writestr(f"{folder}/job_description.txt", entry["description"])
+            archive.writestr(f"{folder}/resume.txt", result["resume"])
+            archive.writestr(f"{folder}/cover_letter.txt", result["cover_letter"])
+    return buffer.getvalue()
+
+
+def _read_jobs(source, user_id):
+    if source == "Paste":
+        text = st.text_area("Job descriptions, separated by a line containing only ---",
+                            height=300)
+        return jobs_from_text(text)
+
+    if source == "CSV upload":
+        uploaded_file = st.file_uploader("CSV with a description column", type=["csv"])
+        if uploaded_file is None:
+            return []
+        try:
+            return jobs_from_csv(uploaded_file.getvalue())
+        except (ValueError, UnicodeDecodeError) as e:
+            st.error(f"Error reading CSV: {str(e)}")
+            return []
+
+    postings = jobs_from_postings(job_ingest.list_postings(user_id))
+    if not postings:
+        st.write("No postings received from the browser extension yet.")
+        return []
+    titles = [posting["title"] for posting in postings]
+    selected = st.multiselect("Postings", range(len(postings)),
+                              format_func=titles.__getitem__)
+    return [postings[index] for index in selected]
+
+
+def show_batch_generation():
+    st.subheader("Batch Generate Documents")
+
+    user_id = st.session_state.get('user', {}).get('uid')
+    if not user_id:
+        st.warning("User not authenticated!")
+        return
+
+    resume_data = repository.get_parsed_resume(user_id)
+    if not resume_data:
+        st.warning("Please upload your resume first!")
+        return
+
+    source = st.radio("Job postings", SOURCES, horizontal=True)
+    jobs = _read_jobs(source, user_id)
+    if len(jobs) > MAX_BATCH_JOBS:
+        st.warning(f"Only the first {MAX_BATCH_JOBS} postings will be used.")
+        jobs = jobs[:MAX_BATCH_JOBS]
+
+    use_cache = st.checkbox(
+        "Reuse documents previously generated for these exact job descriptions",
+        value=False)
+
+    if st.button(f"Generate for {len(jobs)} posting(s)", disabled=not jobs):
+        try:
+            with st.spinner("Preparing batch..."):
+                st.session_state.batch = submit_batch(resume_data, jobs, user_id,
+                                                      use_cache=use_cache)
+        except metering.QuotaExceeded as e:
+            st.error(str(e))
+            return
+        except Exception as e:
+            st.error(f"Error starting batch: {str(e)}")
+            return
+
+    show_batch_results()
+
+
+def show_batch_results():
+    """
+    Shows the session's batch: progress, finished results and the zip
+    export, rerunning while jobs are still generating.
+    """
+    batch = st.session_state.get('batch')
+    if not batch:
+        return
+
+    pending = refresh_batch(batch)
+    entries = batch["entries"]
+    finished = sum("result" in _original(batch, entry) or "error" in _original(batch, entry)
+                   for entry in entries)
+    duplicates = sum(entry["duplicate_of"] is not None for entry in entries)
+    st.progress(finished / len(entries),
+                text=f"{finished} of {len(entries)} postings ready"
+                     + (f" · {duplicates} duplicate(s) share results" if duplicates else ""))
+
+    for number, entry in enumerate(entries, start=1):
+        result = entry_result(batch, entry)
+        original = _original(batch, entry)
+        if "error" in original:
+            st.error(f"{number}. {entry['title']}: {original['error']}")
+        elif result:
+            with st.expander(f"{number}. {entry['title']}"):
+                st.text_area("Tailored Resume", result["resume"], height=250,
+                             key=f"batch_resume_{number}")
+                st.text_area("Cover Letter", result["cover_letter"], height=250,
+                             key=f"batch_cover_letter_{number}")
+
+    if finished:
+        st.download_button("Download All (zip)", batch_zip(batch),
+                           file_name="applications.zip", mime="application/zip")
+
+    if pending:
+        time.sleep(ai_generator.JOB_POLL_SECONDS)
+        st.rerun()
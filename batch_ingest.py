@@ -0,0 +1,247 @@
+# batch_ingest.py
+"""
+Headless batch ingestion of resumes.
+
+Extracts text from many PDF/DOCX files in a process pool, parses them with
+OpenAI using bounded concurrency and stores the results in Firestore with
+batched writes. Progress is checkpointed so an interrupted run can be
+restarted and will skip files that were already stored.
+
+Usage:
+    python batch_ingest.py resumes/                 # user id = file name stem
+    python batch_ingest.py manifest.csv             # columns: path,user_id
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+import config
+import resources
+import text_extraction
+
+# Firestore accepts at most 500 operations per batch
+MAX_BATCH_SIZE = 500
+
+
+def load_inputs(source):
+    """
+    Lists the files to ingest from a directory or a CSV manifest.
+
+    Args:
+        source (str): A directory (user ids are the file name stems) or a CSV
+            manifest with ``path`` and ``user_id`` columns.
+
+    Returns:
+        list: (path, user_id) pairs.
+
+    Raises:
+        ValueError: If files in a directory share a name stem, since they
+            would be stored under the same user id.
+    """
+    if os.path.isdir(source):
+        inputs = []
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if text_extraction.is_supported(name):
+                    path = os.path.join(root, name)
+                    inputs.append((path, os.path.splitext(name)[0]))
+
+        paths_by_user = {}
+        for path, user_id in inputs:
+            paths_by_user.setdefault(user_id, []).append(path)
+        duplicates = {user_id: paths for user_id, paths in paths_by_user.items()
+                      if len(paths) > 1}
+        if duplicates:
+            details = "; ".join(f"{user_id}: {', '.join(paths)}"
+                                for user_id, paths in sorted(duplicates.items()))
+            raise ValueError(f"Files share a user id (file name stem), use a CSV "
+                             f"manifest instead: {details}")
+        return inputs
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, newline="") as f:
+        return [(os.path.join(base_dir, row["path"]), row["user_id"])
+                for row in csv.DictReader(f)]
+
+
+def load_checkpoint(path):
+    """
+    Returns the set of file paths already stored by a previous run.
+    """
+    done = set()
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["path"])
+                except (ValueError, KeyError):
+                    continue  # Partially written line from a crash
+    return done
+
+
+def _extract(item):
+    path, user_id = item
+    try:
+        text = text_extraction.extract_text_from_path(
+            path, **config.get_pdf_extraction_options())
+        return path, user_id, text, None
+    except Exception as e:
+        return path, user_id, "", str(e)
+
+
+class BatchWriter:
+    """
+    Buffers parsed resumes and writes them to Firestore in batches, recording
+    each committed file in the checkpoint.
+    """
+
+    def __init__(self, db, checkpoint_path, batch_size):
+        self.db = db
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.pending = []
+        self.written = 0
+
+    def add(self, path, user_id, parsed_data):
+        self.pending.append((path, user_id, parsed_data))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch = self.db.batch()
+        for _, user_id, parsed_data in self.pending:
+            batch.set(self.db.collection('users').document(user_id),
+                      {'parsed_resume': parsed_data}, merge=True)
+        batch.commit()
+
+        # Only record files once their batch is durably committed
+        with open(self.checkpoint_path, "a") as f:
+            for path, user_id, _ in self.pending:
+                f.write(json.dumps({"path": path, "user_id": user_id}) + "\n")
+        self.written += len(self.pending)
+        self.pending = []
+
+
+def run(source, workers, concurrency, batch_size, checkpoint_path):
+    """
+    Ingests every resume listed by ``source`` that is not yet checkpointed.
+
+    Returns:
+        dict: Counts of stored, failed and skipped files plus throughput.
+    """
+    # Imported here so extraction worker processes don't initialize Firebase
+    # and OpenAI clients they never use
+    import resume_parser
+
+    inputs = load_inputs(source)
+    done = load_checkpoint(checkpoint_path)
+    todo = [item for item in inputs if item[0] not in done]
+    print(f"{len(inputs)} files, {len(inputs) - len(todo)} already ingested, "
+          f"{len(todo)} to process", file=sys.stderr)
+
+    directory = os.path.dirname(checkpoint_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    writer = BatchWriter(resources.get_db(), checkpoint_path, batch_size)
+    failed = 0
+    start = time.perf_counter()
+
+    def handle(future):
+        nonlocal failed
+        path, user_id, parsed_data, error = future.result()
+        if parsed_data:
+            writer.add(path, user_id, parsed_data)
+        else:
+            failed += 1
+            print(f"Failed to parse {path}: {error or 'no data'}", file=sys.stderr)
+
+    def parse(path, user_id, text):
+        # parse_resume raises instead of reporting through the Streamlit page
+        try:
+            return path, user_id, resume_parser.parse_resume(text), None
+        except Exception as e:
+            return path, user_id, {}, str(e)
+
+    with ProcessPoolExecutor(max_workers=workers) as extract_pool, \
+            ThreadPoolExecutor(max_workers=concurrency) as parse_pool:
+        in_flight = set()
+
+        def extracted(future):
+            nonlocal failed, in_flight
+            path, user_id, text, error = future.result()
+            if error or not text.strip():
+                failed += 1
+                print(f"Failed to extract {path}: {error or 'no text'}",
+                      file=sys.stderr)
+                return
+
+            in_flight.add(parse_pool.submit(parse, path, user_id, text))
+            # Keep a bounded number of extracted texts waiting to be parsed
+            if len(in_flight) >= concurrency * 2:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for finished_future in finished:
+                    handle(finished_future)
+
+        # Submit extractions in a window of twice the pool size rather than
+        # all at once, so only a bounded number of texts is held in memory
+        window = 2 * (workers or os.cpu_count() or 1)
+        extracting = deque()
+        for item in todo:
+            extracting.append(extract_pool.submit(_extract, item))
+            if len(extracting) >= window:
+                extracted(extracting.popleft())
+        while extracting:
+            extracted(extracting.popleft())
+
+        for future in in_flight:
+            handle(future)
+
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    processed = writer.written + failed
+    return {
+        "stored": writer.written,
+        "failed": failed,
+        "skipped": len(inputs) - len(todo),
+        "seconds": elapsed,
+        "files_per_second": processed / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-ingest resumes into Firestore.")
+    parser.add_argument("source", help="Directory of resumes or CSV manifest (path,user_id)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Processes used for text extraction")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Maximum concurrent OpenAI parse calls")
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help="Firestore writes per batch (max 500)")
+    parser.add_argument("--checkpoint",
+                        default=os.path.join(config.get_cache_dir(), "batch_ingest.jsonl"),
+                        help="File recording ingested resumes, used to resume")
+    args = parser.parse_args()
+
+    try:
+        load_inputs(args.source)
+    except ValueError as e:
+        parser.error(str(e))
+
+    summary = run(args.source, args.workers, args.concurrency, args.batch_size,
+                  args.checkpoint)
+    print(f"Stored {summary['stored']}, failed {summary['failed']}, "
+          f"skipped {summary['skipped']} in {summary['seconds']:.1f}s "
+          f"({summary['files_per_second']:.2f} files/sec)")
+
+
+if __name__ == "__main__":
+    main()
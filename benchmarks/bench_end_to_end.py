@@ -0,0 +1,377 @@
+# benchmarks/bench_end_to_end.py
+"""
+End-to-end benchmark of the app's main flows, fully offline.
+
+OpenAI, Firestore and Stripe are replaced by local fakes (fake_openai.py,
+fake_firestore.py and fake_stripe.py, or stripe-mock via
+--stripe-api-base), seeded with synthetic users, resumes and applications.
+Tokens are counted approximately, as the OpenAI fake does; --tiktoken
+counts them with tiktoken instead, which needs its cl100k_base encoding
+cached (TIKTOKEN_CACHE_DIR) or network access.
+The real app code is then driven through these workloads:
+
+    parse_resume           resume_parser.parse_resume_with_openai on varied resumes
+    generate_resume        ai_generator.generate_resume for varied job postings
+    generate_cover_letter  ai_generator.generate_cover_letter for the same postings
+    tracker                application_tracker.show_tracker, rendered headless
+                           with Streamlit's AppTest (first views build the summary)
+    subscription_check     payment.check_subscription_status, for users with
+                           fresh and stale stored subscription state
+
+For each workload it reports p50/p95 latency, errors, OpenAI calls and
+tokens, Firestore reads and writes, and Stripe calls. Results are written
+as JSON; pass an earlier file as --baseline to print the changes.
+
+Usage:
+    python benchmarks/bench_end_to_end.py [--users 4] [--iterations 20]
+        [--applications 2000] [--llm-latency 0.3] [--token-rate 50]
+        [--firestore-latency 0.005] [--stripe-latency 0.1]
+        [--stripe-api-base URL] [--tiktoken] [--output FILE] [--baseline FILE]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS))
+
+from fake_firestore import FakeFirestore, install  # noqa: E402
+from fake_openai import install_token_counter  # noqa: E402
+from fake_openai import start_server as start_openai  # noqa: E402
+from fake_stripe import start_server as start_stripe  # noqa: E402
+
+WORKLOADS = ("parse_resume", "generate_resume", "generate_cover_letter", "tracker",
+             "subscription_check")
+
+ROLES = ["Software Engineer", "Data Scientist", "Backend Developer", "Frontend Engineer",
+         "Machine Learning Engineer", "DevOps Engineer", "Data Engineer", "QA Engineer"]
+COMPANIES = [f"Company {i}" for i in range(200)]
+LOCATIONS = ["Remote", "New York, NY", "San Francisco, CA", "Austin, TX", "London, UK",
+             "Berlin, Germany", "Toronto, ON"]
+STATUSES = ["Applied", "Interview Scheduled", "Offer Received", "Rejected"]
+SKILLS = ["Python", "SQL", "AWS", "Docker", "Kubernetes", "React", "TypeScript",
+          "Spark", "Airflow", "PyTorch", "Go", "Terraform", "PostgreSQL", "Kafka"]
+DUTIES = ["Designed and built {skill} services handling {n}k requests per second",
+          "Led a team of {n} engineers delivering a {skill} migration",
+          "Cut infrastructure costs by {n}% by re-architecting {skill} pipelines",
+          "Mentored {n} junior engineers and ran {skill} code reviews",
+          "Shipped {n} customer-facing features using {skill}"]
+
+
+def configure_environment(openai_server, stripe_api_base, cache_dir):
+    # Set before the app modules are imported; config reads them on use
+    os.environ.update({
+        "FIREBASE_PROJECT_ID": "benchmark",
+        "FIREBASE_API_KEY": "benchmark",
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": openai_server.base_url,
+        "STRIPE_API_KEY": "sk_test_benchmark",
+        "STRIPE_API_BASE": stripe_api_base,
+        "APP_CACHE_DIR": cache_dir,
+        "JOB_WORKERS": "0",
+        "LLM_RATE_LIMITS": json.dumps({model: {"rpm": 100000, "tpm": 100000000}
+                                       for model in ("gpt-4", "gpt-4o",
+                                                     "text-embedding-ada-002")}),
+    })
+
+
+def _duty(rng):
+    return rng.choice(DUTIES).format(skill=rng.choice(SKILLS), n=rng.randint(2, 40))
+
+
+def resume_data(rng, name):
+    """
+    Builds a parsed resume following plain_text_resume.yaml.
+    """
+    return {
+        "personal_information": {"name": name, "surname": "Bench",
+                                 "email": f"{name.lower()}@example.com",
+                                 "city": rng.choice(LOCATIONS)},
+        "experience_details": [{
+            "position": rng.choice(ROLES),
+            "company": rng.choice(COMPANIES),
+            "employment_period": f"{2010 + i * 3} - {2013 + i * 3}",
+            "location": rng.choice(LOCATIONS),
+            "key_responsibilities": [{f"responsibility_{n}": _duty(rng)}
+                                     for n in range(1, 5)],
+            "skills_acquired": rng.sample(SKILLS, 4),
+        } for i in range(4)],
+        "education_details": [{"education_level": "BSc", "institution": "State University",
+                               "field_of_study": "Computer Science",
+                               "year_of_completion": "2010"}],
+        "projects": [{"name": f"Project {i}", "description": _duty(rng)} for i in range(3)],
+        "languages": [{"language": "English", "proficiency": "Native"}],
+    }
+
+
+def resume_text(rng, index):
+    """
+    Builds the extracted text of a resume; the index keeps every text
+    distinct so parse responses aren't served from the LLM cache.
+    """
+    roles = "\n".join(
+        f"{rng.choice(ROLES)} at {rng.choice(COMPANIES)} ({2010 + i * 3} - {2013 + i * 3})\n"
+        + "\n".join(f"- {_duty(rng)}" for _ in range(4))
+        for i in range(4))
+    return (f"Candidate {index} Bench\ncandidate{index}@example.com | +1 555 {index:04d}\n\n"
+            f"Summary\nEngineer with {rng.randint(3, 15)} years of experience.\n\n"
+            f"Experience\n{roles}\n\n"
+            f"Education\nBSc Computer Science, State University, 2010\n\n"
+            f"Skills\n{', '.join(rng.sample(SKILLS, 8))}\n\n"
+            f"Languages\nEnglish (Native), Spanish (Intermediate)\n")
+
+
+def job_description(rng, index):
+    return (f"{rng.choice(ROLES)} - {rng.choice(COMPANIES)} (posting {index})\n\n"
+            f"We are looking for an engineer to join our team in {rng.choice(LOCATIONS)}.\n"
+            "Requirements:\n"
+            + "\n".join(f"- {rng.randint(2, 8)}+ years with {skill}"
+                        for skill in rng.sample(SKILLS, 5))
+            + "\nResponsibilities:\n" + "\n".join(f"- {_duty(rng)}" for _ in range(4)))
+
+
+def seed(db, stripe_server, users, applications, rng):
+    """
+    Stores users, their subscription state and applications in the fake.
+
+    Users alternate between a paid plan with fresh state, a paid plan whose
+    state is stale (refreshed from Stripe on first check) and the free plan.
+
+    Returns:
+        list: The user IDs.
+    """
+    now = datetime.now(timezone.utc)
+    user_ids = []
+    for i in range(users):
+        user_id = f"bench-user-{i}"
+        user_ids.append(user_id)
+        customer_id = f"cus_bench{i}" if i % 3 != 2 else None
+        user = {"name": f"User{i}", "email": f"user{i}@example.com",
+                "parsed_resume": resume_data(rng, f"User{i}")}
+        if customer_id:
+            user["stripe_customer_id"] = customer_id
+            if stripe_server:
+                stripe_server.add_subscription(customer_id, plan="Pro", user_id=user_id)
+        db.load(f"users/{user_id}", user)
+
+        subscription = {"synced_at": time.time()}
+        if i % 3 == 0:
+            subscription.update(plan="Pro", status="active", stripe_customer_id=customer_id)
+        elif i % 3 == 1:
+            subscription.update(synced_at=0, stripe_customer_id=customer_id)
+        db.load(f"users/{user_id}/meta/subscription", subscription)
+
+        for n in range(applications):
+            db.load(f"users/{user_id}/applications/app{n:06d}", {
+                "company": rng.choice(COMPANIES),
+                "position": f"{rng.choice(['', 'Senior ', 'Staff '])}{rng.choice(ROLES)}",
+                "location": rng.choice(LOCATIONS),
+                "status": rng.choices(STATUSES, weights=[60, 20, 5, 15])[0],
+                "date": now - timedelta(days=rng.randint(0, 365)),
+            })
+    return user_ids
+
+
+def _tracker_page():
+    # Run by AppTest as a standalone script
+    import application_tracker
+
+    application_tracker.show_tracker()
+
+
+def workload(name, user_ids, rng):
+    """
+    Returns the function run for iteration ``i`` of a workload.
+    """
+    if name == "parse_resume":
+        import resume_parser
+
+        texts = {}
+
+        def run(i):
+            text = texts.setdefault(i, resume_text(rng, i))
+            if not resume_parser.parse_resume_with_openai(text, user_ids[i % len(user_ids)]):
+                raise RuntimeError("parse returned no data")
+        return run
+
+    if name in ("generate_resume", "generate_cover_letter"):
+        import ai_generator
+        import repository
+
+        generate = getattr(ai_generator, name)
+        jobs = {}
+
+        def run(i):
+            user_id = user_ids[i % len(user_ids)]
+            job = jobs.setdefault(i, job_description(random.Random(i), i))
+            generate(repository.get_parsed_resume(user_id), job, user_id)
+        return run
+
+    if name == "tracker":
+        from streamlit.testing.v1 import AppTest
+
+        def run(i):
+            user_id = user_ids[i % len(user_ids)]
+            page = AppTest.from_function(_tracker_page, default_timeout=120)
+            page.session_state["user"] = {"uid": user_id, "name": user_id, "email": ""}
+            page.run()
+            if page.exception:
+                raise RuntimeError(page.exception[0].message)
+        return run
+
+    if name == "subscription_check":
+        import payment
+
+        def run(i):
+            payment.check_subscription_status(user_ids[i % len(user_ids)])
+        return run
+
+    raise ValueError(f"Unknown workload {name}")
+
+
+def run_workload(name, run, iterations, concurrency, db, openai_server, stripe_server):
+    import metrics
+
+    metrics.reset()
+    before = (db.reads, db.writes, openai_server.calls,
+              stripe_server.calls if stripe_server else 0)
+    errors = []
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            run(i)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        metrics.record(f"bench.{name}", time.perf_counter() - start)
+
+    # Streamlit's AppTest runs one script at a time
+    workers = 1 if name == "tracker" else concurrency
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(timed, range(iterations)))
+
+    stats = metrics.snapshot()
+    timing = stats[f"bench.{name}"]
+    return {
+        "runs": iterations,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": timing["p50"] * 1000,
+        "p95_ms": timing["p95"] * 1000,
+        "mean_ms": timing["mean"] * 1000,
+        "max_ms": timing["max"] * 1000,
+        "openai_calls": openai_server.calls - before[2],
+        "prompt_tokens": sum(value for key, value in stats.items()
+                             if key.startswith("llm.prompt_tokens.")),
+        "completion_tokens": sum(value for key, value in stats.items()
+                                 if key.startswith("llm.completion_tokens.")),
+        "firestore_reads": db.reads - before[0],
+        "firestore_writes": db.writes - before[1],
+        "stripe_calls": (stripe_server.calls if stripe_server else 0) - before[3],
+    }
+
+
+def print_results(results, baseline=None):
+    print(f"{'workload':<22}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}{'openai':>8}"
+          f"{'tokens':>9}{'reads':>8}{'writes':>8}{'stripe':>8}")
+    for name, result in results.items():
+        print(f"{name:<22}{result['p50_ms']:9.0f}{result['p95_ms']:9.0f}{result['errors']:8d}"
+              f"{result['openai_calls']:8d}"
+              f"{result['prompt_tokens'] + result['completion_tokens']:9d}"
+              f"{result['firestore_reads']:8d}{result['firestore_writes']:8d}"
+              f"{result['stripe_calls']:8d}")
+        if result["first_error"]:
+            print(f"    first error: {result['first_error']}")
+
+    if not baseline:
+        return
+    print("\nChange from baseline:")
+    for name, result in results.items():
+        previous = baseline["workloads"].get(name)
+        if not previous:
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "firestore_reads", "prompt_tokens"):
+            if previous[key]:
+                changes.append(f"{key} {100 * (result[key] - previous[key]) / previous[key]:+.0f}%")
+        print(f"{name:<22}{', '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--applications", type=int, default=2000,
+                        help="applications per user")
+    parser.add_argument("--workloads", nargs="+", default=list(WORKLOADS), choices=WORKLOADS)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--token-rate", type=float, default=50,
+                        help="fake completion tokens per second")
+    parser.add_argument("--firestore-latency", type=float, default=0.005)
+    parser.add_argument("--stripe-latency", type=float, default=0.1)
+    parser.add_argument("--stripe-api-base",
+                        help="use this Stripe API (e.g. stripe-mock) instead of the fake")
+    parser.add_argument("--tiktoken", action="store_true",
+                        help="count tokens with tiktoken (downloads its encoding)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON results file (default: "
+                                         "benchmarks/results/e2e-<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare with")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    openai_server = start_openai(latency=args.llm_latency, rpm=0, token_rate=args.token_rate)
+    stripe_server = None
+    if not args.stripe_api_base:
+        stripe_server = start_stripe(latency=args.stripe_latency)
+    cache_dir = tempfile.mkdtemp(prefix="bench-e2e-")
+    configure_environment(openai_server, args.stripe_api_base or stripe_server.api_base,
+                          cache_dir)
+    if not args.tiktoken:
+        install_token_counter()
+
+    db = FakeFirestore(latency=args.firestore_latency)
+    install(db)
+    user_ids = seed(db, stripe_server, args.users, args.applications, rng)
+
+    results = {}
+    for name in args.workloads:
+        run = workload(name, user_ids, rng)
+        results[name] = run_workload(name, run, args.iterations, args.concurrency, db,
+                                     openai_server, stripe_server)
+
+    openai_server.shutdown()
+    if stripe_server:
+        stripe_server.shutdown()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(
+        BENCHMARKS, "results", f"e2e-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "settings": vars(args),
+            "workloads": results,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
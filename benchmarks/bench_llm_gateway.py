@@ -0,0 +1,89 @@
+# benchmarks/bench_llm_gateway.py
+"""
+Drives concurrent chat completions through the LLM gateway against the
+local fake OpenAI server and reports latency, queue wait, retries, 429s
+and coalesced requests.
+
+Some of the requests are duplicates of each other so coalescing shows up.
+The gateway's RPM limit is set just below the fake server's, so requests
+should queue in the gateway rather than fail with 429s. Tokens are counted
+approximately unless --tiktoken is given, so no encoding is downloaded.
+
+Usage:
+    python benchmarks/bench_llm_gateway.py [--requests 100] [--concurrency 20]
+        [--server-rpm 120] [--latency 0.3] [--duplicates 0.2] [--tiktoken]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI  # noqa: E402
+
+import metrics  # noqa: E402
+from fake_openai import install_token_counter, start_server  # noqa: E402
+from llm_gateway import LLMGateway  # noqa: E402
+
+MODEL = "gpt-4"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--server-rpm", type=int, default=120)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--duplicates", type=float, default=0.2,
+                        help="fraction of requests repeating an earlier prompt")
+    parser.add_argument("--tiktoken", action="store_true",
+                        help="count tokens with tiktoken (downloads its encoding)")
+    args = parser.parse_args()
+    if not args.tiktoken:
+        install_token_counter()
+
+    server = start_server(latency=args.latency, rpm=args.server_rpm)
+    client = OpenAI(api_key="fake", base_url=server.base_url, max_retries=0)
+    gateway = LLMGateway(client, {MODEL: {"rpm": int(args.server_rpm * 0.9),
+                                          "tpm": 1000000}})
+
+    prompts = []
+    for i in range(args.requests):
+        if prompts and random.random() < args.duplicates:
+            prompts.append(random.choice(prompts[-args.concurrency:]))
+        else:
+            prompts.append(f"Write a cover letter for job {i}.")
+
+    def call(prompt):
+        return gateway.chat(MODEL, [{"role": "user", "content": prompt}],
+                            temperature=0, max_tokens=100)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(call, prompts))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    stats = metrics.snapshot()
+    print(f"{args.requests} requests in {elapsed:.1f}s "
+          f"({args.requests / elapsed:.1f}/s), concurrency {args.concurrency}")
+    print(f"API calls: {server.calls}, rejected with 429: {server.rejected}")
+    print(f"coalesced: {stats.get('llm.coalesced', 0)}, "
+          f"retries: {stats.get(f'llm.retries.{MODEL}', 0)}, "
+          f"errors: {stats.get(f'llm.errors.{MODEL}', 0)}")
+    for name in (f"llm.latency.{MODEL}", f"llm.queue_wait.{MODEL}"):
+        timing = stats.get(name)
+        if timing:
+            print(f"{name:<24} p50 {timing['p50'] * 1000:8.0f} ms  "
+                  f"p95 {timing['p95'] * 1000:8.0f} ms  max {timing['max'] * 1000:8.0f} ms")
+    print(f"prompt tokens: {stats.get(f'llm.prompt_tokens.{MODEL}', 0)}, "
+          f"completion tokens: {stats.get(f'llm.completion_tokens.{MODEL}', 0)}")
+
+
+if __name__ == "__main__":
+    main()
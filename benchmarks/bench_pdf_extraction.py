@@ -0,0 +1,66 @@
+# benchmarks/bench_pdf_extraction.py
+"""
+Compares PDF extraction modes on a set of resumes.
+
+Usage:
+    python benchmarks/bench_pdf_extraction.py path/to/resumes [more paths...]
+        [--repeat 3] [--char-budget 20000] [--max-pages 10]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import text_extraction  # noqa: E402
+
+
+def collect_pdfs(paths):
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                pdfs.extend(os.path.join(root, name) for name in sorted(files)
+                            if name.lower().endswith(text_extraction.PDF_EXTENSIONS))
+        else:
+            pdfs.append(path)
+    return pdfs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="PDF files or directories")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--char-budget", type=int, default=None)
+    parser.add_argument("--max-pages", type=int, default=0)
+    args = parser.parse_args()
+
+    pdfs = collect_pdfs(args.paths)
+    if not pdfs:
+        parser.error("no PDF files found")
+
+    print(f"{len(pdfs)} PDFs, {args.repeat} runs each")
+    print(f"{'mode':<6} {'mean ms':>10} {'p95 ms':>10} {'chars':>10}")
+    for mode in text_extraction.EXTRACTION_MODES:
+        durations = []
+        chars = 0
+        for _ in range(args.repeat):
+            for pdf in pdfs:
+                start = time.perf_counter()
+                text = text_extraction.extract_pdf_text(
+                    pdf, mode=mode, max_pages=args.max_pages,
+                    char_budget=args.char_budget)
+                durations.append((time.perf_counter() - start) * 1000)
+                chars += len(text)
+        durations.sort()
+        p95 = durations[min(len(durations) - 1, int(0.95 * len(durations)))]
+        print(f"{mode:<6} {statistics.mean(durations):>10.1f} {p95:>10.1f} "
+              f"{chars // args.repeat:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_startup.py
+"""
+Measures cold-start import time of the Streamlit app.
+
+Each run imports ``app`` in a fresh interpreter, so nothing is shared
+between runs. The slowest modules by cumulative import time (from
+``python -X importtime``) are listed to show where startup time goes.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--module app] [--top 15]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importing the app only reads these; placeholder values are enough
+PLACEHOLDER_ENV = {
+    "FIREBASE_PROJECT_ID": "benchmark",
+    "FIREBASE_API_KEY": "benchmark",
+}
+
+
+def run_import(module, env):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return elapsed, result.stderr
+
+
+def slowest_imports(importtime_output, top):
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    modules = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append((int(cumulative_us), name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app cold-start import time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    env = {**PLACEHOLDER_ENV, **os.environ}
+    durations = []
+    output = ""
+    for _ in range(args.runs):
+        elapsed, output = run_import(args.module, env)
+        durations.append(elapsed)
+
+    print(f"import {args.module}: mean {statistics.mean(durations) * 1000:.0f} ms, "
+          f"min {min(durations) * 1000:.0f} ms over {args.runs} runs")
+    print("\nSlowest imports (cumulative, last run):")
+    for cumulative_us, name in slowest_imports(output, args.top):
+        print(f"  {cumulative_us / 1000:>8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_tracker_analytics.py
+"""
+Times the tracker's insights on synthetic users with many applications.
+
+Measures the work tracker_aggregates does for the page: building a summary
+from scratch (the first view, or after a TERMS_VERSION bump), the counter
+update of one application write, and turning the summary into chart data,
+which is all a dashboard rerun computes.
+
+Usage:
+    python benchmarks/bench_tracker_analytics.py [--users 3] [--applications 10000]
+        [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracker_aggregates  # noqa: E402
+
+COMPANIES = [f"Company {i}" for i in range(400)]
+LOCATIONS = ["Remote", "New York, NY", "San Francisco, CA", "Austin, TX", "London, UK",
+             "Berlin, Germany", "Toronto, ON", "Seattle, WA", "Chicago, IL", "Boston, MA"]
+STATUSES = ["Applied", "Interview Scheduled", "Offer Received", "Rejected"]
+SENIORITY = ["", "Junior", "Senior", "Staff", "Lead", "Principal"]
+ROLES = ["Software Engineer", "Data Scientist", "Backend Developer",
+         "Frontend Engineer", "Machine Learning Engineer", "DevOps Engineer",
+         "Product Manager", "Full-Stack Developer", "Data Engineer", "QA Engineer"]
+TEAMS = ["", "for the Payments Team", "in Cloud Infrastructure", "of the Search Platform",
+         "and Analytics", "with Python and AWS"]
+
+
+def synthetic_applications(count, seed):
+    rng = random.Random(seed)
+    start = datetime(2022, 1, 1)
+    return [{
+        'date': start + timedelta(days=rng.randrange(900)),
+        'company': rng.choice(COMPANIES),
+        'position': " ".join(filter(None, (rng.choice(SENIORITY), rng.choice(ROLES),
+                                           rng.choice(TEAMS)))),
+        'location': rng.choice(LOCATIONS),
+        'status': rng.choice(STATUSES),
+    } for _ in range(count)]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--applications", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    users = [synthetic_applications(args.applications, seed) for seed in range(args.users)]
+    print(f"{args.users} users x {args.applications} applications")
+
+    build, write, render = [], [], []
+    for applications in users:
+        summary, elapsed = timed(tracker_aggregates.compute_summary, applications)
+        build.append(elapsed)
+        for application in applications[:args.repeat]:
+            write.append(timed(tracker_aggregates.application_counters, application)[1])
+        for _ in range(args.repeat):
+            render.append(timed(tracker_aggregates.insights_from_summary, summary)[1])
+
+    print(f"{'stage':<28} {'mean ms':>10} {'max ms':>10}")
+    for name, values in (("compute_summary (build)", build),
+                         ("application_counters", write),
+                         ("insights_from_summary", render)):
+        print(f"{name:<28} {statistics.mean(values):>10.1f} {max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
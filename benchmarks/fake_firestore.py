@@ -0,0 +1,446 @@
+# benchmarks/fake_firestore.py
+"""
+In-memory stand-in for the Firestore client, for running the app offline.
+
+Implements the subset of the google-cloud-firestore API the app uses:
+document get/set (with merge)/create/update/delete, ``Increment``,
+``SERVER_TIMESTAMP`` and ``DELETE_FIELD``; collection queries with
+``FieldFilter`` filters, ``order_by``, ``limit``, ``start_after`` and
+``count()``; document and query ``on_snapshot`` listeners; batches and
+transactions. Every call sleeps for a simulated round trip and counts
+billed document reads and writes.
+
+``install(db)`` makes ``resources.get_db`` return the fake and swaps in a
+``firestore.transactional`` that works with its transactions:
+
+    db = FakeFirestore(latency=0.005)
+    install(db)
+"""
+
+import copy
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from google.cloud.firestore_v1 import transforms
+
+_OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+    "array_contains_any": lambda a, b: isinstance(a, list) and any(v in a for v in b),
+}
+
+
+def _normalize(value):
+    # Firestore stores naive datetimes as UTC and returns aware ones
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def _apply(target, updates, merge):
+    """
+    Writes ``updates`` into ``target``, resolving field transforms.
+    """
+    for key, value in updates.items():
+        if value is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        elif value is transforms.SERVER_TIMESTAMP:
+            target[key] = datetime.now(timezone.utc)
+        elif isinstance(value, transforms.Increment):
+            current = target.get(key)
+            target[key] = (current if isinstance(current, (int, float)) else 0) + value.value
+        elif isinstance(value, dict) and merge:
+            existing = target.get(key)
+            target[key] = existing if isinstance(existing, dict) else {}
+            _apply(target[key], value, merge)
+        elif isinstance(value, dict):
+            target[key] = {}
+            _apply(target[key], value, merge)
+        else:
+            target[key] = _normalize(copy.deepcopy(value))
+
+
+def _field(data, path):
+    for part in path.split("."):
+        if not isinstance(data, dict) or part not in data:
+            return None
+        data = data[part]
+    return data
+
+
+class _Change:
+    def __init__(self, kind, document):
+        self.type = type("ChangeType", (), {"name": kind})()
+        self.document = document
+
+
+class _Watch:
+    def __init__(self, query, callback):
+        self.query = query
+        self.callback = callback
+        self.known = {}
+
+    def unsubscribe(self):
+        self.query._db._watches.discard(self)
+
+
+class _AggregationResult:
+    def __init__(self, value):
+        self.alias = "count"
+        self.value = value
+
+
+class DocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self._data = data
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path):
+        return _field(self._data or {}, field_path)
+
+
+class DocumentReference:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+
+    @property
+    def id(self):
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        return CollectionReference(self._db, self.path.rsplit("/", 1)[0])
+
+    def collection(self, name):
+        return CollectionReference(self._db, f"{self.path}/{name}")
+
+    def get(self, transaction=None):
+        self._db._round_trip()
+        with self._db._lock:
+            self._db.reads += 1
+            data = self._db._docs.get(self.path)
+            return DocumentSnapshot(self, copy.deepcopy(data))
+
+    def set(self, data, merge=False):
+        self._db._round_trip()
+        self._db._write(self, data, merge)
+
+    def create(self, data):
+        from google.api_core.exceptions import AlreadyExists
+
+        self._db._round_trip()
+        with self._db._lock:
+            if self.path in self._db._docs:
+                raise AlreadyExists(f"Document already exists: {self.path}")
+            self._db._write(self, data, merge=False)
+
+    def update(self, data):
+        from google.api_core.exceptions import NotFound
+
+        self._db._round_trip()
+        with self._db._lock:
+            if self.path not in self._db._docs:
+                raise NotFound(f"No document to update: {self.path}")
+            self._db._update(self, data)
+
+    def delete(self):
+        self._db._round_trip()
+        self._db._delete(self)
+
+    def on_snapshot(self, callback):
+        return _DocumentQuery(self).on_snapshot(callback)
+
+
+class Query:
+    def __init__(self, db, path, filters=(), orders=(), limit=None, cursor=None):
+        self._db = db
+        self._path = path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit
+        self._cursor = cursor
+
+    def _copy(self, **changes):
+        state = {"filters": self._filters, "orders": self._orders,
+                 "limit": self._limit, "cursor": self._cursor, **changes}
+        return Query(self._db, self._path, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, _normalize(value)),))
+
+    def order_by(self, field_path, direction="ASCENDING"):
+        return self._copy(orders=self._orders + ((field_path, direction == "DESCENDING"),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, snapshot):
+        return self._copy(cursor=snapshot)
+
+    def _matches(self, data):
+        for field, op, value in self._filters:
+            found = _field(data, field)
+            if found is None:
+                return False
+            try:
+                if not _OPERATORS[op](found, value):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    def _results(self):
+        # Caller holds the lock
+        prefix = self._path + "/"
+        rows = [(path, data) for path, data in self._db._docs.items()
+                if path.startswith(prefix) and "/" not in path[len(prefix):]
+                and self._matches(data)]
+        # Ties (and unordered queries) go by document ID, like Firestore
+        rows.sort(key=lambda row: row[0])
+        for index in reversed(range(len(self._orders))):
+            field, descending = self._orders[index]
+            rows.sort(key=lambda row: (_field(row[1], field) is None, _field(row[1], field)),
+                      reverse=descending)
+        if self._cursor is not None:
+            cursor_path = self._cursor.reference.path
+            paths = [path for path, _ in rows]
+            if cursor_path in paths:
+                rows = rows[paths.index(cursor_path) + 1:]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return [DocumentSnapshot(DocumentReference(self._db, path), copy.deepcopy(data))
+                for path, data in rows]
+
+    def stream(self, transaction=None):
+        self._db._round_trip()
+        with self._db._lock:
+            results = self._results()
+            # Queries are billed at least one read even when empty
+            self._db.reads += max(1, len(results))
+        return iter(results)
+
+    def get(self, transaction=None):
+        return list(self.stream(transaction))
+
+    def count(self):
+        query = self
+
+        class _Aggregation:
+            def get(self, transaction=None):
+                query._db._round_trip()
+                with query._db._lock:
+                    total = len(query._copy(limit=None)._results())
+                    query._db.reads += max(1, -(-total // 1000))
+                return [[_AggregationResult(total)]]
+
+        return _Aggregation()
+
+    def on_snapshot(self, callback):
+        watch = _Watch(self, callback)
+        with self._db._lock:
+            self._db._watches.add(watch)
+        self._db._notify(watch)
+        return watch
+
+
+class _DocumentQuery(Query):
+    # Watches one document; notified with the other documents of its collection
+    def __init__(self, reference):
+        super().__init__(reference._db, reference.path.rsplit("/", 1)[0])
+        self._reference = reference
+
+    def _results(self):
+        data = self._db._docs.get(self._reference.path)
+        if data is None:
+            return []
+        return [DocumentSnapshot(self._reference, copy.deepcopy(data))]
+
+
+class CollectionReference(Query):
+    def __init__(self, db, path):
+        super().__init__(db, path)
+
+    @property
+    def id(self):
+        return self._path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        if "/" not in self._path:
+            return None
+        return DocumentReference(self._db, self._path.rsplit("/", 1)[0])
+
+    def document(self, document_id=None):
+        return DocumentReference(self._db, f"{self._path}/{document_id or uuid.uuid4().hex[:20]}")
+
+
+class WriteBatch:
+    def __init__(self, db):
+        self._db = db
+        self._operations = []
+
+    def set(self, reference, data, merge=False):
+        self._operations.append(("set", reference, data, merge))
+
+    def update(self, reference, data):
+        self._operations.append(("update", reference, data, None))
+
+    def delete(self, reference):
+        self._operations.append(("delete", reference, None, None))
+
+    def commit(self):
+        self._db._round_trip()
+        with self._db._lock:
+            for kind, reference, data, merge in self._operations:
+                if kind == "set":
+                    self._db._write(reference, data, merge)
+                elif kind == "update":
+                    self._db._update(reference, data)
+                else:
+                    self._db._delete(reference)
+        self._operations = []
+
+
+class Transaction(WriteBatch):
+    """
+    Buffers writes until commit; ``transactional`` runs the function and
+    the commit under the database lock, so transactions are serialized.
+    """
+
+
+def transactional(func):
+    def run(transaction, *args, **kwargs):
+        with transaction._db._transaction_lock:
+            result = func(transaction, *args, **kwargs)
+            transaction.commit()
+            return result
+    return run
+
+
+class FakeFirestore:
+    """
+    In-memory Firestore client.
+
+    Attributes:
+        reads (int): Billed document reads so far.
+        writes (int): Document writes so far.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.reads = 0
+        self.writes = 0
+        self._docs = {}
+        self._watches = set()
+        self._lock = threading.RLock()
+        self._transaction_lock = threading.RLock()
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def collection(self, name):
+        return CollectionReference(self, name)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def transaction(self):
+        return Transaction(self)
+
+    def load(self, path, data):
+        """
+        Stores a document directly, without latency or billing (for seeding).
+        """
+        with self._lock:
+            self._docs[path] = {}
+            _apply(self._docs[path], data, merge=False)
+
+    def _write(self, reference, data, merge):
+        with self._lock:
+            document = self._docs.get(reference.path) if merge else None
+            document = document if document is not None else {}
+            _apply(document, data, merge)
+            self._docs[reference.path] = document
+            self.writes += 1
+            self._notify_all(reference)
+
+    def _update(self, reference, data):
+        with self._lock:
+            document = self._docs[reference.path]
+            for key, value in data.items():
+                *parents, leaf = key.split(".")
+                target = document
+                for part in parents:
+                    target = target.setdefault(part, {})
+                _apply(target, {leaf: value}, merge=False)
+            self.writes += 1
+            self._notify_all(reference)
+
+    def _delete(self, reference):
+        with self._lock:
+            self._docs.pop(reference.path, None)
+            self.writes += 1
+            self._notify_all(reference)
+
+    def _notify(self, watch):
+        with self._lock:
+            results = watch.query._results()
+            current = {snapshot.reference.path: snapshot for snapshot in results}
+            changes = [_Change("ADDED" if path not in watch.known else "MODIFIED", snapshot)
+                       for path, snapshot in current.items()
+                       if watch.known.get(path) != snapshot._data]
+            changes += [_Change("REMOVED", DocumentSnapshot(DocumentReference(self, path), None))
+                        for path in watch.known.keys() - current.keys()]
+            if watch.known and not changes:
+                return
+            # Listeners are billed for the initial documents, then per change
+            self.reads += len(changes) if watch.known else max(1, len(changes))
+            watch.known = {path: snapshot._data for path, snapshot in current.items()}
+            watch.callback(results, changes, datetime.now(timezone.utc))
+
+    def _notify_all(self, reference):
+        collection = reference.path.rsplit("/", 1)[0]
+        for watch in list(self._watches):
+            if watch.query._path == collection:
+                self._notify(watch)
+
+
+def install(db):
+    """
+    Points the app at the fake: ``resources.get_db`` returns ``db`` and
+    ``firestore.transactional`` works with its transactions.
+    """
+    from firebase_admin import firestore
+
+    import resources
+
+    resources.get_db = lambda: db
+    firestore.transactional = transactional
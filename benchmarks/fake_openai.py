@@ -0,0 +1,268 @@
+# benchmarks/fake_openai.py
+"""
+Local stand-in for the OpenAI API, for exercising the LLM gateway offline.
+
+Serves ``POST /v1/chat/completions`` (including ``stream: true``) and
+``POST /v1/embeddings`` with simulated latency, deterministic responses
+and its own requests-per-minute limit: requests beyond it get a 429 with a
+Retry-After header, like the real API. Chat requests with a JSON schema
+``response_format`` get a JSON object matching the schema, cut off with
+finish_reason "length" if it is longer than max_tokens.
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1.
+
+Usage:
+    python benchmarks/fake_openai.py [--port 8765] [--latency 0.5]
+        [--rpm 60] [--token-rate 50] [--embedding-dim 1536]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.5, rpm=60, embedding_dim=1536, token_rate=0):
+        super().__init__(address, FakeOpenAIHandler)
+        self.latency = latency
+        self.token_rate = token_rate
+        self.rpm = rpm
+        self.embedding_dim = embedding_dim
+        self.calls = 0
+        self.rejected = 0
+        self._recent = deque()
+        self._errors = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def completion_seconds(self, completion_tokens):
+        """
+        Returns how long a completion takes: the fixed latency, plus the
+        generation time when a token rate is set.
+        """
+        if self.token_rate:
+            return self.latency + completion_tokens / self.token_rate
+        return self.latency
+
+    def inject_errors(self, count, status=429, retry_after=None):
+        """
+        Makes the next ``count`` requests fail with ``status``, optionally
+        with a Retry-After header (for tests).
+        """
+        with self._lock:
+            self._errors.extend([(status, retry_after)] * count)
+
+    def next_error(self):
+        """
+        Returns the (status, retry_after) of an injected error, or None.
+        """
+        with self._lock:
+            if not self._errors:
+                return None
+            self.rejected += 1
+            return self._errors.popleft()
+
+    def admit(self):
+        """
+        Returns None if a request is within the RPM limit, otherwise the
+        seconds until it would be.
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            if self.rpm and len(self._recent) >= self.rpm:
+                self.rejected += 1
+                return 60 - (now - self._recent[0])
+            self._recent.append(now)
+            self.calls += 1
+            return None
+
+
+def _tokens(text):
+    # Rough count; the fake only needs plausible usage numbers
+    return max(1, len(text) // 4)
+
+
+def install_token_counter():
+    """
+    Makes the app count tokens the way the fake does, about four characters
+    per token, instead of with tiktoken, which downloads its cl100k_base
+    encoding on first use. Keeps benchmarks offline.
+    """
+    import resume_chunker
+
+    resume_chunker.count_tokens = _tokens
+
+
+def _embedding(text, dim):
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = sum(value * value for value in vector) ** 0.5
+    return [value / norm for value in vector]
+
+
+def _schema_instance(schema):
+    if schema.get("type") == "object":
+        return {key: _schema_instance(value) for key, value in schema["properties"].items()}
+    if schema.get("type") == "array":
+        return [_schema_instance(schema["items"])]
+    return "value"
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        error = self.server.next_error()
+        if error is not None:
+            status, retry_after = error
+            headers = {"Retry-After": f"{retry_after:.2f}"} if retry_after is not None else {}
+            self._send_json(status, {"error": {"message": f"Injected error {status}",
+                                               "type": "injected", "code": None}}, headers)
+            return
+
+        retry_after = self.server.admit()
+        if retry_after is not None:
+            self._send_json(429, {"error": {"message": "Rate limit reached",
+                                            "type": "requests", "code": "rate_limit_exceeded"}},
+                            {"Retry-After": f"{retry_after:.2f}"})
+            return
+
+        if self.path.endswith("/chat/completions"):
+            self._chat(request)
+        elif self.path.endswith("/embeddings"):
+            self._embeddings(request)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _chat(self, request):
+        prompt = "\n".join(message.get("content", "") for message in request["messages"])
+        max_tokens = request.get("max_tokens") or 200
+        words = [f"word{i}" for i in range(min(200, max_tokens))]
+        finish_reason = "length" if max_tokens < 200 else "stop"
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            content = json.dumps(_schema_instance(response_format["json_schema"]["schema"]))
+            finish_reason = "stop"
+            if request.get("max_tokens") and _tokens(content) > max_tokens:
+                # Cut off mid-object, as the API does at max_tokens
+                content = content[:max_tokens * 4]
+                finish_reason = "length"
+            words = [content]
+        completion_tokens = sum(_tokens(word) for word in words)
+        usage = {"prompt_tokens": _tokens(prompt), "completion_tokens": completion_tokens,
+                 "total_tokens": _tokens(prompt) + completion_tokens}
+        created = int(time.time())
+
+        if not request.get("stream"):
+            time.sleep(self.server.completion_seconds(completion_tokens))
+            self._send_json(200, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": created,
+                "model": request["model"],
+                "choices": [{"index": 0, "finish_reason": finish_reason,
+                             "message": {"role": "assistant", "content": " ".join(words)}}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        delay = self.server.completion_seconds(completion_tokens) / len(words)
+        chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                 "created": created, "model": request["model"]}
+        for word in words:
+            time.sleep(delay)
+            event = {**chunk, "choices": [{"index": 0, "finish_reason": None,
+                                           "delta": {"content": word + " "}}]}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        if (request.get("stream_options") or {}).get("include_usage"):
+            event = {**chunk, "choices": [], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def _embeddings(self, request):
+        texts = request["input"]
+        if isinstance(texts, str):
+            texts = [texts]
+        time.sleep(self.server.latency / 5)
+        prompt_tokens = sum(_tokens(text) for text in texts)
+        self._send_json(200, {
+            "object": "list", "model": request["model"],
+            "data": [{"object": "embedding", "index": i,
+                      "embedding": _embedding(text, self.server.embedding_dim)}
+                     for i, text in enumerate(texts)],
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+        })
+
+
+def start_server(port=0, **options):
+    """
+    Starts a fake server on a background thread.
+
+    Returns:
+        FakeOpenAIServer: The running server; call shutdown() to stop it.
+    """
+    server = FakeOpenAIServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="seconds per chat completion")
+    parser.add_argument("--rpm", type=int, default=60,
+                        help="requests per minute before answering 429 (0 = no limit)")
+    parser.add_argument("--token-rate", type=float, default=0,
+                        help="completion tokens generated per second, on top of "
+                             "--latency (0 = latency only)")
+    parser.add_argument("--embedding-dim", type=int, default=1536)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(("127.0.0.1", args.port), latency=args.latency,
+                              rpm=args.rpm, embedding_dim=args.embedding_dim,
+                              token_rate=args.token_rate)
+    print(f"Fake OpenAI API on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/fake_stripe.py
+"""
+Local stand-in for the parts of the Stripe API the app calls, for running
+it offline.
+
+Serves ``GET /v1/subscriptions?customer=...`` from subscriptions added
+with ``add_subscription``, and ``POST /v1/checkout/sessions``, with
+simulated latency. For the full API surface use stripe-mock instead
+(https://github.com/stripe/stripe-mock); either is selected with
+STRIPE_API_BASE.
+
+Usage:
+    python benchmarks/fake_stripe.py [--port 12111] [--latency 0.1]
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeStripeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.1):
+        super().__init__(address, FakeStripeHandler)
+        self.latency = latency
+        self.calls = 0
+        self.subscriptions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def api_base(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_subscription(self, customer_id, status="active", plan=None, user_id=None):
+        """
+        Stores a subscription returned for ``customer_id``.
+        """
+        subscription = {
+            "id": f"sub_{uuid.uuid4().hex[:14]}", "object": "subscription",
+            "customer": customer_id, "status": status,
+            "current_period_end": int(time.time()) + 30 * 86400,
+            "metadata": {key: value for key, value in
+                         (("plan", plan), ("user_id", user_id)) if value},
+        }
+        with self._lock:
+            self.subscriptions.setdefault(customer_id, []).insert(0, subscription)
+        return subscription
+
+    def count_call(self):
+        with self._lock:
+            self.calls += 1
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.count_call()
+        time.sleep(self.server.latency)
+        url = urlparse(self.path)
+        if url.path != "/v1/subscriptions":
+            self._send_json(404, {"error": {"message": f"Unknown path {url.path}"}})
+            return
+        query = parse_qs(url.query)
+        customer = query.get("customer", [""])[0]
+        limit = int(query.get("limit", ["10"])[0])
+        with self.server._lock:
+            data = self.server.subscriptions.get(customer, [])[:limit]
+        self._send_json(200, {"object": "list", "url": "/v1/subscriptions",
+                              "has_more": False, "data": data})
+
+    def do_POST(self):
+        self.server.count_call()
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        time.sleep(self.server.latency)
+        if self.path != "/v1/checkout/sessions":
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        session_id = f"cs_test_{uuid.uuid4().hex}"
+        self._send_json(200, {
+            "id": session_id, "object": "checkout.session",
+            "client_reference_id": form.get("client_reference_id", [None])[0],
+            "url": f"https://checkout.stripe.com/c/pay/{session_id}",
+        })
+
+
+def start_server(port=0, **options):
+    """
+    Starts a fake server on a background thread.
+
+    Returns:
+        FakeStripeServer: The running server; call shutdown() to stop it.
+    """
+    server = FakeStripeServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Stripe API server.")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    server = FakeStripeServer(("127.0.0.1", args.port), latency=args.latency)
+    print(f"Fake Stripe API at {server.api_base} (STRIPE_API_BASE)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
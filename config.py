@@ -1,3 +1,4 @@
+import json
 import os
 
 def get_firebase_config():
@@ -44,6 +45,35 @@ def get_openai_api_key():
     """
     return os.environ.get("OPENAI_API_KEY", "")
 
+def get_openai_base_url():
+    """
+    Retrieves an alternative OpenAI API base URL (e.g. a local fake server).
+
+    Returns:
+        str or None: The base URL, or None for the default OpenAI endpoint.
+    """
+    return os.environ.get("OPENAI_BASE_URL") or None
+
+def get_llm_rate_limits():
+    """
+    Retrieves per-model request and token limits for OpenAI calls.
+
+    LLM_RATE_LIMITS may hold a JSON object overriding or extending the
+    defaults, e.g. {"gpt-4": {"rpm": 500, "tpm": 10000}}.
+
+    Returns:
+        dict: Model name to {"rpm": int, "tpm": int}.
+    """
+    limits = {
+        "gpt-4": {"rpm": 500, "tpm": 10000},
+        "gpt-4o": {"rpm": 500, "tpm": 30000},
+        "text-embedding-ada-002": {"rpm": 3000, "tpm": 1000000},
+    }
+    overrides = os.environ.get("LLM_RATE_LIMITS")
+    if overrides:
+        limits.update(json.loads(overrides))
+    return limits
+
 def get_stripe_api_key():
     """
     Retrieves Stripe API key from environment variables.
@@ -53,6 +83,54 @@ def get_stripe_api_key():
     """
     return os.environ.get("STRIPE_API_KEY", "")
 
+def get_stripe_api_base():
+    """
+    Retrieves an alternative Stripe API base URL (e.g. a local stripe-mock).
+
+    Returns:
+        str or None: The base URL, or None for the default Stripe endpoint.
+    """
+    return os.environ.get("STRIPE_API_BASE") or None
+
+def get_stripe_webhook_secret():
+    """
+    Retrieves the signing secret of the Stripe webhook endpoint.
+
+    Returns:
+        str: Webhook signing secret (whsec_...).
+    """
+    return os.environ.get("STRIPE_WEBHOOK_SECRET", "")
+
+def get_subscription_cache_seconds():
+    """
+    Retrieves how long a process reuses a user's subscription state before
+    reading it from Firestore again.
+
+    Returns:
+        float: Lifetime in seconds.
+    """
+    return float(os.environ.get("SUBSCRIPTION_CACHE_SECONDS", "60"))
+
+def get_subscription_sync_seconds():
+    """
+    Retrieves how old stored subscription state may get before it is
+    refreshed from the Stripe API (webhooks normally keep it current).
+
+    Returns:
+        float: Maximum age in seconds.
+    """
+    return float(os.environ.get("SUBSCRIPTION_SYNC_SECONDS", "86400"))
+
+def get_usage_cache_seconds():
+    """
+    Retrieves how long a process reuses a user's usage totals for quota
+    checks before reading them from Firestore again.
+
+    Returns:
+        float: Lifetime in seconds.
+    """
+    return float(os.environ.get("USAGE_CACHE_SECONDS", "30"))
+
 def get_google_oauth_credentials():
     """
     Retrieves Google OAuth credentials from environment variables.
@@ -74,6 +152,183 @@ def get_redirect_uri():
     """
     return os.environ.get("REDIRECT_URI", "http://localhost:8501/")  # Default to localhost if not set
 
+def get_cache_dir():
+    """
+    Retrieves the directory used for on-disk caches (embeddings, vector indexes).
+
+    Returns:
+        str: Cache directory path.
+    """
+    return os.environ.get("APP_CACHE_DIR", ".cache")
+
+def get_embedding_cache_max_entries():
+    """
+    Retrieves the maximum number of embeddings kept in the on-disk cache.
+
+    Returns:
+        int: Maximum number of cached embeddings.
+    """
+    return int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+
+def get_llm_cache_ttl_seconds():
+    """
+    Retrieves how long cached LLM responses stay valid.
+
+    Returns:
+        int: Time to live in seconds.
+    """
+    return int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+def get_llm_cache_max_bytes():
+    """
+    Retrieves the maximum total size of cached LLM responses.
+
+    Returns:
+        int: Maximum cache size in bytes.
+    """
+    return int(os.environ.get("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+def get_pdf_extraction_options():
+    """
+    Retrieves the PDF text extraction settings used for resume uploads.
+
+    Returns:
+        dict: mode (raw, fast or full), max_pages (0 for no limit) and
+        char_budget (characters kept for the parse prompt).
+    """
+    return {
+        "mode": os.environ.get("PDF_EXTRACTION_MODE", "fast"),
+        "max_pages": int(os.environ.get("PDF_MAX_PAGES", "10")),
+        "char_budget": int(os.environ.get("RESUME_CHAR_BUDGET", "20000")),
+    }
+
+def get_applications_cache_max_users():
+    """
+    Retrieves how many users' application summaries are cached in memory at once.
+
+    Returns:
+        int: Maximum number of cached users.
+    """
+    return int(os.environ.get("APPLICATIONS_CACHE_MAX_USERS", "200"))
+
+def get_resume_index_cache_max_users():
+    """
+    Retrieves how many users' resume indexes are kept in memory at once.
+
+    Returns:
+        int: Maximum number of cached users.
+    """
+    return int(os.environ.get("RESUME_INDEX_CACHE_MAX_USERS", "100"))
+
+def show_firestore_stats():
+    """
+    Whether to show per-page-view Firestore read/write counts in the sidebar.
+
+    Returns:
+        bool: True if SHOW_FIRESTORE_STATS is set to a truthy value.
+    """
+    return os.environ.get("SHOW_FIRESTORE_STATS", "").lower() in ("1", "true", "yes")
+
+def get_job_index_scope():
+    """
+    Retrieves whether job descriptions are indexed per user or globally.
+
+    Returns:
+        str: "user" or "global".
+    """
+    return os.environ.get("JOB_INDEX_SCOPE", "user")
+
+def get_job_similarity_threshold():
+    """
+    Retrieves the cosine similarity above which two job postings are
+    treated as the same job.
+
+    Returns:
+        float: Similarity threshold between 0 and 1.
+    """
+    return float(os.environ.get("JOB_SIMILARITY_THRESHOLD", "0.95"))
+
+def get_retrieval_token_budget():
+    """
+    Retrieves how many tokens of resume text are put in a generation prompt.
+
+    Returns:
+        int: Token budget for retrieved resume chunks.
+    """
+    return int(os.environ.get("RETRIEVAL_TOKEN_BUDGET", "800"))
+
+def get_job_workers():
+    """
+    Retrieves how many job queue workers run inside the app process.
+
+    Set to 0 when jobs are processed only by separate worker processes
+    (``python job_queue.py``).
+
+    Returns:
+        int: Number of in-app worker threads.
+    """
+    return int(os.environ.get("JOB_WORKERS", "2"))
+
+def get_job_retention_seconds():
+    """
+    Retrieves how long finished jobs, including their payloads and results,
+    are kept before workers delete them.
+
+    Returns:
+        float: Retention in seconds.
+    """
+    return float(os.environ.get("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+def get_extension_key_secret():
+    """
+    Retrieves the key used to sign browser extension keys. Used for nothing
+    else, so rotating it only revokes extension keys.
+
+    Returns:
+        str: The secret, or "" to disable extension keys.
+    """
+    return os.environ.get("EXTENSION_KEY_SECRET", "")
+
+def get_extension_key_ttl_seconds():
+    """
+    Retrieves how long a browser extension key is accepted.
+
+    Returns:
+        int: Lifetime in seconds.
+    """
+    return int(os.environ.get("EXTENSION_KEY_TTL_SECONDS", str(90 * 24 * 3600)))
+
+def get_server_url():
+    """
+    Retrieves the public URL of the HTTP endpoints in server.py. It must be
+    on the app's host (any port, or a path behind the same proxy), since
+    the session cookie it sets is read by the app.
+
+    Returns:
+        str: The URL, or "" to disable keeping users signed in.
+    """
+    return os.environ.get("SERVER_URL", "").rstrip("/")
+
+def get_session_ttl_seconds():
+    """
+    Retrieves how long a session restores the user from its stored
+    profile. After that, the stored refresh token is exchanged once.
+
+    Returns:
+        int: Lifetime in seconds.
+    """
+    return int(os.environ.get("SESSION_TTL_SECONDS", str(24 * 3600)))
+
+def get_session_cookie_max_age():
+    """
+    Retrieves how long the browser keeps the session cookie, i.e. how long
+    a user stays signed in without entering credentials again.
+
+    Returns:
+        int: Max-Age in seconds.
+    """
+    return int(os.environ.get("SESSION_COOKIE_MAX_AGE", str(30 * 24 * 3600)))
+
 def set_firebase_project_id():
     """
     Sets the GOOGLE_CLOUD_PROJECT environment variable with the Firebase Project ID.
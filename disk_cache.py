@@ -0,0 +1,173 @@
+# disk_cache.py
+
+import os
+import sqlite3
+import threading
+import time
+
+
+class DiskCache:
+    """
+    A small SQLite-backed key/value cache with least-recently-used eviction.
+
+    Entries are evicted when the cache holds more than ``max_entries`` items
+    or ``max_bytes`` of values, and optionally expire ``ttl`` seconds after
+    they were written. Values are stored as raw bytes; callers are
+    responsible for serialization. The cache is safe to share between
+    threads of the same process.
+    """
+
+    def __init__(self, path, table="cache", max_entries=10000, max_bytes=None,
+                 ttl=None):
+        """
+        Args:
+            path (str): Path of the SQLite database file.
+            table (str): Table name, so several caches can share one file.
+            max_entries (int): Number of entries kept before the least
+                recently used ones are evicted.
+            max_bytes (int, optional): Total size of stored values kept
+                before the least recently used ones are evicted.
+            ttl (float, optional): Lifetime of an entry in seconds.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, last_access REAL NOT NULL, "
+            "created_at REAL NOT NULL DEFAULT 0)")
+        columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+        if "created_at" not in columns:
+            self._conn.execute(
+                f"ALTER TABLE {table} ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)")
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """
+        Looks up several keys at once and refreshes their access time.
+
+        Args:
+            keys (list): Keys to look up.
+
+        Returns:
+            dict: Mapping of the keys that were found to their values.
+        """
+        if not keys:
+            return {}
+        found = {}
+        now = time.time()
+        oldest = now - self.ttl if self.ttl is not None else float("-inf")
+        with self._lock:
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM {self.table} "
+                    f"WHERE key IN ({placeholders}) AND created_at >= ?",
+                    [*chunk, oldest]).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key):
+        """
+        Returns the value stored for a key, or None if it is not cached.
+        """
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items):
+        """
+        Stores several key/value pairs and evicts old entries if needed.
+
+        Args:
+            items (dict): Mapping of keys to byte values.
+        """
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(key, value, last_access, created_at) VALUES (?, ?, ?, ?)",
+                [(key, value, now, now) for key, value in items.items()])
+            self._evict(now)
+            self._conn.commit()
+
+    def set(self, key, value):
+        """
+        Stores a single key/value pair.
+        """
+        self.set_many({key: value})
+
+    def delete(self, key):
+        """
+        Removes a key from the cache if present.
+        """
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current size of the cache.
+
+        Returns:
+            dict: hits, misses, entries and bytes.
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM {self.table}"
+            ).fetchone()
+            return {"hits": self.hits, "misses": self.misses,
+                    "entries": entries, "bytes": size}
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def _evict(self, now):
+        if self.ttl is not None:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?",
+                               (now - self.ttl,))
+
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                (excess,))
+
+        if self.max_bytes is not None:
+            size = self._conn.execute(
+                f"SELECT COALESCE(SUM(LENGTH(value)), 0) FROM {self.table}").fetchone()[0]
+            if size > self.max_bytes:
+                # Walk entries from least to most recently used until enough
+                # space has been freed
+                stale = []
+                for key, length in self._conn.execute(
+                        f"SELECT key, LENGTH(value) FROM {self.table} ORDER BY last_access ASC"):
+                    if size <= self.max_bytes:
+                        break
+                    stale.append((key,))
+                    size -= length
+                self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", stale)
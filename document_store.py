@@ -0,0 +1,231 @@
+# document_store.py
+"""
+Storage for generated resumes and cover letters.
+
+Each job gets its own document, ``users/{uid}/documents/{job_id}``, where
+the job ID is a hash of the job description. Every distinct version is
+kept under ``versions/{content_hash}``, so saving identical content twice
+is a no-op. A small index document, ``users/{uid}/meta/documents_index``,
+lists a user's documents without reading their contents. This keeps large
+text blobs out of the user document that every page reads.
+
+Writes are queued and committed in batches by a background thread; each
+save returns a future that reports whether its batch was committed.
+"""
+
+import atexit
+import hashlib
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from firebase_admin import firestore
+
+import llm_cache
+import metrics
+import repository
+import resources
+
+# Firestore accepts at most 500 operations per batch; each save uses 3, plus
+# a one-time migration write for the first save of each user
+MAX_SAVES_PER_BATCH = 125
+FLUSH_INTERVAL_SECONDS = 1.0
+TITLE_LENGTH = 80
+
+
+def job_id_for(job_description):
+    """
+    Returns the document ID used for a job description.
+    """
+    return llm_cache.hash_text(job_description)[:24]
+
+
+def content_hash(tailored_resume, cover_letter):
+    payload = f"{tailored_resume}\0{cover_letter}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def job_title(job_description):
+    first_line = next((line.strip() for line in job_description.splitlines()
+                       if line.strip()), "Untitled job")
+    return first_line[:TITLE_LENGTH]
+
+
+def documents_ref(db, user_id):
+    return db.collection('users').document(user_id).collection('documents')
+
+
+def index_ref(db, user_id):
+    return (db.collection('users').document(user_id)
+            .collection('meta').document('documents_index'))
+
+
+class DocumentWriter:
+    """
+    Background writer that commits queued saves in Firestore batches.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last_saved = {}
+        self._migrated_users = set()
+
+    def submit(self, user_id, job_description, tailored_resume, cover_letter):
+        job_id = job_id_for(job_description)
+        digest = content_hash(tailored_resume, cover_letter)
+        with self._lock:
+            # Content this process has already saved (or is saving) for the
+            # job shares that save's outcome
+            last_digest, last_future = self._last_saved.get((user_id, job_id), (None, None))
+            if last_digest == digest:
+                return last_future
+            future = Future()
+            self._last_saved[(user_id, job_id)] = (digest, future)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+        self._queue.put({
+            'user_id': user_id,
+            'job_id': job_id,
+            'job_description': job_description,
+            'resume': tailored_resume,
+            'cover_letter': cover_letter,
+            'content_hash': digest,
+            'saved_at': time.time(),
+            'future': future,
+        })
+        return future
+
+    def _run(self):
+        while True:
+            saves = [self._queue.get()]
+            deadline = time.monotonic() + FLUSH_INTERVAL_SECONDS
+            while len(saves) < MAX_SAVES_PER_BATCH:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    saves.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._commit(saves)
+            except Exception as e:
+                # Let a later save of the same content retry the write
+                metrics.increment('document_store.failed_saves', len(saves))
+                with self._lock:
+                    for save in saves:
+                        key = (save['user_id'], save['job_id'])
+                        if self._last_saved.get(key, (None,))[0] == save['content_hash']:
+                            del self._last_saved[key]
+                for save in saves:
+                    save['future'].set_exception(e)
+            else:
+                for save in saves:
+                    save['future'].set_result(save['job_id'])
+            finally:
+                for _ in saves:
+                    self._queue.task_done()
+
+    def _commit(self, saves):
+        db = resources.get_db()
+        batch = db.batch()
+        writes = 0
+        migrating = set()
+        for save in saves:
+            user_id, job_id = save['user_id'], save['job_id']
+            document_ref = documents_ref(db, user_id).document(job_id)
+            title = job_title(save['job_description'])
+            batch.set(document_ref, {
+                'job_id': job_id,
+                'title': title,
+                'job_description': save['job_description'],
+                'resume': save['resume'],
+                'cover_letter': save['cover_letter'],
+                'content_hash': save['content_hash'],
+                'updated_at': firestore.SERVER_TIMESTAMP,
+            })
+            batch.set(document_ref.collection('versions').document(save['content_hash']), {
+                'resume': save['resume'],
+                'cover_letter': save['cover_letter'],
+                'created_at': firestore.SERVER_TIMESTAMP,
+            })
+            batch.set(index_ref(db, user_id), {
+                'entries': {job_id: {
+                    'title': title,
+                    'content_hash': save['content_hash'],
+                    'saved_at': save['saved_at'],
+                }}
+            }, merge=True)
+            writes += 3
+
+            # Older versions of the app kept documents on the user document
+            if user_id not in self._migrated_users and user_id not in migrating:
+                batch.set(db.collection('users').document(user_id),
+                          {'generated_documents': firestore.DELETE_FIELD}, merge=True)
+                migrating.add(user_id)
+                writes += 1
+        batch.commit()
+        # Only once committed, so a failed batch retries the migration too
+        self._migrated_users.update(migrating)
+        repository.record_writes(writes)
+
+    def flush(self, timeout=None):
+        """
+        Waits until every queued save has been committed.
+        """
+        if self._thread is None:
+            return
+        if timeout is None:
+            self._queue.join()
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+
+_writer = DocumentWriter()
+atexit.register(_writer.flush, 10)
+
+
+def save_documents(user_id, job_description, tailored_resume, cover_letter):
+    """
+    Queues generated documents for a job to be saved in the background.
+
+    Returns:
+        concurrent.futures.Future: Resolves to the job ID the documents are
+        stored under once their batch is committed, or raises the error
+        that made the commit fail.
+    """
+    return _writer.submit(user_id, job_description, tailored_resume, cover_letter)
+
+
+def flush(timeout=None):
+    _writer.flush(timeout)
+
+
+def list_documents(user_id):
+    """
+    Lists a user's saved documents from the index (a single read).
+
+    Returns:
+        list: Dicts with job_id, title, content_hash and saved_at, newest first.
+    """
+    snapshot = index_ref(resources.get_db(), user_id).get()
+    repository.record_reads()
+    entries = (snapshot.to_dict() or {}).get('entries', {}) if snapshot.exists else {}
+    documents = [{'job_id': job_id, **entry} for job_id, entry in entries.items()]
+    return sorted(documents, key=lambda entry: entry.get('saved_at', 0), reverse=True)
+
+
+def get_document(user_id, job_id):
+    """
+    Returns the latest saved documents for a job, or None.
+    """
+    snapshot = documents_ref(resources.get_db(), user_id).document(job_id).get()
+    repository.record_reads()
+    return snapshot.to_dict() if snapshot.exists else None
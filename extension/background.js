@@ -12,3 +12,38 @@ chrome.runtime.onMessage.addListener(function(request, sender, sendResponse) {
     return true;
   }
 });
+
+// Sends a posting to the ingestion API, which adds it to the tracker and
+// starts generating the tailored documents in the background.
+function sendToServer(jobDetails, sendResponse) {
+  chrome.storage.sync.get(["serverUrl", "extensionKey"], function(settings) {
+    if (!settings.serverUrl || !settings.extensionKey) {
+      sendResponse({ok: false, error: "Set the server URL and extension key in the popup first."});
+      return;
+    }
+    fetch(settings.serverUrl.replace(/\/+$/, "") + "/api/jobs", {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "Authorization": "Bearer " + settings.extensionKey
+      },
+      body: JSON.stringify(jobDetails)
+    })
+      .then(function(response) {
+        return response.json().then(function(body) {
+          sendResponse(response.ok ? Object.assign({ok: true}, body) : {ok: false, error: body.error});
+        });
+      })
+      .catch(function(error) {
+        sendResponse({ok: false, error: error.message});
+      });
+  });
+}
+
+chrome.runtime.onMessage.addListener(function(request, sender, sendResponse) {
+  if (request.action === "applyWithAI") {
+    const jobDetails = Object.assign({url: sender.tab ? sender.tab.url : undefined}, request.jobDetails);
+    sendToServer(jobDetails, sendResponse);
+    return true;
+  }
+});
@@ -26,7 +26,16 @@ if (applyButton) {
   aiApplyButton.classList.add('ai-apply-button');
   aiApplyButton.addEventListener('click', function() {
     const jobDetails = extractJobDetails();
-    chrome.runtime.sendMessage({action: "applyWithAI", jobDetails: jobDetails});
+    aiApplyButton.disabled = true;
+    chrome.runtime.sendMessage({action: "applyWithAI", jobDetails: jobDetails}, function(response) {
+      aiApplyButton.disabled = false;
+      if (response && response.ok) {
+        aiApplyButton.textContent = response.duplicate ? 'Already sent' : 'Sent to AI';
+      } else {
+        aiApplyButton.textContent = 'Apply with AI';
+        alert((response && response.error) || 'Could not reach the server.');
+      }
+    });
   });
   applyButton.parentNode.insertBefore(aiApplyButton, applyButton.nextSibling);
 }
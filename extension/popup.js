@@ -0,0 +1,64 @@
+const status = document.getElementById("status");
+
+chrome.storage.sync.get(["serverUrl", "extensionKey"], function(settings) {
+  document.getElementById("serverUrl").value = settings.serverUrl || "";
+  document.getElementById("extensionKey").value = settings.extensionKey || "";
+});
+
+// Access is requested for the configured server only, when it's saved.
+// Local servers are allowed by the manifest; others must use https.
+function serverOrigins(serverUrl) {
+  let url;
+  try {
+    url = new URL(serverUrl);
+  } catch (error) {
+    return null;
+  }
+  if (url.hostname === "localhost") {
+    return [];
+  }
+  return url.protocol === "https:" ? [url.origin + "/*"] : null;
+}
+
+document.getElementById("saveSettings").addEventListener("click", function() {
+  const serverUrl = document.getElementById("serverUrl").value.trim();
+  const origins = serverOrigins(serverUrl);
+  if (origins === null) {
+    status.textContent = "Enter the server's https URL, e.g. https://example.com.";
+    return;
+  }
+  chrome.permissions.request({origins: origins}, function(granted) {
+    if (!granted) {
+      status.textContent = "Allow access to the server to send postings to it.";
+      return;
+    }
+    chrome.storage.sync.set({
+      serverUrl: serverUrl,
+      extensionKey: document.getElementById("extensionKey").value.trim()
+    }, function() {
+      status.textContent = "Settings saved.";
+    });
+  });
+});
+
+document.getElementById("applyButton").addEventListener("click", function() {
+  chrome.tabs.query({active: true, currentWindow: true}, function(tabs) {
+    chrome.tabs.sendMessage(tabs[0].id, {action: "getJobDetails"}, function(jobDetails) {
+      if (!jobDetails || !jobDetails.description) {
+        status.textContent = "Open a LinkedIn job posting first.";
+        return;
+      }
+      jobDetails.url = tabs[0].url;
+      status.textContent = "Sending...";
+      chrome.runtime.sendMessage({action: "applyWithAI", jobDetails: jobDetails}, function(response) {
+        if (response && response.ok) {
+          status.textContent = response.duplicate
+            ? "Already sent; documents are on the Generate Documents page."
+            : "Added to your tracker. Documents are being generated.";
+        } else {
+          status.textContent = (response && response.error) || "Could not reach the server.";
+        }
+      });
+    });
+  });
+});
@@ -0,0 +1,373 @@
+# identity.py
+"""
+Identity-provider calls, verified-token caching and server-side sessions.
+
+* Calls to the Firebase identity toolkit and Google's token endpoints share
+  one pooled ``requests.Session`` (see ``resources.get_http_session``).
+* Verified ID token claims are cached in memory until the token expires,
+  so a token is checked once per process. The Google public certificates
+  the check needs are themselves cached by firebase_admin, which fetches
+  them through an HTTP cache honouring their Cache-Control max-age.
+* A signed-in user gets a session stored in Firestore, under
+  ``sessions/{sha256(id)}``, holding their profile, expiries and (for
+  email sign-ins) their Firebase refresh token. The browser only holds the
+  random session ID, in an HttpOnly cookie set by server.py. Restoring a
+  session reads its document, so logging out revokes it everywhere; after
+  SESSION_TTL_SECONDS the refresh token is exchanged once for a fresh ID
+  token.
+* The browser extension authenticates to the ingestion API (server.py)
+  with a per-user key signed with EXTENSION_KEY_SECRET. Keys expire, and
+  the key version stored in ``extension_keys/{uid}`` revokes older ones.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+
+import config
+import metrics
+import repository
+import resources
+
+IDENTITY_TOOLKIT_URL = "https://identitytoolkit.googleapis.com/v1/accounts"
+SECURE_TOKEN_URL = "https://securetoken.googleapis.com/v1/token"
+GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
+REQUEST_TIMEOUT_SECONDS = 10
+
+SESSION_COOKIE = "applai_session"
+
+# How long the one-time code handing a new session to the server is valid
+HANDOFF_TTL_SECONDS = 60
+
+TOKEN_CACHE_MAX_ENTRIES = 1024
+
+_token_cache = {}
+_token_cache_lock = threading.Lock()
+
+
+def identity_toolkit(method, payload):
+    """
+    Calls an identity toolkit ``accounts:<method>`` endpoint.
+
+    Args:
+        method (str): e.g. "signInWithPassword" or "signUp".
+        payload (dict): The request body.
+
+    Returns:
+        dict: The response body. Errors are reported under "error".
+    """
+    response = resources.get_http_session().post(
+        f"{IDENTITY_TOOLKIT_URL}:{method}", params={"key": config.get_firebase_api_key()},
+        json=payload, timeout=REQUEST_TIMEOUT_SECONDS)
+    return response.json()
+
+
+def exchange_google_code(code):
+    """
+    Exchanges a Google OAuth authorization code for tokens.
+
+    Returns:
+        dict: The token response (id_token, access_token, ... or "error").
+    """
+    credentials = config.get_google_oauth_credentials()
+    response = resources.get_http_session().post(GOOGLE_TOKEN_URL, data={
+        "code": code,
+        "client_id": credentials["client_id"],
+        "client_secret": credentials["client_secret"],
+        "redirect_uri": config.get_redirect_uri(),
+        "grant_type": "authorization_code",
+    }, timeout=REQUEST_TIMEOUT_SECONDS)
+    return response.json()
+
+
+def refresh_id_token(refresh_token):
+    """
+    Exchanges a Firebase refresh token for a new ID token.
+
+    Returns:
+        dict: The response (id_token, refresh_token, ... or "error").
+    """
+    response = resources.get_http_session().post(
+        SECURE_TOKEN_URL, params={"key": config.get_firebase_api_key()},
+        data={"grant_type": "refresh_token", "refresh_token": refresh_token},
+        timeout=REQUEST_TIMEOUT_SECONDS)
+    return response.json()
+
+
+def verify_id_token(id_token):
+    """
+    Verifies a Firebase ID token, caching its claims until it expires.
+
+    Raises:
+        ValueError: If the token is invalid (from firebase_admin).
+    """
+    key = hashlib.sha256(id_token.encode("utf-8")).hexdigest()
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(key)
+        if cached and cached["exp"] > now:
+            metrics.increment("auth.token_cache_hits")
+            return cached
+        _token_cache.pop(key, None)
+
+    from firebase_admin import auth
+
+    resources.get_db()  # Initializes the Firebase app
+    with metrics.timer("auth.verify_token"):
+        claims = auth.verify_id_token(id_token)
+
+    with _token_cache_lock:
+        if len(_token_cache) >= TOKEN_CACHE_MAX_ENTRIES:
+            for expired in [k for k, c in _token_cache.items() if c["exp"] <= now]:
+                del _token_cache[expired]
+        if len(_token_cache) >= TOKEN_CACHE_MAX_ENTRIES:
+            # Drop the token closest to expiry
+            del _token_cache[min(_token_cache, key=lambda k: _token_cache[k]["exp"])]
+        _token_cache[key] = claims
+    return claims
+
+
+def user_from_claims(claims):
+    """
+    Returns the session user for verified token claims.
+    """
+    return {
+        "name": claims.get("name") or claims.get("email"),
+        "email": claims.get("email"),
+        "uid": claims.get("uid"),
+    }
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _signature(payload, secret):
+    return _b64encode(hmac.new(secret.encode("utf-8"), payload.encode("ascii"),
+                               hashlib.sha256).digest())
+
+
+def _sign(data):
+    secret = config.get_extension_key_secret()
+    if not secret:
+        return None
+    payload = _b64encode(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_signature(payload, secret)}"
+
+
+def _unsign(value):
+    secret = config.get_extension_key_secret()
+    if not secret or not value or "." not in value:
+        return None
+    payload, signature = value.rsplit(".", 1)
+    if not hmac.compare_digest(signature, _signature(payload, secret)):
+        metrics.increment("auth.bad_signatures")
+        return None
+    try:
+        return json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+
+
+def extension_key_ref(db, user_id):
+    return db.collection("extension_keys").document(user_id)
+
+
+def issue_extension_key(user_id):
+    """
+    Creates the key the browser extension sends to the ingestion API,
+    revoking the user's earlier keys.
+
+    Keys expire after EXTENSION_KEY_TTL_SECONDS; rotating
+    EXTENSION_KEY_SECRET revokes every key.
+
+    Returns:
+        str or None: The key, or None when EXTENSION_KEY_SECRET is not set.
+    """
+    if not config.get_extension_key_secret():
+        return None
+    version = revoke_extension_keys(user_id)
+    return _sign({"uid": user_id, "purpose": "extension", "ver": version,
+                  "exp": int(time.time()) + config.get_extension_key_ttl_seconds()})
+
+
+def revoke_extension_keys(user_id):
+    """
+    Revokes every extension key issued to a user.
+
+    Returns:
+        int: The user's new key version; only keys carrying it are valid.
+    """
+    from firebase_admin import firestore
+
+    db = resources.get_db()
+    reference = extension_key_ref(db, user_id)
+
+    @firestore.transactional
+    def bump(transaction):
+        snapshot = reference.get(transaction=transaction)
+        version = (snapshot.to_dict() if snapshot.exists else {}).get("version", 0) + 1
+        transaction.set(reference, {"version": version})
+        return version
+
+    version = bump(db.transaction())
+    repository.record_reads()
+    repository.record_writes()
+    return version
+
+
+def read_extension_key(value):
+    """
+    Returns:
+        str or None: The user ID an extension key was issued to, or None if
+        the key is invalid, expired or revoked.
+    """
+    data = _unsign(value)
+    if not data or data.get("purpose") != "extension" or data.get("exp", 0) <= time.time():
+        return None
+    snapshot = extension_key_ref(resources.get_db(), data["uid"]).get()
+    repository.record_reads()
+    if not snapshot.exists or snapshot.to_dict().get("version") != data.get("ver"):
+        metrics.increment("auth.revoked_extension_keys")
+        return None
+    return data["uid"]
+
+
+def _session_hash(value):
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def session_ref(db, session_id):
+    # Stored under a hash of the ID, so the collection can't be used to
+    # forge cookies
+    return db.collection("sessions").document(_session_hash(session_id))
+
+
+def sessions_enabled():
+    """
+    Returns whether sign-ins persist in a cookie, which needs the session
+    endpoints in server.py.
+    """
+    return bool(config.get_server_url())
+
+
+def create_session(user, refresh_token=None):
+    """
+    Stores a session for a signed-in user and returns a one-time code for
+    it. The server's ``/session/start`` endpoint redeems the code and sets
+    the session ID as an HttpOnly cookie, so neither the ID nor the refresh
+    token is ever visible to scripts in the page.
+
+    Returns:
+        str: The handoff code, valid for HANDOFF_TTL_SECONDS.
+    """
+    db = resources.get_db()
+    session_id = secrets.token_urlsafe(32)
+    code = secrets.token_urlsafe(32)
+    now = int(time.time())
+    session = {
+        "user": user,
+        "exp": now + config.get_session_ttl_seconds(),
+        "expires_at": now + config.get_session_cookie_max_age(),
+        "revoked": False,
+    }
+    if refresh_token:
+        session["refresh_token"] = refresh_token
+    batch = db.batch()
+    batch.set(session_ref(db, session_id), session)
+    batch.set(db.collection("session_handoffs").document(_session_hash(code)),
+              {"session_id": session_id, "exp": now + HANDOFF_TTL_SECONDS})
+    batch.commit()
+    repository.record_writes(2)
+    return code
+
+
+def redeem_handoff(code):
+    """
+    Exchanges a handoff code from create_session for its session ID. Each
+    code works once.
+
+    Returns:
+        str or None: The session ID, or None if the code is unknown, used
+        or expired.
+    """
+    from firebase_admin import firestore
+
+    db = resources.get_db()
+    reference = db.collection("session_handoffs").document(_session_hash(code))
+
+    @firestore.transactional
+    def redeem(transaction):
+        snapshot = reference.get(transaction=transaction)
+        if not snapshot.exists:
+            return None
+        transaction.delete(reference)
+        handoff = snapshot.to_dict()
+        return handoff["session_id"] if handoff["exp"] > time.time() else None
+
+    session_id = redeem(db.transaction())
+    repository.record_reads()
+    return session_id
+
+
+def restore_session(session_id):
+    """
+    Returns the user a session cookie signs in. The stored session is read
+    every time, so a revoked session stops working at once; one past its
+    TTL is refreshed with its refresh token.
+
+    Returns:
+        dict or None: The user, or None if the session is unknown, revoked,
+        expired or its refresh token no longer works.
+    """
+    reference = session_ref(resources.get_db(), session_id)
+    snapshot = reference.get()
+    repository.record_reads()
+    session = snapshot.to_dict() if snapshot.exists else None
+    now = time.time()
+    if not session or session.get("revoked") or session["expires_at"] <= now:
+        return None
+    if session["exp"] > now:
+        metrics.increment("auth.sessions_restored")
+        return session["user"]
+
+    refresh_token = session.get("refresh_token")
+    if not refresh_token:
+        return None
+    tokens = refresh_id_token(refresh_token)
+    if "error" in tokens:
+        # Revoked, disabled or deleted account
+        revoke_session(session_id)
+        return None
+    user = user_from_claims(verify_id_token(tokens["id_token"]))
+    reference.update({
+        "user": user,
+        "exp": int(now) + config.get_session_ttl_seconds(),
+        "refresh_token": tokens.get("refresh_token", refresh_token),
+    })
+    repository.record_writes()
+    metrics.increment("auth.sessions_refreshed")
+    return user
+
+
+def revoke_session(session_id):
+    """
+    Ends a session on the server: its cookie no longer signs anyone in and
+    its refresh token is discarded.
+    """
+    from firebase_admin import firestore
+
+    reference = session_ref(resources.get_db(), session_id)
+    if not reference.get().exists:
+        return
+    reference.update({"revoked": True, "refresh_token": firestore.DELETE_FIELD})
+    repository.record_writes()
+    metrics.increment("auth.sessions_revoked")
@@ -0,0 +1,184 @@
+# job_index.py
+"""
+On-disk vector index of job descriptions that have been processed.
+
+Each entry stores the job description's embedding together with the job
+ID (see document_store), the hash of the resume it was matched against and
+the resume chunks retrieved for it. When a new posting is nearly the same
+as one already seen, callers can reuse those retrieval results and surface
+the documents generated for it instead of starting from scratch.
+
+Indexes are kept per user by default; with JOB_INDEX_SCOPE=global a single
+index is shared and entries are filtered by user.
+
+The app, server.py and job_queue.py workers may share one cache directory,
+so every index folder is guarded by a file lock: writers hold it
+exclusively while they reload the folder, merge their entry and replace
+the folder, and readers hold it shared while they reload a folder that
+changed since they last read it.
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import os
+import shutil
+import threading
+
+from langchain.vectorstores import FAISS
+
+import config
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _scope(user_id):
+    if config.get_job_index_scope() == "global":
+        return "global"
+    return hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32]
+
+
+class JobIndex:
+    """
+    A FAISS index of job descriptions persisted in a local folder.
+    """
+
+    def __init__(self, folder, embeddings):
+        self.folder = folder
+        self.embeddings = embeddings
+        self._lock = threading.Lock()
+        self._store = None
+        self._version = None
+        os.makedirs(os.path.dirname(folder), exist_ok=True)
+
+    @contextlib.contextmanager
+    def _folder_lock(self, exclusive):
+        with open(f"{self.folder}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _disk_version(self):
+        # Every save replaces the folder, so a new inode or mtime means
+        # another process (or this one) wrote it
+        try:
+            stat = os.stat(os.path.join(self.folder, "index.faiss"))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _reload_if_changed(self):
+        # Caller holds self._lock and the folder lock
+        version = self._disk_version()
+        if version == self._version:
+            return
+        self._store = None
+        if version is not None:
+            # Written only by this module, so the pickled docstore is trusted
+            self._store = FAISS.load_local(self.folder, self.embeddings,
+                                           allow_dangerous_deserialization=True)
+        self._version = version
+
+    def add(self, job_description, vector, metadata):
+        """
+        Adds a job description and persists the index.
+
+        Args:
+            job_description (str): The posting text.
+            vector (list): Its embedding.
+            metadata (dict): job_id, user_id, resume_hash, relevant_text, ...
+        """
+        with self._lock, self._folder_lock(exclusive=True):
+            # Merge into the latest folder, not this process's older copy
+            self._reload_if_changed()
+            if self._store is None:
+                self._store = FAISS.from_embeddings([(job_description, vector)],
+                                                    self.embeddings,
+                                                    metadatas=[metadata])
+            else:
+                self._store.add_embeddings([(job_description, vector)],
+                                           metadatas=[metadata])
+            self._save()
+            self._version = self._disk_version()
+
+    def find_similar(self, vector, threshold, **metadata_filter):
+        """
+        Returns the most similar stored job above a similarity threshold.
+
+        Args:
+            vector (list): Embedding of the new job description.
+            threshold (float): Minimum cosine similarity (0-1).
+            **metadata_filter: Metadata values the match must have.
+
+        Returns:
+            tuple or None: (metadata, similarity) of the best match.
+        """
+        with self._lock:
+            with self._folder_lock(exclusive=False):
+                self._reload_if_changed()
+            if self._store is None:
+                return None
+            results = self._store.similarity_search_with_score_by_vector(
+                vector, k=1, filter=metadata_filter or None)
+        if not results:
+            return None
+        document, distance = results[0]
+        # OpenAI embeddings are unit length, so the squared L2 distance
+        # FAISS returns maps directly to cosine similarity
+        similarity = 1 - distance / 2
+        if similarity < threshold:
+            return None
+        return document.metadata, similarity
+
+    def _save(self):
+        # Caller holds the folder lock exclusively, so no reader sees the
+        # folder missing between the two steps below
+        tmp_folder = f"{self.folder}.tmp"
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+        self._store.save_local(tmp_folder)
+        shutil.rmtree(self.folder, ignore_errors=True)
+        os.replace(tmp_folder, self.folder)
+
+
+def get_job_index(user_id, embeddings):
+    """
+    Returns the job index that holds a user's jobs, loading it once.
+    """
+    scope = _scope(user_id)
+    with _indexes_lock:
+        if scope not in _indexes:
+            folder = os.path.join(config.get_cache_dir(), "job_indexes", scope)
+            _indexes[scope] = JobIndex(folder, embeddings)
+        return _indexes[scope]
+
+
+def find_similar_job(user_id, vector, embeddings, resume_hash=None):
+    """
+    Looks up a previously processed job similar to a new posting.
+
+    Args:
+        user_id (str): The user generating documents.
+        vector (list): Embedding of the new job description.
+        embeddings (Embeddings): Embeddings model backing the index.
+        resume_hash (str, optional): Only match jobs processed against this
+            resume, so their retrieval results are still valid.
+
+    Returns:
+        tuple or None: (metadata, similarity) of the best match.
+    """
+    metadata_filter = {"user_id": user_id}
+    if resume_hash:
+        metadata_filter["resume_hash"] = resume_hash
+    return get_job_index(user_id, embeddings).find_similar(
+        vector, config.get_job_similarity_threshold(), **metadata_filter)
+
+
+def add_job(user_id, job_description, vector, embeddings, metadata):
+    """
+    Records a processed job in the user's index.
+    """
+    get_job_index(user_id, embeddings).add(
+        job_description, vector, {**metadata, "user_id": user_id})
@@ -0,0 +1,151 @@
+# job_ingest.py
+"""
+Ingestion of job postings sent by the browser extension.
+
+A posting is identified by a hash of its normalized title, company and
+description. The first time a user sends a posting, it is recorded in
+``users/{uid}/postings/{hash}``, added to their application tracker, and
+generation of the tailored resume and cover letter is queued right away,
+so the documents are usually ready by the time the user opens the app.
+Sending the same posting again returns the existing record.
+"""
+
+import hashlib
+import re
+from datetime import datetime
+
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists
+
+import job_queue
+import metering
+import metrics
+import repository
+import resources
+import tracker_aggregates
+
+# Job payload field marking generation queued from the extension
+SOURCE = "extension"
+
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+def posting_hash(details):
+    """
+    Returns the hex digest identifying a posting, ignoring case and
+    whitespace differences in how it was scraped.
+    """
+    key = "\n".join(_normalize(details.get(field))
+                    for field in ("jobTitle", "company", "description"))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def postings_ref(db, user_id):
+    return db.collection('users').document(user_id).collection('postings')
+
+
+def posting_ref(db, user_id, digest):
+    return postings_ref(db, user_id).document(digest)
+
+
+def prefetch_documents(user_id, details):
+    """
+    Queues generation of the tailored documents for a posting.
+
+    Returns:
+        str or None: The job ID, or None if the user has no parsed resume
+        or no applications left on their plan.
+    """
+    resume_data = repository.get_parsed_resume(user_id)
+    if not resume_data:
+        return None
+    try:
+        metering.check_quota(user_id)
+    except metering.QuotaExceeded:
+        return None
+    return job_queue.get_queue().enqueue("generate_documents", {
+        "resume_data": resume_data,
+        "job_description": details["description"],
+        "user_id": user_id,
+        # Lets the app load the documents when this description is pasted
+        "use_cache": True,
+        "source": SOURCE,
+        "title": f"{details.get('jobTitle') or 'Untitled'} at {details.get('company') or 'Unknown'}",
+    }, user_id=user_id)
+
+
+def ingest_posting(user_id, details):
+    """
+    Records a posting, creates its tracker application and starts
+    generating its documents, unless the user already sent it.
+
+    Args:
+        user_id (str): The user the extension key belongs to.
+        details (dict): jobTitle, company, location, description and url as
+            scraped by the extension.
+
+    Returns:
+        dict: posting_id, application_id, job_id (None if generation wasn't
+        started) and duplicate.
+    """
+    db = resources.get_db()
+    digest = posting_hash(details)
+    ref = posting_ref(db, user_id, digest)
+
+    try:
+        # create() fails if the document exists, so concurrent sends of the
+        # same posting can't both get through
+        ref.create({
+            'title': details.get('jobTitle') or '',
+            'company': details.get('company') or '',
+            'location': details.get('location') or '',
+            'url': details.get('url') or '',
+            # Kept so the posting can be generated for again, e.g. in a batch
+            'description': details.get('description') or '',
+            'created_at': firestore.SERVER_TIMESTAMP,
+        })
+    except AlreadyExists:
+        metrics.increment('ingest.duplicates')
+        stored = ref.get().to_dict() or {}
+        repository.record_reads()
+        return {'posting_id': digest, 'application_id': stored.get('application_id'),
+                'job_id': stored.get('job_id'), 'duplicate': True}
+    repository.record_writes()
+
+    try:
+        application_id = tracker_aggregates.add_application(db, user_id, {
+            'company': (details.get('company') or '').strip(),
+            'position': (details.get('jobTitle') or '').strip(),
+            'location': (details.get('location') or '').strip(),
+            'status': tracker_aggregates.APPLICATION_STATUSES[0],
+            'date': datetime.combine(datetime.now().date(), datetime.min.time()),
+        })
+    except Exception:
+        # Let the extension retry instead of reporting a duplicate
+        ref.delete()
+        raise
+
+    job_id = prefetch_documents(user_id, details)
+    ref.update({'application_id': application_id, 'job_id': job_id})
+    repository.record_writes(3)
+    metrics.increment('ingest.postings')
+    if job_id:
+        metrics.increment('ingest.prefetched')
+    return {'posting_id': digest, 'application_id': application_id,
+            'job_id': job_id, 'duplicate': False}
+
+
+def list_postings(user_id, limit=100):
+    """
+    Returns a user's most recent postings, newest first.
+
+    Returns:
+        list: Posting dicts with their id (the posting hash).
+    """
+    postings = (postings_ref(resources.get_db(), user_id)
+                .order_by('created_at', direction=firestore.Query.DESCENDING)
+                .limit(limit).get())
+    repository.record_reads(max(1, len(postings)))
+    return [{'id': posting.id, **posting.to_dict()} for posting in postings]
@@ -0,0 +1,410 @@
+# job_queue.py
+"""
+SQLite-backed queue for long-running work (resume parsing, generation).
+
+Pages enqueue a job and poll its status instead of calling the LLM in the
+Streamlit script thread, so reruns don't discard in-flight work and users
+can navigate away and come back to finished results. Jobs and their
+results are persisted in ``{APP_CACHE_DIR}/jobs.sqlite3``.
+
+A job is attempted at most MAX_ATTEMPTS times: a running job whose worker
+stops responding is queued again until then, and failed afterwards. Only
+the worker currently holding a job can record its outcome, so a stalled
+worker that finishes late can't overwrite the rerun's. Handlers that
+charge the user mark the job (mark_charged) so a rerun isn't charged again.
+Finished jobs, whose payloads and results hold resumes and generated
+documents, are deleted after JOB_RETENTION_SECONDS.
+
+Handlers are registered per job kind with ``@handler("kind")`` in the
+modules listed in HANDLER_MODULES. Jobs are run by worker threads started
+inside the app (JOB_WORKERS) and/or by separate worker processes sharing
+the same database, so throughput scales by adding workers:
+
+    python job_queue.py --workers 4
+"""
+
+import argparse
+import importlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+import config
+import metrics
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Modules whose import registers the job handlers
+HANDLER_MODULES = ("resume_parser", "ai_generator")
+
+# Running jobs not finished after this long are assumed to belong to a
+# crashed worker and are queued again, up to MAX_ATTEMPTS runs in total
+STALE_JOB_SECONDS = 600
+MAX_ATTEMPTS = 3
+
+# How often a worker pool deletes expired finished jobs
+PRUNE_INTERVAL_SECONDS = 600
+
+_handlers = {}
+_current = threading.local()
+
+
+def handler(kind):
+    """
+    Registers a function as the handler for a job kind.
+
+    The function receives the job's payload dict and returns a
+    JSON-serializable result; raising marks the job as failed.
+    """
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def _load_handlers():
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+class JobQueue:
+    """
+    Persistent job queue shared by every process using the same file.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        # Autocommit mode, so claim() can open its own write transaction
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, user_id TEXT, "
+            "payload TEXT NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT, "
+            "worker TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, charged INTEGER NOT NULL DEFAULT 0)")
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        # Databases created before jobs counted their attempts or charges
+        for column in ("attempts", "charged"):
+            if column not in columns:
+                self._conn.execute(
+                    f"ALTER TABLE jobs ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_user ON jobs (user_id, created_at)")
+
+    def enqueue(self, kind, payload, user_id=None):
+        """
+        Adds a job to the queue.
+
+        Args:
+            kind (str): Job kind, matching a registered handler.
+            payload (dict): JSON-serializable handler input.
+            user_id (str, optional): Owner, used to list a user's jobs.
+
+        Returns:
+            str: The new job's ID.
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, user_id, payload, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, user_id, json.dumps(payload), QUEUED, time.time()))
+        metrics.increment(f"jobs.enqueued.{kind}")
+        return job_id
+
+    def claim(self, worker_id):
+        """
+        Atomically takes the oldest queued job.
+
+        Stale running jobs are queued again first, or failed once they have
+        used up MAX_ATTEMPTS.
+
+        Returns:
+            dict or None: The claimed job, or None if the queue is empty.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                stale = (RUNNING, now - STALE_JOB_SECONDS, MAX_ATTEMPTS)
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                    "WHERE status = ? AND started_at < ? AND attempts >= ?",
+                    (FAILED, f"Gave up after {MAX_ATTEMPTS} attempts; the worker "
+                             f"stopped responding", now) + stale)
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, worker = NULL, started_at = NULL "
+                    "WHERE status = ? AND started_at < ? AND attempts < ?",
+                    (QUEUED,) + stale)
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (QUEUED,)).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, started_at = ?, "
+                        "attempts = attempts + 1 WHERE id = ?",
+                        (RUNNING, worker_id, now, row["id"]))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job = self._to_dict(row)
+        job.update(status=RUNNING, worker=worker_id, started_at=now,
+                   attempts=job["attempts"] + 1)
+        return job
+
+    def _finish(self, job_id, status, worker_id, result=None, error=None):
+        query = ("UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                 "WHERE id = ? AND status = ?")
+        params = [status, None if result is None else json.dumps(result), error,
+                  time.time(), job_id, RUNNING]
+        if worker_id is not None:
+            query += " AND worker = ?"
+            params.append(worker_id)
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, result, worker_id=None):
+        """
+        Records a running job's result.
+
+        Args:
+            worker_id (str, optional): The worker that ran the job; the
+                result is dropped if the job was queued again and has
+                since been claimed by another worker (or is waiting for one).
+
+        Returns:
+            bool: Whether the result was recorded.
+        """
+        return self._finish(job_id, DONE, worker_id, result=result)
+
+    def fail(self, job_id, error, worker_id=None):
+        """
+        Marks a running job as failed; see complete for ``worker_id``.
+        """
+        return self._finish(job_id, FAILED, worker_id, error=error)
+
+    def mark_charged(self, job_id):
+        """
+        Marks a job as having charged its user.
+
+        Returns:
+            bool: False if an earlier attempt of the job already did.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET charged = 1 WHERE id = ? AND charged = 0", (job_id,))
+        return cursor.rowcount == 1
+
+    def clear_charged(self, job_id):
+        """
+        Undoes mark_charged, when the charge is refunded or was refused.
+        """
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET charged = 0 WHERE id = ?", (job_id,))
+
+    def get(self, job_id):
+        """
+        Returns a job with its status and, once finished, its result.
+
+        Returns:
+            dict or None: id, kind, user_id, payload, status, result, error
+            and timestamps; None if the job doesn't exist.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def list_jobs(self, user_id, kind=None, limit=20):
+        """
+        Returns a user's most recent jobs, newest first.
+        """
+        query = "SELECT * FROM jobs WHERE user_id = ?"
+        params = [user_id]
+        if kind:
+            query += " AND kind = ?"
+            params.append(kind)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def prune(self, max_age):
+        """
+        Deletes finished jobs older than ``max_age`` seconds.
+
+        Returns:
+            int: Number of jobs deleted.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, time.time() - max_age))
+        metrics.increment("jobs.pruned", cursor.rowcount)
+        return cursor.rowcount
+
+    def queue_depth(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+
+def current_job():
+    """
+    Returns the queue and job whose handler is running on this thread.
+
+    Returns:
+        tuple or None: (queue, job), or None outside a job handler.
+    """
+    return getattr(_current, "job", None)
+
+
+def run_job(queue, job):
+    """
+    Runs a claimed job with its handler and records the outcome.
+    """
+    kind = job["kind"]
+    worker_id = job["worker"]
+    try:
+        func = _handlers[kind]
+    except KeyError:
+        queue.fail(job["id"], f"No handler registered for job kind {kind!r}", worker_id)
+        return
+    _current.job = (queue, job)
+    try:
+        with metrics.timer(f"jobs.run.{kind}"):
+            result = func(job["payload"])
+    except Exception as e:
+        metrics.increment(f"jobs.failed.{kind}")
+        recorded = queue.fail(job["id"], str(e), worker_id)
+    else:
+        recorded = queue.complete(job["id"], result, worker_id)
+    finally:
+        _current.job = None
+    if not recorded:
+        # Queued again while this worker was stalled; the rerun's outcome counts
+        metrics.increment(f"jobs.superseded.{kind}")
+    metrics.record(f"jobs.wait.{kind}", job["started_at"] - job["created_at"])
+
+
+class WorkerPool:
+    """
+    Threads that claim and run jobs until stopped.
+    """
+
+    def __init__(self, queue, workers, poll_interval=0.5):
+        self.queue = queue
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+        self._next_prune = 0.0
+        self._prune_lock = threading.Lock()
+
+    def start(self):
+        _load_handlers()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(f"{prefix}:{index}",),
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _prune(self):
+        # One thread per pool prunes, at most every PRUNE_INTERVAL_SECONDS
+        with self._prune_lock:
+            if time.monotonic() < self._next_prune:
+                return
+            self._next_prune = time.monotonic() + PRUNE_INTERVAL_SECONDS
+        self.queue.prune(config.get_job_retention_seconds())
+
+    def _run(self, worker_id):
+        while not self._stop.is_set():
+            try:
+                self._prune()
+                job = self.queue.claim(worker_id)
+            except sqlite3.OperationalError:
+                # Database busy with another process; try again shortly
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            run_job(self.queue, job)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+_queue = None
+_pool = None
+_init_lock = threading.Lock()
+
+
+def get_queue():
+    """
+    Returns the shared job queue, starting the in-app workers on first use.
+    """
+    global _queue, _pool
+    with _init_lock:
+        if _queue is None:
+            _queue = JobQueue(os.path.join(config.get_cache_dir(), "jobs.sqlite3"))
+            workers = config.get_job_workers()
+            if workers > 0:
+                _pool = WorkerPool(_queue, workers).start()
+        return _queue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run job queue workers.")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    queue = JobQueue(os.path.join(config.get_cache_dir(), "jobs.sqlite3"))
+    pool = WorkerPool(queue, args.workers).start()
+    print(f"{args.workers} workers processing {queue.path}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    # Handler modules register on the importable job_queue module, not on
+    # __main__, so run the workers from there
+    import job_queue
+
+    job_queue.main()
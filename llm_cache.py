@@ -0,0 +1,104 @@
+# llm_cache.py
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+import config
+import metrics
+from disk_cache import DiskCache
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def normalize_prompt(prompt):
+    """
+    Normalizes a prompt so insignificant whitespace differences share a key.
+
+    Args:
+        prompt (str): Prompt text.
+
+    Returns:
+        str: Prompt with runs of whitespace collapsed and ends stripped.
+    """
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def make_key(model, prompt, params):
+    """
+    Builds the cache key for an LLM request.
+
+    Args:
+        model (str): Model name.
+        prompt (str): Full prompt text (all messages concatenated).
+        params (dict): Generation parameters that affect the output.
+
+    Returns:
+        str: Hex digest identifying the request.
+    """
+    params_hash = hashlib.sha256(
+        json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+    payload = json.dumps([model, normalize_prompt(prompt), params_hash])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def hash_text(text):
+    """
+    Hashes free text such as a job description after normalization.
+    """
+    return hashlib.sha256(normalize_prompt(text).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Caches LLM responses as text in a DiskCache, counting hits and misses.
+    """
+
+    def __init__(self, name, disk_cache):
+        self.name = name
+        self.disk_cache = disk_cache
+
+    def get(self, key):
+        """
+        Returns the cached response for a key, or None on a miss.
+        """
+        value = self.disk_cache.get(key)
+        if value is None:
+            metrics.increment(f"llm_cache.{self.name}.misses")
+            return None
+        metrics.increment(f"llm_cache.{self.name}.hits")
+        return value.decode("utf-8")
+
+    def set(self, key, response):
+        """
+        Stores a response for a key.
+        """
+        self.disk_cache.set(key, response.encode("utf-8"))
+
+    def stats(self):
+        return self.disk_cache.stats()
+
+
+def get_cache(name):
+    """
+    Returns the named response cache, creating it on first use.
+
+    Args:
+        name (str): Cache name, e.g. "resume_parser" or "documents".
+
+    Returns:
+        ResponseCache: The shared cache instance.
+    """
+    with _caches_lock:
+        if name not in _caches:
+            disk_cache = DiskCache(
+                os.path.join(config.get_cache_dir(), "llm_responses.sqlite3"),
+                table=name,
+                max_entries=100000,
+                max_bytes=config.get_llm_cache_max_bytes(),
+                ttl=config.get_llm_cache_ttl_seconds())
+            _caches[name] = ResponseCache(name, disk_cache)
+        return _caches[name]
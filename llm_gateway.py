@@ -0,0 +1,312 @@
+# llm_gateway.py
+"""
+Single entry point for OpenAI calls.
+
+Every chat completion and embedding request goes through an ``LLMGateway``,
+which:
+
+* waits for capacity in per-model token buckets for requests per minute
+  (RPM) and tokens per minute (TPM), so bursts queue up instead of
+  producing 429 errors, and refunds tokens a call reserved but didn't use
+  (or used none of, because it failed);
+* retries rate-limit, timeout, connection and server errors with
+  exponential backoff and full jitter, honouring ``Retry-After``;
+* coalesces identical in-flight (non-streaming) requests, so concurrent
+  callers asking for the same thing share one API call;
+* records per-call latency, queue wait, retries and token counts in
+  ``metrics`` under ``llm.*``, and reports each user's token usage to an
+  ``on_usage`` callback (see metering).
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import metrics
+
+# Tokens reserved for a completion when the request sets no max_tokens
+DEFAULT_COMPLETION_TOKENS = 1000
+
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``per_minute`` / 60
+    tokens per second, holding at most one minute's worth.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount):
+        """
+        Takes ``amount`` tokens, going into debt if needed.
+
+        Returns:
+            float: Seconds the caller must wait before using the tokens.
+        """
+        # Requests larger than the bucket are capped so they can still run
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def refund(self, amount):
+        """
+        Returns tokens that were reserved but not used.
+        """
+        # Mirrors the cap applied in reserve
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class ModelLimiter:
+    """
+    RPM and TPM buckets for one model.
+    """
+
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    def acquire(self, tokens):
+        """
+        Blocks until one request and ``tokens`` tokens are available.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def _estimate_tokens(text):
+    # Imported lazily: tiktoken loads its encoding on first use
+    from resume_chunker import count_tokens
+
+    return count_tokens(text)
+
+
+def _prompt_tokens(messages, params):
+    tokens = sum(_estimate_tokens(m["content"]) for m in messages)
+    if "response_format" in params:
+        # A JSON schema is sent to the model as part of the prompt
+        tokens += _estimate_tokens(json.dumps(params["response_format"]))
+    return tokens
+
+
+def _is_retryable(error):
+    import openai
+
+    return isinstance(error, (openai.RateLimitError, openai.APITimeoutError,
+                              openai.APIConnectionError, openai.InternalServerError))
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Returns the delay before retry number ``attempt`` (starting at 0).
+
+    Uses exponential backoff with full jitter, but never less than the
+    server's Retry-After.
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class LLMGateway:
+    """
+    Rate-limited, retrying, coalescing wrapper around an OpenAI client.
+    """
+
+    def __init__(self, client, limits, default_limits=None, on_usage=None):
+        """
+        Args:
+            client (OpenAI): The OpenAI client (created with max_retries=0,
+                since retries are handled here).
+            limits (dict): Model name to {"rpm": int, "tpm": int}.
+            default_limits (dict, optional): Limits for models not listed.
+            on_usage (callable, optional): Called as
+                ``on_usage(user_id, model, prompt_tokens, completion_tokens)``
+                after each call made on behalf of a user.
+        """
+        self.client = client
+        self.limits = limits
+        self.default_limits = default_limits or {"rpm": 500, "tpm": 30000}
+        self.on_usage = on_usage
+        self._limiters = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, model):
+        with self._lock:
+            if model not in self._limiters:
+                limits = self.limits.get(model, self.default_limits)
+                self._limiters[model] = ModelLimiter(limits["rpm"], limits["tpm"])
+            return self._limiters[model]
+
+    def _call(self, model, estimated_tokens, request):
+        """
+        Runs ``request()`` within the model's limits, retrying on transient
+        errors. Returns the response.
+        """
+        limiter = self._limiter(model)
+        for attempt in range(MAX_RETRIES + 1):
+            wait = limiter.acquire(estimated_tokens)
+            metrics.record(f"llm.queue_wait.{model}", wait)
+            start = time.perf_counter()
+            try:
+                response = request()
+            except Exception as e:
+                # A failed attempt generates nothing; return its tokens so
+                # retries and later calls aren't throttled by them
+                limiter.tokens.refund(estimated_tokens)
+                if not _is_retryable(e) or attempt == MAX_RETRIES:
+                    metrics.increment(f"llm.errors.{model}")
+                    raise
+                metrics.increment(f"llm.retries.{model}")
+                time.sleep(backoff_delay(attempt, _retry_after(e)))
+                continue
+            metrics.record(f"llm.latency.{model}", time.perf_counter() - start)
+            return response
+
+    def _record_usage(self, model, estimated_tokens, usage, user_id=None):
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        metrics.increment(f"llm.prompt_tokens.{model}", prompt_tokens)
+        metrics.increment(f"llm.completion_tokens.{model}", completion_tokens)
+        if user_id and self.on_usage:
+            try:
+                self.on_usage(user_id, model, prompt_tokens, completion_tokens)
+            except Exception:
+                # Metering must not fail a call that has already succeeded
+                metrics.increment("llm.usage_errors")
+        # Give back what the estimate over-reserved (usually most of max_tokens)
+        unused = estimated_tokens - prompt_tokens - completion_tokens
+        if unused > 0:
+            self._limiter(model).tokens.refund(unused)
+
+    def _coalesced(self, key, compute):
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+        if not owner:
+            metrics.increment("llm.coalesced")
+            return future.result()
+
+        try:
+            result = compute()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def chat(self, model, messages, user_id=None, with_finish_reason=False, **params):
+        """
+        Creates a chat completion.
+
+        Args:
+            model (str): Model name.
+            messages (list): Chat messages.
+            user_id (str, optional): User the call is made for, passed to
+                on_usage. Not sent to OpenAI.
+            with_finish_reason (bool): Also return why generation stopped,
+                e.g. "length" when max_tokens cut the completion short.
+            **params: Extra request parameters (temperature, max_tokens, ...).
+
+        Returns:
+            str or tuple: The completion text, or (text, finish_reason).
+        """
+        estimated_tokens = (_prompt_tokens(messages, params)
+                            + params.get("max_tokens", DEFAULT_COMPLETION_TOKENS))
+
+        def compute():
+            response = self._call(model, estimated_tokens, lambda: self.client.chat.completions.create(
+                model=model, messages=messages, **params))
+            self._record_usage(model, estimated_tokens, response.usage, user_id)
+            choice = response.choices[0]
+            return choice.message.content, choice.finish_reason
+
+        # Keyed per user so each user's usage is metered
+        key = json.dumps(["chat", user_id, model, messages, params], sort_keys=True,
+                         default=str)
+        content, finish_reason = self._coalesced(key, compute)
+        return (content, finish_reason) if with_finish_reason else content
+
+    def stream_chat(self, model, messages, user_id=None, **params):
+        """
+        Streams a chat completion, yielding text fragments as they arrive.
+
+        Only establishing the stream is retried; an error mid-stream is
+        raised to the caller.
+        """
+        estimated_tokens = (_prompt_tokens(messages, params)
+                            + params.get("max_tokens", DEFAULT_COMPLETION_TOKENS))
+        stream = self._call(model, estimated_tokens, lambda: self.client.chat.completions.create(
+            model=model, messages=messages, stream=True,
+            stream_options={"include_usage": True}, **params))
+        for chunk in stream:
+            if chunk.usage is not None:
+                self._record_usage(model, estimated_tokens, chunk.usage, user_id)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def embed(self, model, texts):
+        """
+        Embeds a list of texts.
+
+        Returns:
+            list: One vector per text, in order.
+        """
+        estimated_tokens = sum(_estimate_tokens(text) for text in texts)
+
+        def compute():
+            response = self._call(model, estimated_tokens, lambda: self.client.embeddings.create(
+                model=model, input=texts))
+            self._record_usage(model, estimated_tokens, response.usage)
+            return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+        key = json.dumps(["embed", model, texts])
+        return self._coalesced(key, compute)
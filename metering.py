@@ -0,0 +1,204 @@
+# metering.py
+"""
+Per-user usage metering and free-plan quota enforcement.
+
+LLM calls, tokens and resume parses are counted in sharded counter
+documents, ``users/{uid}/usage/{n}``, updated with ``firestore.Increment``
+so concurrent writers never lose counts and no single document takes
+every write. Nothing reads the shards except get_usage, which sums them
+for reporting.
+
+Applications are counted in a separate ``quota`` document under the same
+collection. Charges and refunds touch only that document, so a quota
+transaction never conflicts with token accounting.
+
+Quota checks run before any LLM call and read a per-process cached
+allowance; this process's own charges are applied to the cache as they
+happen, so a check costs no Firestore reads within USAGE_CACHE_SECONDS.
+That check is only a fast pre-filter. The limit itself is enforced by
+charge_application, which for free-plan users reads the quota document
+and counts the application in one transaction.
+"""
+
+import random
+import threading
+import time
+
+from firebase_admin import firestore
+
+import config
+import metrics
+import repository
+import resources
+import subscriptions
+
+NUM_SHARDS = 5
+
+# Usage document holding the application count, apart from the shards
+QUOTA_SHARD = 'quota'
+
+# Set on the quota document once application counts left on the shards by
+# earlier versions have been moved into it
+CONSOLIDATED_FIELD = 'consolidated'
+
+# Tailored applications (resume + cover letter) included in the free plan
+FREE_APPLICATION_LIMIT = 25
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class QuotaExceeded(Exception):
+    """
+    Raised before an LLM call when the user's plan allows no more usage.
+    """
+
+
+def usage_ref(db, user_id):
+    return db.collection('users').document(user_id).collection('usage')
+
+
+def _merge(target, counters):
+    for key, value in counters.items():
+        if isinstance(value, dict):
+            _merge(target.setdefault(key, {}), value)
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+def _as_increments(counters):
+    return {key: _as_increments(value) if isinstance(value, dict)
+            else firestore.Increment(value)
+            for key, value in counters.items()}
+
+
+def _record(user_id, counters, shard=None):
+    shard = shard or str(random.randrange(NUM_SHARDS))
+    usage_ref(resources.get_db(), user_id).document(shard).set(
+        _as_increments(counters), merge=True)
+    repository.record_writes()
+    with _cache_lock:
+        if user_id in _cache:
+            _merge(_cache[user_id][1], counters)
+
+
+def get_usage(user_id):
+    """
+    Returns a user's usage totals, cached for USAGE_CACHE_SECONDS.
+
+    Returns:
+        dict: applications, resume_parses and an llm map of model name to
+        calls, prompt_tokens and completion_tokens.
+    """
+    with _cache_lock:
+        cached = _cache.get(user_id)
+        if cached and time.monotonic() - cached[0] < config.get_usage_cache_seconds():
+            return cached[1]
+
+    shards = usage_ref(resources.get_db(), user_id).get()
+    repository.record_reads(max(1, len(shards)))
+    usage = {}
+    for shard in shards:
+        counters = shard.to_dict() or {}
+        counters.pop(CONSOLIDATED_FIELD, None)
+        _merge(usage, counters)
+
+    with _cache_lock:
+        _cache[user_id] = (time.monotonic(), usage)
+    return usage
+
+
+def remaining_applications(user_id):
+    """
+    Returns how many more applications the user may generate (None if
+    their plan is unlimited).
+    """
+    if subscriptions.get_plan(user_id) != subscriptions.FREE_PLAN:
+        return None
+    return max(0, FREE_APPLICATION_LIMIT - get_usage(user_id).get('applications', 0))
+
+
+def check_quota(user_id, applications=1):
+    """
+    Raises QuotaExceeded if the user can't generate ``applications`` more
+    applications.
+    """
+    remaining = remaining_applications(user_id)
+    if remaining is not None and remaining < applications:
+        _reject(remaining)
+
+
+def _reject(remaining):
+    metrics.increment('metering.rejected')
+    raise QuotaExceeded(
+        f"The Free plan includes {FREE_APPLICATION_LIMIT} applications and you "
+        f"have {remaining} left. Please upgrade to continue.")
+
+
+def charge_application(user_id):
+    """
+    Counts one application before its LLM calls run, raising QuotaExceeded
+    if the user's plan doesn't allow it.
+
+    For free-plan users the limit check and the increment run in one
+    transaction over the quota document, so concurrent requests at the
+    limit can't all pass. Call refund_application if generation then fails.
+    """
+    if subscriptions.get_plan(user_id) != subscriptions.FREE_PLAN:
+        _record(user_id, {'applications': 1}, shard=QUOTA_SHARD)
+        return
+
+    db = resources.get_db()
+    usage = usage_ref(db, user_id)
+    quota = usage.document(QUOTA_SHARD)
+
+    @firestore.transactional
+    def charge(transaction):
+        counters = quota.get(transaction=transaction).to_dict() or {}
+        used = counters.get('applications', 0)
+        reads = 1
+        legacy = []
+        if not counters.get(CONSOLIDATED_FIELD):
+            # Applications counted on the shards before they moved here
+            for shard in range(NUM_SHARDS):
+                ref = usage.document(str(shard))
+                count = ref.get(transaction=transaction).get('applications')
+                reads += 1
+                if count:
+                    legacy.append(ref)
+                    used += count
+        if used < FREE_APPLICATION_LIMIT:
+            transaction.set(quota, {'applications': used + 1, CONSOLIDATED_FIELD: True},
+                            merge=True)
+            for ref in legacy:
+                transaction.update(ref, {'applications': firestore.DELETE_FIELD})
+        return used, reads
+
+    used, reads = charge(db.transaction())
+    repository.record_reads(reads)
+    if used >= FREE_APPLICATION_LIMIT:
+        with _cache_lock:
+            _cache.pop(user_id, None)
+        _reject(0)
+
+    repository.record_writes()
+    with _cache_lock:
+        if user_id in _cache:
+            # The transaction read the true total
+            _cache[user_id][1]['applications'] = used + 1
+
+
+def refund_application(user_id):
+    _record(user_id, {'applications': -1}, shard=QUOTA_SHARD)
+
+
+def record_resume_parse(user_id):
+    _record(user_id, {'resume_parses': 1})
+
+
+def record_llm_usage(user_id, model, prompt_tokens, completion_tokens):
+    """
+    Counts one LLM call and its tokens against a user.
+    """
+    _record(user_id, {'llm': {model: {'calls': 1, 'prompt_tokens': prompt_tokens,
+                                      'completion_tokens': completion_tokens}}})
@@ -0,0 +1,98 @@
+# metrics.py
+
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Number of samples kept per metric; older samples are dropped
+MAX_SAMPLES = 1000
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+_counters = defaultdict(int)
+
+
+def record(name, value):
+    """
+    Records a single sample (e.g. a duration in seconds) for a metric.
+
+    Args:
+        name (str): Metric name, e.g. "generation.llm.resume".
+        value (float): Sample value.
+    """
+    with _lock:
+        _samples[name].append(value)
+
+
+def increment(name, amount=1):
+    """
+    Increments a counter metric.
+
+    Args:
+        name (str): Counter name.
+        amount (int): Amount to add.
+    """
+    with _lock:
+        _counters[name] += amount
+
+
+@contextmanager
+def timer(name, timings=None):
+    """
+    Times the enclosed block and records the duration under ``name``.
+
+    Args:
+        name (str): Metric name.
+        timings (dict, optional): If given, the duration is also stored in it
+            under ``name`` so callers can report per-request stage timings.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        record(name, elapsed)
+        if timings is not None:
+            timings[name] = elapsed
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def snapshot():
+    """
+    Summarizes all recorded metrics.
+
+    Returns:
+        dict: Per-metric summaries (count, mean, p50, p95, max) for samples and
+        plain values for counters.
+    """
+    with _lock:
+        samples = {name: sorted(values) for name, values in _samples.items()}
+        counters = dict(_counters)
+
+    summary = {}
+    for name, values in samples.items():
+        if not values:
+            continue
+        summary[name] = {
+            "count": len(values),
+            "mean": sum(values) / len(values),
+            "p50": _percentile(values, 0.50),
+            "p95": _percentile(values, 0.95),
+            "max": values[-1],
+        }
+    summary.update(counters)
+    return summary
+
+
+def reset():
+    """
+    Clears all recorded metrics.
+    """
+    with _lock:
+        _samples.clear()
+        _counters.clear()
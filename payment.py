@@ -1,25 +1,21 @@
 import streamlit as st
-import stripe
-from firebase_admin import firestore
-from config import get_stripe_api_key
-
-stripe.api_key = get_stripe_api_key()
-db = firestore.client()
+import metering
+import resources
+import subscriptions
 
 def show_upgrade_options():
     st.subheader("Upgrade Your Plan")
     
     user_id = st.session_state.user['uid']
-    user_doc = db.collection('users').document(user_id).get()
-    user_data = user_doc.to_dict()
-    
-    current_plan = user_data.get('plan', 'Free')
-    applications_count = user_data.get('applications_count', 0)
+    # The user may be back from checkout; read the webhook-updated state
+    subscriptions.invalidate(user_id)
+    current_plan = subscriptions.get_plan(user_id)
+    applications_count = metering.get_usage(user_id).get('applications', 0)
     
     st.write(f"Current Plan: {current_plan}")
     st.write(f"Applications Submitted: {applications_count}")
     
-    if current_plan == 'Free' and applications_count >= 25:
+    if current_plan == 'Free' and applications_count >= metering.FREE_APPLICATION_LIMIT:
         st.warning("You've reached the limit of free applications. Please upgrade to continue.")
     
     plans = {
@@ -33,8 +29,15 @@ def show_upgrade_options():
     st.write(f"Applications: {plans[selected_plan]['applications']}")
     
     if st.button("Upgrade Now"):
+        stripe = resources.get_stripe()
         try:
-            # Create Stripe Checkout session
+            # Create Stripe Checkout session. The plan is recorded by the
+            # webhook once payment succeeds, not here.
+            metadata = {'user_id': user_id, 'plan': selected_plan}
+            customer_options = {}
+            stripe_customer_id = subscriptions.get_subscription(user_id).get('stripe_customer_id')
+            if stripe_customer_id:
+                customer_options['customer'] = stripe_customer_id
             checkout_session = stripe.checkout.Session.create(
                 payment_method_types=['card'],
                 line_items=[{
@@ -44,20 +47,19 @@ def show_upgrade_options():
                         'product_data': {
                             'name': f'{selected_plan} Plan',
                         },
+                        'recurring': {'interval': 'month'},
                     },
                     'quantity': 1,
                 }],
                 mode='subscription',
+                client_reference_id=user_id,
+                metadata=metadata,
+                subscription_data={'metadata': metadata},
                 success_url='https://yourdomain.com/success',
                 cancel_url='https://yourdomain.com/cancel',
+                **customer_options,
             )
             
-            # Update user's plan in Firestore
-            db.collection('users').document(user_id).update({
-                'plan': selected_plan,
-                'stripe_customer_id': checkout_session.customer
-            })
-            
             # Redirect to Stripe Checkout
             st.markdown(f"<a href='{checkout_session.url}' target='_blank'>Click here to complete your payment</a>", unsafe_allow_html=True)
             
@@ -65,20 +67,8 @@ def show_upgrade_options():
             st.error(f"An error occurred: {str(e)}")
 
 def check_subscription_status(user_id):
-    user_doc = db.collection('users').document(user_id).get()
-    user_data = user_doc.to_dict()
-    
-    if 'stripe_customer_id' in user_data:
-        try:
-            customer = stripe.Customer.retrieve(user_data['stripe_customer_id'])
-            subscriptions = stripe.Subscription.list(customer=customer.id, limit=1)
-            
-            if subscriptions.data:
-                subscription = subscriptions.data[0]
-                if subscription.status == 'active':
-                    return True
-            
-        except stripe.error.StripeError as e:
-            st.error(f"An error occurred while checking subscription status: {str(e)}")
-    
-    return False
+    """
+    Whether the user has an active subscription, from the locally stored
+    state (see subscriptions) rather than the Stripe API.
+    """
+    return subscriptions.is_active(user_id)
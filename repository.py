@@ -0,0 +1,178 @@
+# repository.py
+"""
+Data access for user documents in Firestore.
+
+All pages read and write ``users/{uid}`` through these accessors.
+Generated documents live in their own subcollection (see document_store). The
+Firebase app and Firestore client are the single shared instances from
+``resources``. Within a Streamlit session the user document is read at
+most once and kept current on writes (write-through), and every read and
+write is counted so the Firestore cost of a page view can be inspected.
+"""
+
+import copy
+
+import streamlit as st
+
+import metrics
+import resources
+
+_SESSION_KEY = '_repository'
+
+
+def _in_streamlit_session():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return False
+    return get_script_run_ctx() is not None
+
+
+def _session():
+    # Outside a Streamlit session (CLI tools, worker threads) nothing is
+    # cached and counters are only reported through metrics
+    if not _in_streamlit_session():
+        return None
+    if _SESSION_KEY not in st.session_state:
+        st.session_state[_SESSION_KEY] = {'users': {}, 'reads': 0, 'writes': 0}
+    return st.session_state[_SESSION_KEY]
+
+
+def record_reads(count=1):
+    """
+    Counts Firestore document reads made outside this module.
+    """
+    metrics.increment('firestore.reads', count)
+    session = _session()
+    if session is not None:
+        session['reads'] += count
+
+
+def record_writes(count=1):
+    """
+    Counts Firestore document writes made outside this module.
+    """
+    metrics.increment('firestore.writes', count)
+    session = _session()
+    if session is not None:
+        session['writes'] += count
+
+
+def user_ref(user_id):
+    return resources.get_db().collection('users').document(user_id)
+
+
+def get_user(user_id):
+    """
+    Returns the user document's data, reading Firestore once per session.
+
+    Args:
+        user_id (str): The user's UID.
+
+    Returns:
+        dict: The document data (empty if the document does not exist).
+        Callers must not modify it.
+    """
+    session = _session()
+    if session is not None and user_id in session['users']:
+        return session['users'][user_id]
+
+    snapshot = user_ref(user_id).get()
+    record_reads()
+    data = snapshot.to_dict() if snapshot.exists else {}
+    if session is not None:
+        session['users'][user_id] = data
+    return data
+
+
+def update_user(user_id, fields):
+    """
+    Replaces top-level fields of the user document and the session cache.
+
+    Other fields of the document are left untouched.
+
+    Args:
+        user_id (str): The user's UID.
+        fields (dict): Top-level fields to set.
+    """
+    user_ref(user_id).set(fields, merge=list(fields))
+    record_writes()
+
+    session = _session()
+    if session is None or user_id not in session['users']:
+        return
+    if _has_transform(fields):
+        # Server-side transforms (increments, deletes, ...) can't be
+        # applied locally; read the document again next time
+        session['users'].pop(user_id, None)
+    else:
+        cached = dict(session['users'][user_id])
+        cached.update(copy.deepcopy(fields))
+        session['users'][user_id] = cached
+
+
+def _has_transform(value):
+    from google.cloud.firestore_v1 import transforms
+
+    if isinstance(value, dict):
+        return any(_has_transform(item) for item in value.values())
+    return type(value).__module__ == transforms.__name__
+
+
+def invalidate_user(user_id):
+    """
+    Drops the session's cached copy of a user document.
+    """
+    session = _session()
+    if session is not None:
+        session['users'].pop(user_id, None)
+
+
+def clear_session():
+    """
+    Forgets everything cached for the current session, e.g. on logout.
+    """
+    if _in_streamlit_session():
+        st.session_state.pop(_SESSION_KEY, None)
+
+
+def get_io_stats():
+    """
+    Returns the session's Firestore read and write counts.
+
+    Returns:
+        dict: reads and writes made so far in this session.
+    """
+    session = _session()
+    if session is None:
+        return {'reads': 0, 'writes': 0}
+    return {'reads': session['reads'], 'writes': session['writes']}
+
+
+def get_user_profile(user_id):
+    """
+    Returns the user's basic profile fields.
+
+    Returns:
+        dict: name and email (empty strings when unknown).
+    """
+    data = get_user(user_id)
+    return {'name': data.get('name', ''), 'email': data.get('email', '')}
+
+
+def get_parsed_resume(user_id):
+    """
+    Returns the user's parsed resume, or None if none was saved.
+
+    Older accounts stored it under ``resume_data``.
+    """
+    data = get_user(user_id)
+    return data.get('parsed_resume') or data.get('resume_data')
+
+
+def save_parsed_resume(user_id, parsed_resume):
+    update_user(user_id, {'parsed_resume': parsed_resume})
+
+
+def get_stripe_customer_id(user_id):
+    return get_user(user_id).get('stripe_customer_id')
@@ -0,0 +1,101 @@
+# resources.py
+"""
+Registry of shared clients, created on first use.
+
+Every getter builds its client once per process and returns the same
+instance afterwards, so pages only pay for the clients (and the heavy
+libraries behind them) they actually use. Imports of those libraries
+happen inside the getters to keep module import cheap.
+"""
+
+import functools
+
+import config
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+@functools.lru_cache(maxsize=None)
+def get_db():
+    """
+    Returns the Firestore client, initializing the Firebase app if needed.
+    """
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        config.set_firebase_project_id()
+        cred = credentials.Certificate(config.get_firebase_config())
+        firebase_admin.initialize_app(cred)
+    return firestore.client()
+
+
+@functools.lru_cache(maxsize=None)
+def get_http_session():
+    """
+    Returns a pooled HTTP session for the identity endpoints, so sign-ins
+    reuse open TLS connections instead of setting up a new one per request.
+
+    Only connection failures are retried; the sign-in POSTs are not
+    idempotent once they reach the server.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                          max_retries=Retry(total=2, connect=2, read=0, status=0,
+                                            backoff_factor=0.2))
+    session.mount("https://", adapter)
+    return session
+
+
+@functools.lru_cache(maxsize=None)
+def get_openai_client():
+    """
+    Returns the shared OpenAI client.
+
+    Its own retries are disabled; the LLM gateway retries with backoff.
+    """
+    from openai import OpenAI
+
+    return OpenAI(api_key=config.get_openai_api_key(),
+                  base_url=config.get_openai_base_url(), max_retries=0)
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm_gateway():
+    """
+    Returns the rate-limited gateway all OpenAI calls go through.
+    """
+    import metering
+    from llm_gateway import LLMGateway
+
+    return LLMGateway(get_openai_client(), config.get_llm_rate_limits(),
+                      on_usage=metering.record_llm_usage)
+
+
+@functools.lru_cache(maxsize=None)
+def get_embeddings():
+    """
+    Returns the OpenAI embeddings model wrapped in the persistent cache.
+    """
+    from resume_index import CachedEmbeddings, GatewayEmbeddings, create_embedding_cache
+
+    return CachedEmbeddings(GatewayEmbeddings(get_llm_gateway(), EMBEDDING_MODEL),
+                            EMBEDDING_MODEL, create_embedding_cache())
+
+
+@functools.lru_cache(maxsize=None)
+def get_stripe():
+    """
+    Returns the stripe module configured with the API key.
+    """
+    import stripe
+
+    stripe.api_key = config.get_stripe_api_key()
+    api_base = config.get_stripe_api_base()
+    if api_base:
+        stripe.api_base = api_base
+    return stripe
@@ -0,0 +1,182 @@
+# resume_chunker.py
+"""
+Splits a parsed resume (see plain_text_resume.yaml) into retrieval chunks.
+
+Every role yields a summary chunk (position, company, period, skills) and
+one chunk per responsibility, prefixed with the role so it still makes
+sense on its own. Projects, achievements, certifications and skills become
+one chunk each. Chunks carry metadata (section, role, order, token count)
+so the retriever can fill a token budget and restore resume order.
+"""
+
+import functools
+
+from langchain_core.documents import Document
+
+# Bump when chunking changes so stored indexes are rebuilt
+CHUNKER_VERSION = 1
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    import tiktoken
+
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text):
+    """
+    Counts the tokens of a text with the encoding used by GPT-4.
+    """
+    return len(_encoding().encode(text))
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _join(*parts, separator=", "):
+    return separator.join(part for part in (_text(p) for p in parts) if part)
+
+
+def _responsibilities(role):
+    # The template lists responsibilities as {responsibility_n: text}
+    # mappings, but plain strings are accepted too
+    for item in role.get("key_responsibilities") or []:
+        if isinstance(item, dict):
+            for value in item.values():
+                if _text(value):
+                    yield _text(value)
+        elif _text(item):
+            yield _text(item)
+
+
+def _skill_list(values):
+    return [_text(value) for value in values or [] if _text(value)]
+
+
+def _experience_chunks(resume_data):
+    for role_index, role in enumerate(resume_data.get("experience_details") or []):
+        if not isinstance(role, dict):
+            continue
+        title = _join(role.get("position"), role.get("company"), separator=" at ")
+        metadata = {
+            "section": "experience",
+            "role": role_index,
+            "position": _text(role.get("position")),
+            "company": _text(role.get("company")),
+        }
+
+        summary = _join(title, role.get("employment_period"), role.get("location"),
+                        role.get("industry"))
+        skills = _skill_list(role.get("skills_acquired"))
+        if skills:
+            summary = f"{summary}. Skills: {', '.join(skills)}"
+        if summary:
+            yield summary, {**metadata, "kind": "role"}
+
+        for responsibility in _responsibilities(role):
+            text = f"{title}: {responsibility}" if title else responsibility
+            yield text, {**metadata, "kind": "responsibility"}
+
+
+def _named_chunks(resume_data, section):
+    for entry in resume_data.get(section) or []:
+        if isinstance(entry, dict):
+            text = _join(entry.get("name"), entry.get("description"), separator=": ")
+            if entry.get("link"):
+                text = f"{text} ({_text(entry['link'])})"
+        else:
+            text = _text(entry)
+        if text:
+            yield text, {"section": section, "kind": section}
+
+
+def _education_chunks(resume_data):
+    for entry in resume_data.get("education_details") or []:
+        if not isinstance(entry, dict):
+            continue
+        text = _join(entry.get("education_level"), entry.get("field_of_study"),
+                     entry.get("institution"), entry.get("year_of_completion"),
+                     entry.get("final_evaluation_grade"))
+        if text:
+            yield text, {"section": "education", "kind": "education"}
+
+
+def _skill_chunks(resume_data):
+    skills = _skill_list(resume_data.get("skills"))
+    if skills:
+        yield f"Skills: {', '.join(skills)}", {"section": "skills", "kind": "skills"}
+
+
+def _legacy_chunks(resume_data):
+    experience = _text(resume_data.get("experience"))
+    if experience:
+        yield experience, {"section": "experience", "kind": "legacy"}
+
+
+def chunk_resume(resume_data):
+    """
+    Turns parsed resume data into retrieval chunks.
+
+    Args:
+        resume_data (dict): Parsed resume data.
+
+    Returns:
+        list: Documents whose metadata holds section, kind, order (position
+        in the resume) and tokens, plus role/position/company for
+        experience chunks.
+    """
+    sources = (
+        _named_chunks(resume_data, "summary"),
+        _experience_chunks(resume_data),
+        _named_chunks(resume_data, "projects"),
+        _named_chunks(resume_data, "achievements"),
+        _named_chunks(resume_data, "certifications"),
+        _education_chunks(resume_data),
+        _skill_chunks(resume_data),
+        _legacy_chunks(resume_data),
+    )
+
+    documents = []
+    seen = set()
+    for source in sources:
+        for text, metadata in source:
+            if text in seen:
+                continue
+            seen.add(text)
+            metadata = {**metadata, "order": len(documents),
+                        "tokens": count_tokens(text)}
+            documents.append(Document(page_content=text, metadata=metadata))
+    return documents
+
+
+def select_within_budget(scored_documents, token_budget):
+    """
+    Picks the best-scoring chunks whose combined size fits a token budget.
+
+    Chunks are taken in order of relevance; one that doesn't fit is skipped
+    so smaller, less relevant chunks can still fill the budget. The result
+    is returned in resume order so the prompt reads naturally.
+
+    Args:
+        scored_documents (list): (Document, distance) pairs, lowest distance
+            (most relevant) first.
+        token_budget (int): Maximum total tokens of the selected chunks.
+
+    Returns:
+        list: The selected Documents.
+    """
+    selected = []
+    used = 0
+    for document, _ in scored_documents:
+        tokens = document.metadata.get("tokens")
+        if tokens is None:
+            tokens = count_tokens(document.page_content)
+        if used + tokens > token_budget:
+            continue
+        selected.append(document)
+        used += tokens
+    return sorted(selected, key=lambda document: document.metadata.get("order", 0))
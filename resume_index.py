@@ -0,0 +1,248 @@
+# resume_index.py
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+from langchain.vectorstores import FAISS
+
+import config
+from disk_cache import DiskCache
+from resume_chunker import CHUNKER_VERSION
+
+
+def hash_resume(resume_data):
+    """
+    Computes a stable content hash for a parsed resume.
+
+    Args:
+        resume_data (dict): Parsed resume data.
+
+    Returns:
+        str: Hex digest identifying the resume content.
+    """
+    payload = json.dumps(resume_data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings model with a persistent, content-addressed cache.
+
+    Each text is keyed by a hash of the model name and the text itself, so a
+    chunk that has been embedded once is never sent to the API again.
+    """
+
+    def __init__(self, underlying, model_name, cache):
+        """
+        Args:
+            underlying (Embeddings): The embeddings model doing the real work.
+            model_name (str): Model identifier, part of every cache key.
+            cache (DiskCache): Store holding the serialized vectors.
+        """
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache = cache
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts):
+        keys = [self._key(text) for text in texts]
+        cached = self.cache.get_many(list(set(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            new_entries = {
+                key: array("f", vector).tobytes()
+                for key, vector in zip(missing.keys(), vectors)
+            }
+            self.cache.set_many(new_entries)
+            cached.update(new_entries)
+
+        return [array("f", cached[key]).tolist() for key in keys]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class GatewayEmbeddings(Embeddings):
+    """
+    Embeddings model that calls OpenAI through the LLM gateway.
+    """
+
+    # Texts sent per embeddings request
+    BATCH_SIZE = 500
+
+    def __init__(self, gateway, model_name):
+        self.gateway = gateway
+        self.model_name = model_name
+
+    def embed_documents(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.BATCH_SIZE):
+            vectors.extend(self.gateway.embed(self.model_name,
+                                              texts[start:start + self.BATCH_SIZE]))
+        return vectors
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class LocalIndexStore:
+    """
+    Persists one FAISS index per user on local disk.
+
+    The app, server.py and job_queue.py workers may share the folders, so
+    each user's folder is guarded by a file lock (as in job_index): saves
+    hold it exclusively while they swap in a new folder, loads hold it
+    shared.
+
+    Alternative backends (e.g. cloud storage) only need to provide the same
+    ``load`` and ``save`` methods.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def _folder(self, user_id):
+        safe_id = hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.root, safe_id)
+
+    @contextlib.contextmanager
+    def _folder_lock(self, folder, exclusive):
+        os.makedirs(self.root, exist_ok=True)
+        with open(f"{folder}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self, user_id, resume_hash, embeddings):
+        """
+        Loads the stored index for a user if it was built from the same resume.
+
+        Returns:
+            FAISS or None: The stored index, or None if missing or stale.
+        """
+        folder = self._folder(user_id)
+        with self._folder_lock(folder, exclusive=False):
+            try:
+                with open(os.path.join(folder, "meta.json")) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if (meta.get("resume_hash") != resume_hash
+                    or meta.get("chunker_version") != CHUNKER_VERSION):
+                return None
+            try:
+                # The index files are written by this module only, so the
+                # pickled docstore is trusted.
+                return FAISS.load_local(folder, embeddings,
+                                        allow_dangerous_deserialization=True)
+            except Exception:
+                return None
+
+    def save(self, user_id, resume_hash, vector_store):
+        """
+        Serializes a user's index, replacing any previous version.
+
+        The index is written to a folder of its own and renamed into place
+        under the exclusive lock, so concurrent saves don't share files and
+        loads never see a missing or half-written folder.
+        """
+        folder = self._folder(user_id)
+        os.makedirs(self.root, exist_ok=True)
+        tmp_folder = tempfile.mkdtemp(dir=self.root, prefix=f"{os.path.basename(folder)}.")
+        try:
+            vector_store.save_local(tmp_folder)
+            with open(os.path.join(tmp_folder, "meta.json"), "w") as f:
+                json.dump({"resume_hash": resume_hash,
+                           "chunker_version": CHUNKER_VERSION}, f)
+            with self._folder_lock(folder, exclusive=True):
+                old_folder = f"{tmp_folder}.old"
+                if os.path.exists(folder):
+                    os.rename(folder, old_folder)
+                os.rename(tmp_folder, folder)
+        finally:
+            shutil.rmtree(tmp_folder, ignore_errors=True)
+            shutil.rmtree(f"{tmp_folder}.old", ignore_errors=True)
+
+
+# Least recently used first, capped at config.get_resume_index_cache_max_users()
+_loaded_indexes = OrderedDict()
+_loaded_indexes_lock = threading.Lock()
+
+
+def get_resume_index(user_id, resume_data, documents, embeddings, store):
+    """
+    Returns the FAISS index for a user's resume, building it only when needed.
+
+    The index is looked up in memory first, then in the index store, and is
+    rebuilt (and persisted) only when the resume's content hash has changed.
+    Only the most recently used users' indexes are kept in memory.
+
+    Args:
+        user_id (str): Owner of the resume.
+        resume_data (dict): Parsed resume data.
+        documents (list): Documents to index, derived from ``resume_data``
+            (see resume_chunker).
+        embeddings (Embeddings): Embeddings model (ideally a CachedEmbeddings).
+        store (LocalIndexStore): Where indexes are persisted.
+
+    Returns:
+        FAISS: The vector store for the resume.
+    """
+    resume_hash = hash_resume(resume_data)
+
+    with _loaded_indexes_lock:
+        loaded = _loaded_indexes.get(user_id)
+        if loaded:
+            _loaded_indexes.move_to_end(user_id)
+    if loaded and loaded[0] == resume_hash:
+        return loaded[1]
+
+    vector_store = store.load(user_id, resume_hash, embeddings)
+    if vector_store is None:
+        vector_store = FAISS.from_documents(documents, embeddings)
+        store.save(user_id, resume_hash, vector_store)
+
+    with _loaded_indexes_lock:
+        _loaded_indexes[user_id] = (resume_hash, vector_store)
+        _loaded_indexes.move_to_end(user_id)
+        while len(_loaded_indexes) > config.get_resume_index_cache_max_users():
+            _loaded_indexes.popitem(last=False)
+    return vector_store
+
+
+def create_embedding_cache():
+    """
+    Opens the shared on-disk embedding cache.
+
+    Returns:
+        DiskCache: Cache used by CachedEmbeddings.
+    """
+    return DiskCache(os.path.join(config.get_cache_dir(), "embeddings.sqlite3"),
+                     table="embeddings",
+                     max_entries=config.get_embedding_cache_max_entries())
+
+
+def create_index_store():
+    """
+    Returns the default store for per-user resume indexes.
+    """
+    return LocalIndexStore(os.path.join(config.get_cache_dir(), "resume_indexes"))
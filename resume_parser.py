@@ -1,30 +1,32 @@
 # resume_parser.py
 
+import json
+import time
+
 import streamlit as st
-from firebase_admin import firestore
-import firebase_admin
-from firebase_admin import credentials
-from pdfminer.high_level import extract_text
-from docx import Document
 import yaml
-from openai import OpenAI
 import config
-import os
-
-# Initialize Firebase if not already initialized
-def initialize_firebase():
-    if not firebase_admin._apps:
-        try:
-            cred = credentials.Certificate(config.get_firebase_config())
-            firebase_admin.initialize_app(cred)
-        except ValueError:
-            pass  # App already initialized
-
-initialize_firebase()
-db = firestore.client()
-
-# Initialize OpenAI client
-client = OpenAI(api_key=config.get_openai_api_key())
+import job_queue
+import llm_cache
+import metering
+import metrics
+import repository
+import resources
+import resume_preparser
+import resume_schema
+import text_extraction
+from resume_schema import PARSE_SYSTEM_PROMPT, build_parse_prompt
+
+# Supports structured outputs (JSON schema response formats)
+PARSE_MODEL = "gpt-4o"
+
+# Completion limit for a parse; a response cut off at it is retried once
+# with the larger limit
+PARSE_MAX_TOKENS = 1500
+PARSE_RETRY_MAX_TOKENS = 4000
+
+# Seconds between status checks while a parsing job runs
+JOB_POLL_SECONDS = 1
 
 def extract_text_from_pdf(file):
     """
@@ -37,8 +39,8 @@ def extract_text_from_pdf(file):
         str: Extracted text from the PDF.
     """
     try:
-        text = extract_text(file)
-        return text
+        return text_extraction.extract_pdf_text(
+            file, **config.get_pdf_extraction_options())
     except Exception as e:
         st.error(f"Error extracting text from PDF: {str(e)}")
         return ""
@@ -54,182 +56,112 @@ def extract_text_from_docx(file):
         str: Extracted text from the DOCX.
     """
     try:
-        doc = Document(file)
-        full_text = "\n".join([para.text for para in doc.paragraphs])
-        return full_text
+        return text_extraction.extract_docx_text(file)
     except Exception as e:
         st.error(f"Error extracting text from DOCX: {str(e)}")
         return ""
 
-def parse_resume_with_openai(text):
+def parse_resume_with_openai(text, user_id=None):
     """
     Parses resume text into the specified YAML structure using OpenAI's API.
 
+    Errors are shown in the page; see parse_resume for the raising variant.
+
     Args:
         text (str): The extracted text from the resume.
 
     Returns:
         dict: Parsed resume data structured as per the YAML template.
     """
-    prompt = f"""
-    You are an AI assistant that extracts information from resumes and structures it into a predefined YAML format. Below is the extracted text from a resume. Please fill in the YAML template accurately based on the information provided.
-
-    Extracted Resume Text:
-    \"\"\"
-    {text}
-    \"\"\"
-
-    YAML Template:
-    ```yaml
-    personal_information:
-      name: "[Your Name]"
-      surname: "[Your Surname]"
-      date_of_birth: "[Your Date of Birth]"
-      country: "[Your Country]"
-      city: "[Your City]"
-      address: "[Your Address]"
-      phone_prefix: "[Your Phone Prefix]"
-      phone: "[Your Phone Number]"
-      email: "[Your Email Address]"
-      github: "[Your GitHub Profile URL]"
-      linkedin: "[Your LinkedIn Profile URL]"
-
-    education_details:
-      - education_level: "[Your Education Level]"
-        institution: "[Your Institution]"
-        field_of_study: "[Your Field of Study]"
-        final_evaluation_grade: "[Your Final Evaluation Grade]"
-        start_date: "[Start Date]"
-        year_of_completion: "[Year of Completion]"
-        exam:
-          exam_name_1: "[Grade]"
-          exam_name_2: "[Grade]"
-          exam_name_3: "[Grade]"
-          exam_name_4: "[Grade]"
-          exam_name_5: "[Grade]"
-          exam_name_6: "[Grade]"
-
-    experience_details:
-      - position: "[Your Position]"
-        company: "[Company Name]"
-        employment_period: "[Employment Period]"
-        location: "[Location]"
-        industry: "[Industry]"
-        key_responsibilities:
-          - responsibility_1: "[Responsibility Description]"
-          - responsibility_2: "[Responsibility Description]"
-          - responsibility_3: "[Responsibility Description]"
-        skills_acquired:
-          - "[Skill]"
-          - "[Skill]"
-          - "[Skill]"
-
-      - position: "[Your Position]"
-        company: "[Company Name]"
-        employment_period: "[Employment Period]"
-        location: "[Location]"
-        industry: "[Industry]"
-        key_responsibilities:
-          - responsibility_1: "[Responsibility Description]"
-          - responsibility_2: "[Responsibility Description]"
-          - responsibility_3: "[Responsibility Description]"
-        skills_acquired:
-          - "[Skill]"
-          - "[Skill]"
-          - "[Skill]"
-
-    projects:
-      - name: "[Project Name]"
-        description: "[Project Description]"
-        link: "[Project Link]"
-
-      - name: "[Project Name]"
-        description: "[Project Description]"
-        link: "[Project Link]"
-
-    achievements:
-      - name: "[Achievement Name]"
-        description: "[Achievement Description]"
-      - name: "[Achievement Name]"
-        description: "[Achievement Description]"
-
-    certifications:
-      - name: "[Certification Name]"
-        description: "[Certification Description]"
-      - name: "[Certification Name]"
-        description: "[Certification Description]"
-
-    languages:
-      - language: "[Language]"
-        proficiency: "[Proficiency Level]"
-      - language: "[Language]"
-        proficiency: "[Proficiency Level]"
-
-    interests:
-      - "[Interest]"
-      - "[Interest]"
-      - "[Interest]"
-
-    availability:
-      notice_period: "[Notice Period]"
-
-    salary_expectations:
-      salary_range_usd: "[Salary Range]"
-
-    self_identification:
-      gender: "[Gender]"
-      pronouns: "[Pronouns]"
-      veteran: "[Yes/No]"
-      disability: "[Yes/No]"
-      ethnicity: "[Ethnicity]"
-
-    legal_authorization:
-      eu_work_authorization: "[Yes/No]"
-      us_work_authorization: "[Yes/No]"
-      requires_us_visa: "[Yes/No]"
-      requires_us_sponsorship: "[Yes/No]"
-      requires_eu_visa: "[Yes/No]"
-      legally_allowed_to_work_in_eu: "[Yes/No]"
-      legally_allowed_to_work_in_us: "[Yes/No]"
-      requires_eu_sponsorship: "[Yes/No]"
-
-    work_preferences:
-      remote_work: "[Yes/No]"
-      in_person_work: "[Yes/No]"
-      open_to_relocation: "[Yes/No]"
-      willing_to_complete_assessments: "[Yes/No]"
-      willing_to_undergo_drug_tests: "[Yes/No]"
-      willing_to_undergo_background_checks: "[Yes/No]"
-    ```
-
-    Please ensure that the YAML syntax is correct. If certain fields are not present in the resume text, leave them as empty strings or omit them.
-
-    Output the YAML only without any additional text.
-    """
-
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that structures resume information into YAML format."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0,
-            max_tokens=1500
-        )
+        return parse_resume(text, user_id)
+    except Exception as e:
+        st.error(f"Error parsing resume with OpenAI: {str(e)}")
+        return {}
+
+def parse_resume(text, user_id=None):
+    """
+    Parses resume text into the structure of plain_text_resume.yaml.
 
-        yaml_output = response.choices[0].message.content
-        # Remove YAML markers if present
-        yaml_output = yaml_output.replace("```yaml", "").replace("```", "").strip()
+    A rule-based pre-parser fills everything it can first; only the sections
+    it could not resolve are sent to the LLM, and the LLM is skipped entirely
+    when nothing is left.
 
-        # Load YAML to ensure it's valid
-        parsed_yaml = yaml.safe_load(yaml_output)
+    Args:
+        text (str): The extracted text from the resume.
+        user_id (str, optional): User whose quota and usage the LLM call
+            counts against.
 
-        return parsed_yaml
+    Returns:
+        dict: Parsed resume data structured as per the YAML template.
 
-    except Exception as e:
-        st.error(f"Error parsing resume with OpenAI: {str(e)}")
-        return {}
+    Raises:
+        metering.QuotaExceeded: Before the LLM call, if the user's plan
+            allows no more usage.
+        ValueError: If the response is cut off even at
+            PARSE_RETRY_MAX_TOKENS, or empty.
+    """
+    resume_data, unresolved = resume_preparser.preparse_resume(text)
+    if not unresolved:
+        return resume_data
+
+    prompt = build_parse_prompt(unresolved)
+    params = {"temperature": 0, "max_tokens": PARSE_MAX_TOKENS,
+              "response_format": resume_schema.response_format(unresolved)}
+
+    # The call is deterministic (temperature 0), so identical resumes can
+    # reuse a previous response
+    response_cache = llm_cache.get_cache("resume_parser")
+    cache_key = llm_cache.make_key(
+        PARSE_MODEL, f"{PARSE_SYSTEM_PROMPT}\n{prompt}",
+        {**params, "response_format": resume_schema.schema_text(unresolved)})
+    json_output = response_cache.get(cache_key)
+
+    if json_output is None:
+        if user_id:
+            metering.check_quota(user_id)
+        messages = [
+            {"role": "system", "content": PARSE_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        gateway = resources.get_llm_gateway()
+        json_output, finish_reason = gateway.chat(
+            PARSE_MODEL, messages, user_id=user_id, with_finish_reason=True, **params)
+        if finish_reason == "length":
+            # Long resumes can need more than PARSE_MAX_TOKENS
+            metrics.increment("resume_parser.truncated")
+            json_output, finish_reason = gateway.chat(
+                PARSE_MODEL, messages, user_id=user_id, with_finish_reason=True,
+                **{**params, "max_tokens": PARSE_RETRY_MAX_TOKENS})
+        if user_id:
+            metering.record_resume_parse(user_id)
+        if finish_reason == "length":
+            raise ValueError(
+                f"The parsed resume was longer than {PARSE_RETRY_MAX_TOKENS} tokens "
+                "and was cut off. Try a shorter resume.")
+        if not json_output:
+            # Structured outputs return no content when the model refuses
+            raise ValueError("The model returned no parsed resume.")
+        # Only complete responses are cached
+        response_cache.set(cache_key, json_output)
+
+    parsed = json.loads(json_output)
+
+    for key in unresolved:
+        value = parsed.get(key)
+        if not value:
+            continue
+        if isinstance(value, dict) and isinstance(resume_data.get(key), dict):
+            # Keep fields the pre-parser already extracted reliably
+            value = {**value, **{field: found for field, found
+                                 in resume_data[key].items() if found}}
+        resume_data[key] = value
+
+    return resume_data
+
+@job_queue.handler("parse_resume")
+def parse_resume_job(payload):
+    return parse_resume(payload["text"], payload.get("user_id"))
 
 def upload_resume():
     """
@@ -268,24 +200,51 @@ def upload_resume():
             st.write(text[:2000] + ("..." if len(text) > 2000 else ""))  # Show first 2000 chars
 
         if st.button("Parse Resume"):
-            with st.spinner("Parsing resume..."):
-                parsed_data = parse_resume_with_openai(text)
-
-            if parsed_data:
-                st.subheader("Parsed Resume Data")
-                yaml_display = yaml.dump(parsed_data, sort_keys=False)
-                st.text_area("", yaml_display, height=600)
-
-                if st.button("Save Parsed Data"):
-                    try:
-                        user_id = st.session_state.user['uid']
-                        db.collection('users').document(user_id).set({
-                            'parsed_resume': parsed_data
-                        }, merge=True)
-                        st.success("Parsed resume data saved successfully!")
-                        st.balloons()  # Add a celebratory effect
-                        st.session_state.show_success = True
-                    except Exception as e:
-                        st.error(f"Error saving data to Firestore: {str(e)}")
-            else:
-                st.error("Failed to parse resume data.")
+            user_id = st.session_state.user['uid']
+            try:
+                metering.check_quota(user_id)
+            except metering.QuotaExceeded as e:
+                st.error(str(e))
+                return
+            # Parsed in the background so reruns (e.g. the Save button) and
+            # leaving the page don't discard the result
+            st.session_state.parse_job_id = job_queue.get_queue().enqueue(
+                "parse_resume", {"text": text, "user_id": user_id}, user_id=user_id)
+
+    show_parse_job()
+
+def show_parse_job():
+    """
+    Shows the status or result of the session's resume parsing job.
+    """
+    job_id = st.session_state.get('parse_job_id')
+    job = job_queue.get_queue().get(job_id) if job_id else None
+    if job is None:
+        return
+
+    if job['status'] in (job_queue.QUEUED, job_queue.RUNNING):
+        st.info("Parsing resume... You can leave this page and come back.")
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+    elif job['status'] == job_queue.FAILED:
+        st.error(f"Error parsing resume with OpenAI: {job['error']}")
+        return
+
+    parsed_data = job['result']
+    if parsed_data:
+        st.subheader("Parsed Resume Data")
+        yaml_display = yaml.dump(parsed_data, sort_keys=False)
+        st.text_area("", yaml_display, height=600)
+
+        if st.button("Save Parsed Data"):
+            try:
+                user_id = st.session_state.user['uid']
+                repository.save_parsed_resume(user_id, parsed_data)
+            except Exception as e:
+                st.error(f"Error saving data to Firestore: {str(e)}")
+                return
+            st.session_state.show_success = True
+            del st.session_state.parse_job_id
+            st.rerun()
+    else:
+        st.error("Failed to parse resume data.")
@@ -0,0 +1,302 @@
+# resume_preparser.py
+
+import os
+import re
+
+import yaml
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "plain_text_resume.yaml")
+
+# Section headers commonly found in resumes, mapped to plain_text_resume.yaml
+# keys. "skills" is not part of the template but is kept because the
+# document generator indexes it.
+SECTION_ALIASES = {
+    "experience_details": [
+        "experience", "work experience", "professional experience",
+        "employment", "employment history", "work history", "career history",
+    ],
+    "education_details": ["education", "academic background", "academics"],
+    "projects": ["projects", "personal projects", "selected projects"],
+    "achievements": ["achievements", "awards", "honors", "honours",
+                     "accomplishments", "awards and honors"],
+    "certifications": ["certifications", "certificates", "licenses",
+                       "licenses and certifications", "certifications and licenses"],
+    "languages": ["languages", "language skills"],
+    "interests": ["interests", "hobbies", "hobbies and interests"],
+    "skills": ["skills", "technical skills", "core competencies", "key skills",
+               "skills and tools", "technologies"],
+    "availability": ["availability", "notice period"],
+    "salary_expectations": ["salary expectations", "salary"],
+    "legal_authorization": ["work authorization", "legal authorization",
+                            "visa status"],
+    "work_preferences": ["work preferences", "preferences"],
+    "summary": ["summary", "profile", "professional summary", "objective",
+                "about me"],
+}
+
+# Sections whose structure is too irregular for heuristics
+LLM_ONLY_SECTIONS = ("experience_details", "education_details", "availability",
+                     "salary_expectations", "legal_authorization",
+                     "work_preferences")
+
+# Lower-case words allowed in a title-case header, e.g. "Volunteering and Service"
+HEADER_SMALL_WORDS = ("and", "&", "of", "the", "for", "in", "to")
+
+# More non-empty lines than this before the first header means resume
+# content, not just contact details, precedes it
+HEADER_MAX_LINES = 6
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"(\+\d{1,3})?[\s.-]?\(?\d{2,4}\)?(?:[\s.-]?\d{2,4}){2,3}")
+URL_RE = re.compile(r"(?:https?://)?(?:www\.)?[\w-]+(?:\.[\w-]+)+(?:/[^\s,;|]*)?")
+GITHUB_RE = re.compile(r"(?:https?://)?(?:www\.)?github\.com/[\w.-]+", re.IGNORECASE)
+LINKEDIN_RE = re.compile(r"(?:https?://)?(?:[\w]+\.)?linkedin\.com/in/[\w.%-]+/?",
+                         re.IGNORECASE)
+BULLET_RE = re.compile(r"^\s*(?:[-•*▪●◦‣·]|\d+[.)])\s*")
+LANGUAGE_LEVEL_RE = re.compile(r"^(?P<language>[^(:\-–]+?)\s*(?:[(:\-–]\s*(?P<level>[^)]+)\)?)?$")
+
+_ALIAS_TO_SECTION = {alias: section
+                     for section, aliases in SECTION_ALIASES.items()
+                     for alias in aliases}
+
+
+def load_template():
+    """
+    Loads the resume schema from plain_text_resume.yaml.
+
+    Returns:
+        dict: The template with placeholder values.
+    """
+    with open(TEMPLATE_PATH) as f:
+        return yaml.safe_load(f)
+
+
+def empty_resume(template=None):
+    """
+    Builds an empty resume following the template's structure.
+
+    Mapping sections get empty-string fields and list sections empty lists.
+    """
+    template = template or load_template()
+    resume = {}
+    for key, value in template.items():
+        if isinstance(value, dict):
+            resume[key] = {field: "" for field in value}
+        else:
+            resume[key] = []
+    return resume
+
+
+def _header_section(line):
+    normalized = re.sub(r"[^a-z& ]", "", line.lower()).replace("&", "and").strip()
+    if not normalized or len(normalized.split()) > 4:
+        return None
+    return _ALIAS_TO_SECTION.get(normalized)
+
+
+def _looks_like_header(line, after_blank):
+    """
+    Returns whether a line that isn't a known header still looks like one:
+    a short line without digits or sentence punctuation that is upper case,
+    ends with a colon, or (after a blank line) is in title case.
+    """
+    if BULLET_RE.match(line):
+        return False
+    stripped = line.strip()
+    text = stripped.rstrip(":").strip()
+    words = text.split()
+    if not 1 <= len(words) <= 4 or re.search(r"[\d.,;|@/()]", text):
+        return False
+    if stripped.endswith(":") or text.isupper():
+        return True
+    return after_blank and all(word[0].isupper() or word.lower() in HEADER_SMALL_WORDS
+                               for word in words)
+
+
+def split_sections(text):
+    """
+    Splits resume text on section headers.
+
+    Args:
+        text (str): Raw resume text.
+
+    Returns:
+        dict: Section key to the text under that header. Text before the
+        first header is stored under "header", and text under headers that
+        look like headers but aren't in SECTION_ALIASES (kept with their
+        header line) under "other".
+    """
+    sections = {"header": []}
+    current = "header"
+    after_blank = True
+    for line in text.splitlines():
+        section = _header_section(line)
+        if section:
+            current = section
+            sections.setdefault(current, [])
+        elif current != "header" and _looks_like_header(line, after_blank):
+            current = "other"
+            sections.setdefault(current, []).append(line)
+        else:
+            sections[current].append(line)
+        after_blank = not line.strip()
+    return {key: "\n".join(lines).strip() for key, lines in sections.items()}
+
+
+def _items(section_text):
+    """
+    Splits a list-like section into items, by bullet/line and then commas.
+    """
+    items = []
+    for line in section_text.splitlines():
+        line = BULLET_RE.sub("", line).strip()
+        if not line:
+            continue
+        if "," in line and len(line) < 200:
+            items.extend(part.strip() for part in line.split(",") if part.strip())
+        else:
+            items.append(line)
+    return items
+
+
+def _parse_personal_information(header_text, full_text):
+    info = {}
+    email = EMAIL_RE.search(full_text)
+    if email:
+        info["email"] = email.group(0)
+
+    github = GITHUB_RE.search(full_text)
+    if github:
+        info["github"] = github.group(0)
+    linkedin = LINKEDIN_RE.search(full_text)
+    if linkedin:
+        info["linkedin"] = linkedin.group(0)
+
+    # Strip emails and URLs first so their digits aren't taken for a phone
+    contact_text = URL_RE.sub(" ", EMAIL_RE.sub(" ", header_text or full_text[:1000]))
+    for match in PHONE_RE.finditer(contact_text):
+        digits = re.sub(r"\D", "", match.group(0))
+        if 7 <= len(digits) <= 15:
+            if match.group(1):
+                info["phone_prefix"] = match.group(1)
+                info["phone"] = match.group(0)[len(match.group(1)):].strip(" .-")
+            else:
+                info["phone"] = match.group(0).strip(" .-")
+            break
+
+    for line in (header_text or full_text).splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        words = line.split()
+        if 2 <= len(words) <= 4 and all(re.fullmatch(r"[A-Za-zÀ-ÿ'.-]+", w) for w in words):
+            info["name"] = words[0]
+            info["surname"] = " ".join(words[1:])
+        break
+    return info
+
+
+def _parse_languages(section_text):
+    languages = []
+    for item in _items(section_text):
+        match = LANGUAGE_LEVEL_RE.match(item)
+        if match:
+            languages.append({"language": match.group("language").strip(),
+                              "proficiency": (match.group("level") or "").strip()})
+    return languages
+
+
+def _parse_named_items(section_text):
+    entries = []
+    for line in section_text.splitlines():
+        line = BULLET_RE.sub("", line).strip()
+        if not line:
+            continue
+        separator = re.search(r"\s[-–—:]\s", line)
+        if separator:
+            name, description = line[:separator.start()], line[separator.end():]
+        else:
+            name, description = line, ""
+        entries.append({"name": name.strip(), "description": description.strip()})
+    return entries
+
+
+def _parse_projects(section_text):
+    projects = []
+    for entry in _parse_named_items(section_text):
+        link = URL_RE.search(entry["name"] + " " + entry["description"])
+        entry["link"] = link.group(0) if link and "." in link.group(0) else ""
+        projects.append(entry)
+    return projects
+
+
+def preparse_resume(text):
+    """
+    Extracts what can be reliably extracted from resume text without an LLM.
+
+    Contact details, languages, interests, certifications, achievements,
+    projects, skills and the summary are parsed with regexes and
+    heuristics. Sections whose structure needs an LLM (experience,
+    education, ...) or that the heuristics could not parse are returned as
+    unresolved, with only the text under their header.
+
+    The resume must be fully covered by recognized headers for that: if
+    experience isn't under one, or there is text under an unrecognized
+    header (or a long preamble before the first header), every template
+    section not parsed under its own header is unresolved with the full
+    text. The LLM is skipped only when every section was parsed.
+
+    Args:
+        text (str): Raw resume text.
+
+    Returns:
+        tuple: (resume_data, unresolved) where resume_data follows
+        plain_text_resume.yaml and unresolved maps section keys to the text
+        the LLM needs to fill them.
+    """
+    template = load_template()
+    resume_data = empty_resume(template)
+    sections = split_sections(text)
+    unresolved = {}
+    parsed_sections = set()
+
+    personal_information = _parse_personal_information(sections.get("header", ""), text)
+    resume_data["personal_information"].update(personal_information)
+    if "name" in personal_information and "email" in personal_information:
+        parsed_sections.add("personal_information")
+    else:
+        unresolved["personal_information"] = sections.get("header") or text[:1000]
+
+    parsers = {
+        "languages": _parse_languages,
+        "interests": _items,
+        "certifications": _parse_named_items,
+        "achievements": _parse_named_items,
+        "projects": _parse_projects,
+    }
+    for key, section_text in sections.items():
+        if not section_text or key in ("header", "other"):
+            continue
+        if key == "summary":
+            resume_data["summary"] = [re.sub(r"\s+", " ", section_text)]
+        elif key == "skills":
+            resume_data["skills"] = _items(section_text)
+        elif key in LLM_ONLY_SECTIONS:
+            unresolved[key] = section_text
+        elif key in parsers:
+            parsed = parsers[key](section_text)
+            if parsed:
+                resume_data[key] = parsed
+                parsed_sections.add(key)
+            else:
+                unresolved[key] = section_text
+
+    header_lines = [line for line in sections.get("header", "").splitlines() if line.strip()]
+    covered = ("experience_details" in sections and not sections.get("other")
+               and len(header_lines) <= HEADER_MAX_LINES)
+    if not covered:
+        # Sections may be hiding under headers the splitter didn't know
+        unresolved = {key: text for key in template if key not in parsed_sections}
+
+    return resume_data, unresolved
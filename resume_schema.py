@@ -0,0 +1,141 @@
+# resume_schema.py
+"""
+JSON schema for resume parsing, generated from plain_text_resume.yaml.
+
+The YAML template stays the single description of the resume structure;
+this module turns it into a compact JSON schema that the parser sends as
+an OpenAI structured-output ``response_format``, along with the parse
+instructions. A complete response is JSON matching the schema, so no
+YAML/markdown clean-up is needed; one cut off at max_tokens is not.
+
+Structured outputs (strict mode) need every object to list all its
+properties as required and allow no others, so:
+
+* every leaf is a string (missing values come back as "");
+* a list is described by its first example item;
+* numbered keys, such as ``responsibility_1`` or ``exam_name_1``, become a
+  list of strings, which is also what resume_chunker accepts.
+"""
+
+import functools
+import json
+import re
+
+import resume_preparser
+
+SCHEMA_NAME = "resume"
+
+# Static instructions; they come first so requests share a cacheable prefix
+PARSE_SYSTEM_PROMPT = (
+    "Extract information from the resume text into JSON matching the response "
+    "schema. Use only facts stated in the text, keeping its wording. Use \"\" "
+    "or [] for anything not present.")
+
+_NUMBERED_KEY = re.compile(r"^(.+)_\d+$")
+
+
+def _numbered_stem(value):
+    """
+    Returns the shared stem if every key of a mapping is ``<stem>_<n>``.
+    """
+    if not isinstance(value, dict) or not value:
+        return None
+    matches = [_NUMBERED_KEY.match(key) for key in value]
+    if not all(matches):
+        return None
+    stems = {match.group(1) for match in matches}
+    return stems.pop() if len(stems) == 1 else None
+
+
+def _placeholder(value):
+    return str(value).strip("[] ").lower()
+
+
+def _string_list(mapping=None):
+    schema = {"type": "array", "items": {"type": "string"}}
+    if mapping:
+        # e.g. {exam_name_1: "[Grade]"} -> "<exam name>: <grade>" items, so
+        # the key's meaning isn't lost
+        stem = _numbered_stem(mapping).replace("_", " ")
+        schema["description"] = f"'<{stem}>: <{_placeholder(next(iter(mapping.values())))}>' per item"
+    return schema
+
+
+def _schema_for(value):
+    if _numbered_stem(value):
+        return _string_list(value)
+    if isinstance(value, dict):
+        return _object_schema(value)
+    if isinstance(value, list):
+        first = value[0] if value else ""
+        if _numbered_stem(first):
+            # e.g. [{responsibility_1: ...}, {responsibility_2: ...}]
+            return _string_list()
+        return {"type": "array", "items": _schema_for(first)}
+    return {"type": "string"}
+
+
+def _object_schema(mapping):
+    return {
+        "type": "object",
+        "properties": {key: _schema_for(value) for key, value in mapping.items()},
+        "required": list(mapping),
+        "additionalProperties": False,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _template():
+    return resume_preparser.load_template()
+
+
+def resume_schema(sections=None):
+    """
+    Returns the JSON schema for the given resume sections.
+
+    Args:
+        sections (iterable, optional): Top-level template keys to include,
+            in template order. Defaults to all of them.
+
+    Returns:
+        dict: A strict-mode JSON schema.
+    """
+    template = _template()
+    wanted = set(template if sections is None else sections)
+    return _object_schema({key: value for key, value in template.items() if key in wanted})
+
+
+def response_format(sections=None):
+    """
+    Returns the ``response_format`` request parameter for the sections.
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": SCHEMA_NAME, "strict": True,
+                        "schema": resume_schema(sections)},
+    }
+
+
+def schema_text(sections=None):
+    """
+    Returns the schema as compact JSON, e.g. for cache keys and token counts.
+    """
+    return json.dumps(resume_schema(sections), separators=(",", ":"))
+
+
+def build_parse_prompt(unresolved):
+    """
+    Builds the user message for the resume sections the pre-parser left open.
+
+    Only the text found under those sections' headers is included; which
+    fields to fill is given by the response schema.
+
+    Args:
+        unresolved (dict): Section keys mapped to their resume text.
+
+    Returns:
+        str: The resume text to parse.
+    """
+    # Several sections may share the same source text (e.g. the whole resume
+    # when it has no recognizable headers)
+    return "Resume text:\n" + "\n\n".join(dict.fromkeys(unresolved.values()))
@@ -0,0 +1,120 @@
+# server.py
+"""
+HTTP endpoints that run alongside the Streamlit app.
+
+    POST /stripe/webhook    Stripe events (checkout and subscription changes)
+    POST /api/jobs          Job postings sent by the browser extension
+    GET  /session/start     Sets the session cookie for a new sign-in
+    GET  /session/end       Revokes the session and clears its cookie
+
+Run with:
+    python server.py [--port 8000]
+or behind a WSGI server, e.g. ``gunicorn server:app``.
+"""
+
+import argparse
+
+from flask import Flask, jsonify, redirect, request
+
+import config
+import identity
+import job_ingest
+import resources
+import subscriptions
+
+app = Flask(__name__)
+
+# Job posting fields sent by the extension (see extension/content.js)
+POSTING_FIELDS = ('jobTitle', 'company', 'location', 'url', 'description')
+
+
+@app.post('/stripe/webhook')
+def stripe_webhook():
+    """
+    Verifies a Stripe webhook's signature and applies the event.
+    """
+    stripe = resources.get_stripe()
+    try:
+        event = stripe.Webhook.construct_event(
+            request.get_data(), request.headers.get('Stripe-Signature', ''),
+            config.get_stripe_webhook_secret())
+    except ValueError:
+        return jsonify(error='Invalid payload'), 400
+    except stripe.error.SignatureVerificationError:
+        return jsonify(error='Invalid signature'), 400
+
+    subscriptions.apply_stripe_event(event)
+    return jsonify(received=True)
+
+
+@app.post('/api/jobs')
+def ingest_job():
+    """
+    Accepts a job posting from the browser extension, authenticated with
+    the user's extension key as a bearer token.
+
+    Responds 201 for a new posting and 200 for one already sent.
+    """
+    authorization = request.headers.get('Authorization', '')
+    user_id = identity.read_extension_key(authorization.removeprefix('Bearer ').strip())
+    if not user_id:
+        return jsonify(error='Invalid extension key'), 401
+
+    details = request.get_json(silent=True)
+    if not isinstance(details, dict):
+        return jsonify(error='Expected a JSON object'), 400
+    if any(not isinstance(details.get(field), (str, type(None))) for field in POSTING_FIELDS):
+        return jsonify(error='Posting fields must be strings'), 400
+    if not (details.get('description') or '').strip():
+        return jsonify(error='A job description is required'), 400
+
+    result = job_ingest.ingest_posting(user_id, details)
+    return jsonify(result), 200 if result['duplicate'] else 201
+
+
+def _back_to_app():
+    return redirect(config.get_redirect_uri())
+
+
+@app.get('/session/start')
+def start_session():
+    """
+    Redeems the one-time code the app issued at sign-in and stores the
+    session ID in an HttpOnly cookie, then returns to the app.
+    """
+    session_id = identity.redeem_handoff(request.args.get('code', ''))
+    response = _back_to_app()
+    if session_id:
+        response.set_cookie(
+            identity.SESSION_COOKIE, session_id,
+            max_age=config.get_session_cookie_max_age(), path='/', httponly=True,
+            secure=config.get_redirect_uri().startswith('https'), samesite='Strict')
+    return response
+
+
+@app.get('/session/end')
+def end_session():
+    """
+    Revokes the session named by the cookie, if any, and deletes the
+    cookie.
+    """
+    session_id = request.cookies.get(identity.SESSION_COOKIE)
+    if session_id:
+        identity.revoke_session(session_id)
+    response = _back_to_app()
+    response.delete_cookie(identity.SESSION_COOKIE, path='/', httponly=True,
+                           secure=config.get_redirect_uri().startswith('https'),
+                           samesite='Strict')
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the HTTP endpoints.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    app.run(host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# subscriptions.py
+"""
+Locally stored subscription state, kept current by Stripe webhooks.
+
+Each user's subscription lives in ``users/{uid}/meta/subscription`` and is
+written by the webhook receiver (see server.py) whenever Stripe reports a
+checkout or subscription change. Plan checks read it through a short
+in-process TTL cache, so gating a feature is a dictionary lookup rather
+than Stripe API calls. State older than SUBSCRIPTION_SYNC_SECONDS (e.g.
+when webhooks were missed) is refreshed from the Stripe API.
+"""
+
+import threading
+import time
+
+from firebase_admin import firestore
+
+import config
+import metrics
+import repository
+import resources
+
+FREE_PLAN = 'Free'
+ACTIVE_STATUSES = ('active', 'trialing')
+SUBSCRIPTION_EVENTS = ('customer.subscription.created',
+                       'customer.subscription.updated',
+                       'customer.subscription.deleted')
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def subscription_ref(db, user_id):
+    return (db.collection('users').document(user_id)
+            .collection('meta').document('subscription'))
+
+
+def _cache_put(user_id, state):
+    with _cache_lock:
+        _cache[user_id] = (time.monotonic(), state)
+
+
+def invalidate(user_id):
+    """
+    Forgets this process's cached state for a user.
+    """
+    with _cache_lock:
+        _cache.pop(user_id, None)
+
+
+def get_subscription(user_id):
+    """
+    Returns a user's subscription state.
+
+    Served from memory for SUBSCRIPTION_CACHE_SECONDS, then from the stored
+    document, and from the Stripe API only when the stored state is older
+    than SUBSCRIPTION_SYNC_SECONDS.
+
+    Returns:
+        dict: plan, status, stripe_customer_id, stripe_subscription_id,
+        current_period_end and synced_at (any of which may be missing).
+    """
+    with _cache_lock:
+        cached = _cache.get(user_id)
+    if cached and time.monotonic() - cached[0] < config.get_subscription_cache_seconds():
+        metrics.increment('subscriptions.cache_hits')
+        return cached[1]
+
+    snapshot = subscription_ref(resources.get_db(), user_id).get()
+    repository.record_reads()
+    state = snapshot.to_dict() if snapshot.exists else {}
+
+    if time.time() - state.get('synced_at', 0) > config.get_subscription_sync_seconds():
+        state = refresh_from_stripe(user_id, state)
+
+    _cache_put(user_id, state)
+    return state
+
+
+def is_active(user_id):
+    return get_subscription(user_id).get('status') in ACTIVE_STATUSES
+
+
+def get_plan(user_id):
+    """
+    Returns the plan the user has paid for ("Free" without an active
+    subscription).
+    """
+    state = get_subscription(user_id)
+    if state.get('status') in ACTIVE_STATUSES:
+        return state.get('plan') or FREE_PLAN
+    return FREE_PLAN
+
+
+def _store(user_id, updates):
+    db = resources.get_db()
+    subscription_ref(db, user_id).set(updates, merge=True)
+    repository.record_writes()
+
+
+def refresh_from_stripe(user_id, state):
+    """
+    Re-reads a user's latest subscription from the Stripe API and stores it.
+
+    The refresh counts as an event created when Stripe was asked, so a
+    webhook event applied meanwhile is kept, and older events arriving
+    later are ignored. If Stripe can't be reached, the stored state is
+    used as it is.
+
+    Returns:
+        dict: The updated state.
+    """
+    customer_id = state.get('stripe_customer_id') or repository.get_stripe_customer_id(user_id)
+    if not customer_id:
+        updates = {'synced_at': time.time()}
+        _store(user_id, updates)
+        return {**state, **updates}
+
+    metrics.increment('subscriptions.api_refreshes')
+    stripe = resources.get_stripe()
+    requested_at = int(time.time())
+    try:
+        subscriptions = stripe.Subscription.list(customer=customer_id, status='all', limit=1)
+    except stripe.error.StripeError:
+        metrics.increment('subscriptions.api_errors')
+        return state
+
+    updates = {'stripe_customer_id': customer_id, 'event_created': requested_at}
+    if subscriptions.data:
+        updates.update(_subscription_fields(subscriptions.data[0]))
+
+    db = resources.get_db()
+    ref = subscription_ref(db, user_id)
+
+    @firestore.transactional
+    def write(transaction):
+        snapshot = ref.get(transaction=transaction)
+        stored = snapshot.to_dict() if snapshot.exists else {}
+        if stored.get('event_created', 0) >= requested_at:
+            # A webhook event at least as new as the API response won
+            return stored
+        refreshed = {**stored, **updates, 'synced_at': time.time()}
+        transaction.set(ref, refreshed)
+        return refreshed
+
+    refreshed = write(db.transaction())
+    repository.record_reads()
+    repository.record_writes()
+    return refreshed
+
+
+def _subscription_fields(subscription):
+    metadata = subscription.get('metadata') or {}
+    fields = {
+        'status': subscription['status'],
+        'stripe_subscription_id': subscription['id'],
+        'current_period_end': subscription.get('current_period_end'),
+    }
+    if metadata.get('plan'):
+        fields['plan'] = metadata['plan']
+    return fields
+
+
+def _user_for_customer(customer_id):
+    users = (resources.get_db().collection('users')
+             .where(filter=firestore.FieldFilter('stripe_customer_id', '==', customer_id))
+             .limit(1).get())
+    repository.record_reads()
+    return users[0].id if users else None
+
+
+def apply_stripe_event(event):
+    """
+    Updates stored subscription state from a verified Stripe webhook event.
+
+    Events may arrive out of order or more than once; an event older than
+    the last one applied to the user is ignored.
+
+    Args:
+        event (stripe.Event): The event passed to the webhook endpoint.
+
+    Returns:
+        str or None: The affected user's ID, or None if the event was ignored.
+    """
+    data = event['data']['object']
+    if event['type'] == 'checkout.session.completed':
+        user_id = data.get('client_reference_id') or (data.get('metadata') or {}).get('user_id')
+        updates = {'stripe_customer_id': data.get('customer')}
+        if data.get('subscription'):
+            updates['stripe_subscription_id'] = data['subscription']
+        if (data.get('metadata') or {}).get('plan'):
+            updates['plan'] = data['metadata']['plan']
+        if data.get('payment_status') == 'paid':
+            updates['status'] = 'active'
+    elif event['type'] in SUBSCRIPTION_EVENTS:
+        user_id = ((data.get('metadata') or {}).get('user_id')
+                   or _user_for_customer(data.get('customer')))
+        updates = {'stripe_customer_id': data.get('customer'),
+                   **_subscription_fields(data)}
+    else:
+        return None
+
+    if not user_id:
+        metrics.increment('subscriptions.unmatched_events')
+        return None
+
+    db = resources.get_db()
+    ref = subscription_ref(db, user_id)
+
+    @firestore.transactional
+    def write(transaction):
+        snapshot = ref.get(transaction=transaction)
+        stored = snapshot.to_dict() if snapshot.exists else {}
+        if stored.get('event_created', 0) > event['created']:
+            return None
+        state = {**stored, **updates, 'event_created': event['created'],
+                 'synced_at': time.time()}
+        transaction.set(ref, state)
+        return state
+
+    state = write(db.transaction())
+    repository.record_reads()
+    repository.record_writes()
+    if state is None:
+        metrics.increment('subscriptions.stale_events')
+        return None
+
+    if updates.get('stripe_customer_id'):
+        # Lets later subscription events without metadata find the user
+        db.collection('users').document(user_id).set(
+            {'stripe_customer_id': updates['stripe_customer_id']}, merge=True)
+        repository.record_writes()
+    _cache_put(user_id, state)
+    metrics.increment('subscriptions.events_applied')
+    return user_id
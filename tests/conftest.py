@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+# config raises on import without a project ID
+os.environ.setdefault("FIREBASE_PROJECT_ID", "test")
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    import metrics
+
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """
+    An in-memory Firestore (benchmarks/fake_firestore.py) used by the app.
+    """
+    from firebase_admin import firestore
+
+    import fake_firestore
+    import resources
+
+    fake = fake_firestore.FakeFirestore()
+    monkeypatch.setattr(resources, "get_db", lambda: fake)
+    monkeypatch.setattr(firestore, "transactional", fake_firestore.transactional)
+    return fake
+
+
+@pytest.fixture
+def stripe_server(monkeypatch):
+    """
+    A local Stripe API (benchmarks/fake_stripe.py) the app is pointed at.
+    """
+    from fake_stripe import start_server
+
+    import resources
+
+    server = start_server(latency=0)
+    monkeypatch.setenv("STRIPE_API_KEY", "sk_test_fake")
+    monkeypatch.setenv("STRIPE_API_BASE", server.api_base)
+    # get_stripe configures the module once per process
+    resources.get_stripe.cache_clear()
+    yield server
+    resources.get_stripe.cache_clear()
+    server.shutdown()
@@ -0,0 +1,67 @@
+"""
+Grouping of duplicate and near-duplicate postings in a batch.
+"""
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+import batch_generation  # noqa: E402
+
+
+def jobs(*descriptions):
+    return [{"title": "Job", "description": description} for description in descriptions]
+
+
+def test_only_equal_descriptions_are_duplicates():
+    batch = jobs("Python developer", " Python\n  developer ", "Python developer, remote")
+
+    assert batch_generation.group_duplicates(batch) == [None, 0, None]
+
+
+def test_near_duplicates_share_retrieval_only():
+    vectors = [[1.0, 0.0], [1.0, 0.0], [0.99, 0.01], [0.0, 1.0]]
+    duplicate_of = [None, 0, None, None]
+
+    similar_to = batch_generation.group_similar(vectors, 0.95, duplicate_of)
+
+    # The exact duplicate reuses documents; the near-duplicate is generated
+    # with the first posting's retrieval
+    assert similar_to == [None, None, 0, None]
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.payloads = []
+
+    def enqueue(self, kind, payload, user_id=None):
+        self.payloads.append(payload)
+        return f"job-{len(self.payloads)}"
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_response_cache_follows_the_users_choice(monkeypatch, use_cache):
+    import ai_generator
+    import job_queue
+    import metering
+    import resources
+
+    class Embeddings:
+        def embed_documents(self, texts):
+            return [[float(index), 1.0] for index, _ in enumerate(texts)]
+
+    lookups = []
+    queue = RecordingQueue()
+    monkeypatch.setattr(resources, "get_embeddings", lambda: Embeddings())
+    monkeypatch.setattr(ai_generator, "get_cached_documents",
+                        lambda resume_data, description: lookups.append(description))
+    monkeypatch.setattr(ai_generator, "create_resume_index", lambda resume_data, user_id: None)
+    monkeypatch.setattr(ai_generator, "retrieve_relevant_text", lambda index, vector: "")
+    monkeypatch.setattr(metering, "check_quota", lambda user_id, applications=1: None)
+    monkeypatch.setattr(job_queue, "get_queue", lambda: queue)
+
+    batch_generation.submit_batch({}, jobs("Python developer", "Go developer"), "user-1",
+                                  use_cache=use_cache)
+
+    assert len(lookups) == (2 if use_cache else 0)
+    assert [payload["use_cache"] for payload in queue.payloads] == [use_cache, use_cache]
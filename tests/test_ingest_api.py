@@ -0,0 +1,79 @@
+"""
+Extension keys and request validation of the ingestion API.
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("flask")
+
+import identity  # noqa: E402
+
+USER_ID = "user-1"
+POSTING = {"jobTitle": "Engineer", "company": "Acme", "description": "Build things."}
+
+
+@pytest.fixture(autouse=True)
+def extension_secret(monkeypatch):
+    monkeypatch.setenv("EXTENSION_KEY_SECRET", "extension-secret")
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    import job_ingest
+    import server
+
+    monkeypatch.setattr(job_ingest, "ingest_posting",
+                        lambda user_id, details: {"duplicate": False, "user_id": user_id})
+    return server.app.test_client()
+
+
+def post(client, key, body):
+    return client.post("/api/jobs", json=body, headers={"Authorization": f"Bearer {key}"})
+
+
+def test_accepts_a_current_key(client):
+    response = post(client, identity.issue_extension_key(USER_ID), POSTING)
+
+    assert response.status_code == 201
+    assert response.get_json()["user_id"] == USER_ID
+
+
+def test_new_and_revoked_keys_invalidate_earlier_ones(client):
+    first = identity.issue_extension_key(USER_ID)
+    second = identity.issue_extension_key(USER_ID)
+
+    assert post(client, first, POSTING).status_code == 401
+    assert post(client, second, POSTING).status_code == 201
+
+    identity.revoke_extension_keys(USER_ID)
+    assert post(client, second, POSTING).status_code == 401
+
+
+def test_rejects_expired_keys(client, monkeypatch):
+    key = identity.issue_extension_key(USER_ID)
+    monkeypatch.setattr(time, "time", lambda: 2 ** 40)
+
+    assert post(client, key, POSTING).status_code == 401
+
+
+def test_keys_are_signed_with_their_own_secret(client, monkeypatch):
+    key = identity.issue_extension_key(USER_ID)
+    monkeypatch.setenv("EXTENSION_KEY_SECRET", "rotated")
+
+    assert post(client, key, POSTING).status_code == 401
+
+
+@pytest.mark.parametrize("body", [[], "text", 5, {"description": ["a"]},
+                                  {"description": "x", "company": {"name": "Acme"}}])
+def test_rejects_malformed_postings(client, body):
+    response = post(client, identity.issue_extension_key(USER_ID), body)
+
+    assert response.status_code == 400
+
+
+def test_requires_a_description(client):
+    response = post(client, identity.issue_extension_key(USER_ID), {"jobTitle": "Engineer"})
+
+    assert response.status_code == 400
@@ -0,0 +1,107 @@
+"""
+Job queue attempt limits, worker ownership, charge markers and retention.
+"""
+
+import time
+
+import job_queue
+
+
+def make_queue(tmp_path):
+    return job_queue.JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def expire_running(queue):
+    with queue._lock:
+        queue._conn.execute("UPDATE jobs SET started_at = ? WHERE status = ?",
+                            (time.time() - job_queue.STALE_JOB_SECONDS - 1,
+                             job_queue.RUNNING))
+
+
+def test_stale_jobs_are_retried_then_failed(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue("slow", {})
+
+    for attempt in range(1, job_queue.MAX_ATTEMPTS + 1):
+        job = queue.claim("worker")
+        assert job["id"] == job_id
+        assert job["attempts"] == attempt
+        expire_running(queue)
+
+    assert queue.claim("worker") is None
+    job = queue.get(job_id)
+    assert job["status"] == job_queue.FAILED
+    assert "attempts" in job["error"]
+
+
+def test_prune_deletes_only_old_finished_jobs(tmp_path):
+    queue = make_queue(tmp_path)
+    old_id = queue.enqueue("kind", {"resume_data": "..."})
+    queue.complete(queue.claim("worker")["id"], {"ok": True})
+    with queue._lock:
+        queue._conn.execute("UPDATE jobs SET finished_at = ? WHERE id = ?",
+                            (time.time() - 3600, old_id))
+    recent_id = queue.enqueue("kind", {})
+    queue.fail(queue.claim("worker")["id"], "error")
+    queued_id = queue.enqueue("kind", {})
+
+    assert queue.prune(max_age=60) == 1
+    assert queue.get(old_id) is None
+    assert queue.get(recent_id)["status"] == job_queue.FAILED
+    assert queue.get(queued_id)["status"] == job_queue.QUEUED
+
+
+def test_adds_attempts_to_existing_databases(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "jobs.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, user_id TEXT, "
+        "payload TEXT NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT, "
+        "worker TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL)")
+    conn.commit()
+    conn.close()
+
+    queue = job_queue.JobQueue(path)
+    job_id = queue.enqueue("kind", {})
+    assert queue.claim("worker")["attempts"] == 1
+    assert queue.mark_charged(job_id)
+
+
+def test_only_the_current_worker_finishes_a_job(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue("slow", {})
+    queue.claim("stalled")
+    expire_running(queue)
+    queue.claim("rerun")
+
+    assert not queue.complete(job_id, {"from": "stalled"}, worker_id="stalled")
+    assert queue.complete(job_id, {"from": "rerun"}, worker_id="rerun")
+    assert not queue.fail(job_id, "late", worker_id="rerun")
+    assert queue.get(job_id)["result"] == {"from": "rerun"}
+
+
+def test_reruns_are_charged_once(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    charges = []
+
+    def charging(payload):
+        running_queue, job = job_queue.current_job()
+        if running_queue.mark_charged(job["id"]):
+            charges.append(job["id"])
+        return job["attempts"]
+
+    monkeypatch.setitem(job_queue._handlers, "charging", charging)
+    job_id = queue.enqueue("charging", {})
+    stalled = queue.claim("stalled")
+    # The first attempt charges, then its worker stops responding
+    job_queue._current.job = (queue, stalled)
+    charging(stalled["payload"])
+    job_queue._current.job = None
+    expire_running(queue)
+    job_queue.run_job(queue, queue.claim("rerun"))
+
+    assert charges == [job_id]
+    assert queue.get(job_id)["result"] == 2
+    assert job_queue.current_job() is None
@@ -0,0 +1,173 @@
+"""
+LLM gateway behaviour against the local fake OpenAI server.
+"""
+
+import threading
+import time
+
+import pytest
+
+openai = pytest.importorskip("openai")
+
+import llm_gateway  # noqa: E402
+import metrics  # noqa: E402
+from fake_openai import start_server  # noqa: E402
+
+MODEL = "gpt-4"
+MESSAGES = [{"role": "user", "content": "Write one sentence."}]
+
+
+@pytest.fixture
+def server():
+    server = start_server(latency=0.01, rpm=0)
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "BACKOFF_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(llm_gateway, "BACKOFF_MAX_SECONDS", 0.05)
+    # One token per word keeps the reservations predictable
+    monkeypatch.setattr(llm_gateway, "_estimate_tokens", lambda text: len(text.split()))
+
+
+def make_gateway(server, rpm=10000, tpm=1000000):
+    client = openai.OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+    return llm_gateway.LLMGateway(client, {MODEL: {"rpm": rpm, "tpm": tpm}})
+
+
+def available_tokens(gateway):
+    bucket = gateway._limiter(MODEL).tokens
+    with bucket._lock:
+        bucket._refill()
+        return bucket._tokens
+
+
+def test_bucket_throttles_once_capacity_is_used():
+    bucket = llm_gateway.TokenBucket(60)
+
+    assert all(bucket.reserve(1) == 0 for _ in range(60))
+    # One request per second refills, so the next one waits about a second
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+
+
+def test_requests_queue_instead_of_exceeding_rpm(server):
+    gateway = make_gateway(server, rpm=120)
+    requests = gateway._limiter(MODEL).requests
+    with requests._lock:
+        requests._tokens = 0
+        requests._updated = time.monotonic()
+
+    start = time.monotonic()
+    gateway.chat(MODEL, MESSAGES, max_tokens=5)
+
+    # The request waited for the empty bucket (2 per second) to refill
+    # rather than being sent
+    assert time.monotonic() - start >= 0.45
+    assert metrics.snapshot()[f"llm.queue_wait.{MODEL}"]["max"] >= 0.45
+    assert server.calls == 1
+
+
+def test_retries_rate_limited_requests(server):
+    gateway = make_gateway(server)
+    server.inject_errors(2, status=429)
+
+    assert gateway.chat(MODEL, MESSAGES, max_tokens=5)
+    assert server.rejected == 2
+    assert server.calls == 1
+    assert metrics.snapshot()[f"llm.retries.{MODEL}"] == 2
+
+
+def test_retries_server_errors(server):
+    gateway = make_gateway(server)
+    server.inject_errors(1, status=500)
+
+    assert gateway.chat(MODEL, MESSAGES, max_tokens=5)
+    assert metrics.snapshot()[f"llm.retries.{MODEL}"] == 1
+
+
+def test_honours_retry_after(server):
+    gateway = make_gateway(server)
+    server.inject_errors(1, status=429, retry_after=0.3)
+
+    start = time.monotonic()
+    gateway.chat(MODEL, MESSAGES, max_tokens=5)
+
+    assert time.monotonic() - start >= 0.3
+
+
+def test_gives_up_after_max_retries(server, monkeypatch):
+    monkeypatch.setattr(llm_gateway, "MAX_RETRIES", 2)
+    gateway = make_gateway(server)
+    server.inject_errors(5, status=429)
+
+    with pytest.raises(openai.RateLimitError):
+        gateway.chat(MODEL, MESSAGES, max_tokens=5)
+    assert server.rejected == 3
+    assert metrics.snapshot()[f"llm.errors.{MODEL}"] == 1
+
+
+def test_does_not_retry_client_errors(server):
+    gateway = make_gateway(server)
+    server.inject_errors(1, status=400)
+
+    with pytest.raises(openai.BadRequestError):
+        gateway.chat(MODEL, MESSAGES, max_tokens=5)
+    assert server.rejected == 1
+    assert f"llm.retries.{MODEL}" not in metrics.snapshot()
+
+
+def test_refunds_tokens_of_failed_calls(server):
+    gateway = make_gateway(server, tpm=1000)
+    server.inject_errors(1, status=400)
+
+    with pytest.raises(openai.BadRequestError):
+        gateway.chat(MODEL, MESSAGES, max_tokens=500)
+
+    assert available_tokens(gateway) == pytest.approx(1000, abs=1)
+
+
+def test_refunds_tokens_of_retried_attempts(server):
+    gateway = make_gateway(server, tpm=1000)
+    server.inject_errors(3, status=429)
+
+    gateway.chat(MODEL, MESSAGES, max_tokens=500)
+
+    # Only the successful attempt's actual usage stays reserved
+    usage_counters = metrics.snapshot()
+    used = (usage_counters[f"llm.prompt_tokens.{MODEL}"]
+            + usage_counters[f"llm.completion_tokens.{MODEL}"])
+    assert available_tokens(gateway) == pytest.approx(1000 - used, abs=1)
+
+
+def test_refunds_unused_completion_tokens(server):
+    gateway = make_gateway(server, tpm=1000)
+
+    gateway.chat(MODEL, MESSAGES, max_tokens=500)
+
+    # The fake answers with fewer than max_tokens; only its usage stays reserved
+    usage_counters = metrics.snapshot()
+    used = (usage_counters[f"llm.prompt_tokens.{MODEL}"]
+            + usage_counters[f"llm.completion_tokens.{MODEL}"])
+    assert used < 500
+    assert available_tokens(gateway) == pytest.approx(1000 - used, abs=1)
+
+
+def test_coalesces_identical_concurrent_requests(server):
+    server.latency = 0.3
+    gateway = make_gateway(server)
+    results = []
+
+    def call():
+        results.append(gateway.chat(MODEL, MESSAGES, max_tokens=5))
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 1 and len(results) == 5
+    assert server.calls == 1
+    assert metrics.snapshot()["llm.coalesced"] == 4
@@ -0,0 +1,95 @@
+"""
+Free-plan quota enforcement against the in-memory Firestore fake.
+"""
+
+import threading
+import time
+
+import pytest
+
+import metering
+import subscriptions
+
+USER_ID = "user-1"
+
+
+@pytest.fixture(autouse=True)
+def free_user(db):
+    db.load(f"users/{USER_ID}/meta/subscription", {"synced_at": time.time()})
+    subscriptions._cache.clear()
+    metering._cache.clear()
+
+
+def used_applications(db):
+    return sum((shard.to_dict() or {}).get("applications", 0)
+               for shard in metering.usage_ref(db, USER_ID).stream())
+
+
+def test_charges_until_the_free_limit(db):
+    for _ in range(metering.FREE_APPLICATION_LIMIT):
+        metering.charge_application(USER_ID)
+
+    with pytest.raises(metering.QuotaExceeded):
+        metering.charge_application(USER_ID)
+    assert used_applications(db) == metering.FREE_APPLICATION_LIMIT
+
+
+def test_concurrent_charges_at_the_limit_admit_only_one(db):
+    db.load(f"users/{USER_ID}/usage/0",
+            {"applications": metering.FREE_APPLICATION_LIMIT - 1})
+    # Every request passes the cached pre-check
+    metering.check_quota(USER_ID)
+    outcomes = []
+
+    def charge():
+        try:
+            metering.charge_application(USER_ID)
+            outcomes.append("charged")
+        except metering.QuotaExceeded:
+            outcomes.append("rejected")
+
+    threads = [threading.Thread(target=charge) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes.count("charged") == 1
+    assert used_applications(db) == metering.FREE_APPLICATION_LIMIT
+
+
+def test_refunds_count_against_the_limit(db):
+    db.load(f"users/{USER_ID}/usage/quota",
+            {"applications": metering.FREE_APPLICATION_LIMIT, "consolidated": True})
+    metering.refund_application(USER_ID)
+
+    metering.charge_application(USER_ID)
+    assert used_applications(db) == metering.FREE_APPLICATION_LIMIT
+
+
+def test_charges_and_token_usage_use_separate_documents(db):
+    metering.charge_application(USER_ID)
+    metering.record_llm_usage(USER_ID, "gpt-4o", 100, 20)
+    metering.refund_application(USER_ID)
+    metering.charge_application(USER_ID)
+
+    reads = db.reads
+    metering.charge_application(USER_ID)
+    # Only the quota document once shard counts were consolidated
+    assert db.reads == reads + 1
+    assert db._docs[f"users/{USER_ID}/usage/quota"]["applications"] == 2
+    shards = [data for path, data in db._docs.items()
+              if path.startswith(f"users/{USER_ID}/usage/") and not path.endswith("/quota")]
+    assert shards and all("applications" not in data for data in shards)
+    assert metering.get_usage(USER_ID) == {
+        "applications": 2,
+        "llm": {"gpt-4o": {"calls": 1, "prompt_tokens": 100, "completion_tokens": 20}}}
+
+
+def test_shard_counts_from_earlier_versions_move_to_the_quota(db):
+    db.load(f"users/{USER_ID}/usage/2", {"applications": 3, "resume_parses": 1})
+
+    metering.charge_application(USER_ID)
+
+    assert db._docs[f"users/{USER_ID}/usage/2"] == {"resume_parses": 1}
+    assert db._docs[f"users/{USER_ID}/usage/quota"]["applications"] == 4
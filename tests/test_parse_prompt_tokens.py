@@ -0,0 +1,79 @@
+"""
+Token budgets of the resume parse prompt.
+
+Counts the tokens the parser sends besides the resume text itself: the
+static instructions, and the JSON schema generated from
+plain_text_resume.yaml, and compares them with the previous prompt, which
+embedded the YAML template in the user message after the resume text.
+Template or prompt changes that bloat every parse call fail here.
+
+The schema count is an upper bound: the API renders the schema more
+compactly before the model sees it. Counts use tiktoken's cl100k_base,
+which tiktoken downloads on first use; without network access the tests
+are skipped unless the encoding is in TIKTOKEN_CACHE_DIR.
+"""
+
+import pytest
+import yaml
+
+import resume_preparser
+import resume_schema
+from resume_chunker import count_tokens
+
+# Budgets for a parse of every section, about 20% above the cl100k_base
+# counts when they were set (37 and 959 tokens)
+STATIC_MESSAGES_TOKEN_BUDGET = 45
+SCHEMA_TOKEN_BUDGET = 1150
+
+LEGACY_SYSTEM_PROMPT = "You are a helpful assistant that structures resume information into YAML format."
+LEGACY_PROMPT = """
+    You are an AI assistant that extracts information from resumes and structures it into a predefined YAML format. Below is text extracted from a resume. Please fill in the YAML template accurately based on the information provided.
+
+    Extracted Resume Text:
+    \"\"\"
+    {resume_text}
+    \"\"\"
+
+    YAML Template:
+    ```yaml
+{yaml_template}
+    ```
+
+    Please ensure that the YAML syntax is correct. If certain fields are not present in the resume text, leave them as empty strings or omit them.
+
+    Output the YAML only without any additional text.
+    """
+
+
+@pytest.fixture(scope="module")
+def sections():
+    try:
+        count_tokens("")
+    except Exception as e:
+        pytest.skip(f"cl100k_base encoding unavailable: {e}")
+    return list(resume_preparser.load_template())
+
+
+def legacy_static_tokens(sections):
+    template = resume_preparser.load_template()
+    yaml_template = yaml.dump({key: template[key] for key in sections},
+                              sort_keys=False, allow_unicode=True)
+    prompt = LEGACY_PROMPT.format(resume_text="", yaml_template=yaml_template)
+    return count_tokens(LEGACY_SYSTEM_PROMPT) + count_tokens(prompt)
+
+
+def static_tokens(sections):
+    prompt = resume_schema.build_parse_prompt({key: "" for key in sections})
+    return count_tokens(resume_schema.PARSE_SYSTEM_PROMPT) + count_tokens(prompt)
+
+
+def test_messages_fit_their_budget(sections):
+    assert static_tokens(sections) <= STATIC_MESSAGES_TOKEN_BUDGET
+
+
+def test_schema_fits_its_budget(sections):
+    assert count_tokens(resume_schema.schema_text(sections)) <= SCHEMA_TOKEN_BUDGET
+
+
+def test_messages_are_smaller_than_the_legacy_prompt(sections):
+    assert static_tokens(sections) < legacy_static_tokens(sections)
@@ -0,0 +1,59 @@
+"""
+Persisting and caching per-user resume indexes.
+"""
+
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("faiss")
+
+import resume_index  # noqa: E402
+from langchain_core.documents import Document  # noqa: E402
+from langchain_core.embeddings import Embeddings  # noqa: E402
+
+USER_ID = "user-1"
+
+
+class HashEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def build(text):
+    return resume_index.FAISS.from_documents([Document(page_content=text)], HashEmbeddings())
+
+
+def test_concurrent_saves_leave_one_complete_index(tmp_path):
+    store = resume_index.LocalIndexStore(str(tmp_path))
+    versions = [(f"hash-{n}", build(f"resume {n}")) for n in range(8)]
+    threads = [threading.Thread(target=store.save, args=(USER_ID, resume_hash, vector_store))
+               for resume_hash, vector_store in versions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    loaded = [store.load(USER_ID, resume_hash, HashEmbeddings())
+              for resume_hash, _ in versions]
+    assert sum(index is not None for index in loaded) == 1
+    folder = store._folder(USER_ID)
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(folder),
+                                                   os.path.basename(folder) + ".lock"])
+
+
+def test_loaded_indexes_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESUME_INDEX_CACHE_MAX_USERS", "2")
+    monkeypatch.setattr(resume_index, "_loaded_indexes", resume_index.OrderedDict())
+    store = resume_index.LocalIndexStore(str(tmp_path))
+    documents = [Document(page_content="Python developer")]
+
+    for user_id in ("a", "b", "a", "c"):
+        resume_index.get_resume_index(user_id, {"user": user_id}, documents,
+                                      HashEmbeddings(), store)
+
+    assert list(resume_index._loaded_indexes) == ["a", "c"]
@@ -0,0 +1,63 @@
+"""
+Resume parsing against the local fake OpenAI server, including responses
+cut off at max_tokens.
+"""
+
+import pytest
+
+openai = pytest.importorskip("openai")
+pytest.importorskip("streamlit")
+
+import llm_cache  # noqa: E402
+import llm_gateway  # noqa: E402
+import metrics  # noqa: E402
+import resources  # noqa: E402
+import resume_parser  # noqa: E402
+from disk_cache import DiskCache  # noqa: E402
+from fake_openai import start_server  # noqa: E402
+
+# No recognizable section headers, so every section goes to the LLM
+RESUME_TEXT = "Ada Lovelace wrote the first program for the Analytical Engine."
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    server = start_server(latency=0, rpm=0)
+    client = openai.OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+    gateway = llm_gateway.LLMGateway(
+        client, {resume_parser.PARSE_MODEL: {"rpm": 10000, "tpm": 10000000}})
+    cache = llm_cache.ResponseCache(
+        "resume_parser", DiskCache(str(tmp_path / "responses.sqlite3"), table="resume_parser"))
+    monkeypatch.setattr(resources, "get_llm_gateway", lambda: gateway)
+    monkeypatch.setattr(llm_cache, "get_cache", lambda name: cache)
+    monkeypatch.setattr(llm_gateway, "_estimate_tokens", lambda text: len(text.split()))
+    yield server
+    server.shutdown()
+
+
+def test_parses_into_the_template_sections(server):
+    resume_data = resume_parser.parse_resume(RESUME_TEXT)
+
+    assert "personal_information" in resume_data
+    assert server.calls == 1
+
+
+def test_retries_a_truncated_response_with_more_tokens(server, monkeypatch):
+    monkeypatch.setattr(resume_parser, "PARSE_MAX_TOKENS", 10)
+
+    resume_data = resume_parser.parse_resume(RESUME_TEXT)
+
+    assert "personal_information" in resume_data
+    assert server.calls == 2
+    assert metrics.snapshot()["resume_parser.truncated"] == 1
+
+
+def test_raises_when_still_truncated_and_caches_nothing(server, monkeypatch):
+    monkeypatch.setattr(resume_parser, "PARSE_MAX_TOKENS", 10)
+    monkeypatch.setattr(resume_parser, "PARSE_RETRY_MAX_TOKENS", 20)
+
+    with pytest.raises(ValueError, match="cut off"):
+        resume_parser.parse_resume(RESUME_TEXT)
+    with pytest.raises(ValueError, match="cut off"):
+        resume_parser.parse_resume(RESUME_TEXT)
+    assert server.calls == 4
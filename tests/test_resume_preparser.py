@@ -0,0 +1,83 @@
+"""
+Rule-based resume pre-parsing.
+"""
+
+import resume_preparser
+
+CONTACT = "Ada Lovelace\nada@example.com | +44 20 7946 0958\n"
+
+
+def test_known_sections_send_only_their_text():
+    text = (CONTACT + "\nSummary\nEngineer who likes   engines.\n"
+            "\nExperience\nAnalyst at Babbage & Co, 1842-1843\n- Wrote the first program\n"
+            "\nSkills\nPython, Go\n"
+            "\nLanguages\nEnglish (Native), French (Fluent)\n")
+
+    resume_data, unresolved = resume_preparser.preparse_resume(text)
+
+    assert resume_data["personal_information"]["name"] == "Ada"
+    assert resume_data["personal_information"]["email"] == "ada@example.com"
+    assert resume_data["summary"] == ["Engineer who likes engines."]
+    assert resume_data["skills"] == ["Python", "Go"]
+    assert resume_data["languages"][1] == {"language": "French", "proficiency": "Fluent"}
+    assert unresolved == {"experience_details":
+                          "Analyst at Babbage & Co, 1842-1843\n- Wrote the first program"}
+
+
+def test_unknown_header_after_skills_is_not_taken_for_skills():
+    text = (CONTACT + "\nSkills\nPython, Go\n"
+            "\nProfessional Background\nAcme Corp Senior Engineer 2019-2023\n"
+            "Built payment systems in Go\n")
+
+    resume_data, unresolved = resume_preparser.preparse_resume(text)
+
+    assert resume_data["skills"] == ["Python", "Go"]
+    assert unresolved["experience_details"] == text
+    assert "personal_information" not in unresolved
+
+
+def test_unknown_header_after_summary_keeps_its_text():
+    text = (CONTACT + "\nSummary\nEngineer.\n"
+            "\nRelevant Experience\nAcme Corp, 2019-2023\n"
+            "\nEducation\nBSc Mathematics, 2015\n")
+
+    sections = resume_preparser.split_sections(text)
+    _, unresolved = resume_preparser.preparse_resume(text)
+
+    assert sections["summary"] == "Engineer."
+    assert sections["other"] == "Relevant Experience\nAcme Corp, 2019-2023"
+    assert "Acme Corp, 2019-2023" in unresolved["experience_details"]
+    assert unresolved["education_details"] == text
+
+
+def test_upper_case_and_colon_headers_need_no_blank_line():
+    text = "Skills\nPython\nVOLUNTEERING\nMentor\nPublications:\nA note\n"
+
+    sections = resume_preparser.split_sections(text)
+
+    assert sections["skills"] == "Python"
+    assert sections["other"] == "VOLUNTEERING\nMentor\nPublications:\nA note"
+
+
+def test_title_case_lines_inside_a_list_are_not_headers():
+    sections = resume_preparser.split_sections("Skills\nPython\nMachine Learning\n")
+
+    assert sections == {"header": "", "skills": "Python\nMachine Learning"}
+
+
+def test_missing_experience_header_sends_the_full_text():
+    text = CONTACT + "\nSkills\nPython\n"
+
+    _, unresolved = resume_preparser.preparse_resume(text)
+
+    assert unresolved["experience_details"] == text
+    assert "languages" in unresolved
+
+
+def test_text_without_headers_is_fully_unresolved():
+    text = "Just a paragraph about someone."
+
+    _, unresolved = resume_preparser.preparse_resume(text)
+
+    assert set(unresolved) == set(resume_preparser.load_template())
+    assert set(unresolved.values()) == {text}
@@ -0,0 +1,99 @@
+"""
+Server-side sessions and the HttpOnly cookie set by server.py.
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("flask")
+
+import identity  # noqa: E402
+
+USER = {"name": "Ada", "email": "ada@example.com", "uid": "user-1"}
+REFRESH_TOKEN = "refresh-token-1"
+
+
+@pytest.fixture(autouse=True)
+def server_url(monkeypatch):
+    monkeypatch.setenv("SERVER_URL", "http://localhost:8000")
+    monkeypatch.setenv("REDIRECT_URI", "http://localhost:8501/")
+
+
+@pytest.fixture
+def client(db):
+    import server
+
+    return server.app.test_client()
+
+
+def start(client, code):
+    response = client.get("/session/start", query_string={"code": code})
+    assert response.status_code == 302
+    assert response.headers["Location"] == "http://localhost:8501/"
+    return response
+
+
+def session_cookie(response):
+    cookies = [header for header in response.headers.getlist("Set-Cookie")
+               if header.startswith(identity.SESSION_COOKIE + "=")]
+    return cookies[0] if cookies else None
+
+
+def test_start_sets_http_only_cookie_without_refresh_token(client, db):
+    response = start(client, identity.create_session(USER, REFRESH_TOKEN))
+
+    cookie = session_cookie(response)
+    assert "HttpOnly" in cookie and "SameSite=Strict" in cookie
+    session_id = cookie.split(";")[0].split("=", 1)[1]
+    assert REFRESH_TOKEN not in cookie
+    assert identity.restore_session(session_id) == USER
+
+
+def test_handoff_codes_work_once(client):
+    code = identity.create_session(USER, REFRESH_TOKEN)
+
+    assert session_cookie(start(client, code))
+    assert session_cookie(start(client, code)) is None
+
+
+def test_end_revokes_the_session(client, db):
+    cookie = session_cookie(start(client, identity.create_session(USER, REFRESH_TOKEN)))
+    session_id = cookie.split(";")[0].split("=", 1)[1]
+
+    response = client.get("/session/end")
+
+    assert response.status_code == 302
+    assert "Max-Age=0" in session_cookie(response)
+    assert identity.restore_session(session_id) is None
+    stored = identity.session_ref(db, session_id).get().to_dict()
+    assert stored["revoked"] and "refresh_token" not in stored
+
+
+def test_expired_session_is_refreshed(client, db, monkeypatch):
+    cookie = session_cookie(start(client, identity.create_session(USER, REFRESH_TOKEN)))
+    session_id = cookie.split(";")[0].split("=", 1)[1]
+    identity.session_ref(db, session_id).update({"exp": int(time.time()) - 1})
+    monkeypatch.setattr(identity, "refresh_id_token", lambda token: {
+        "id_token": "id-token-2", "refresh_token": "refresh-token-2"})
+    monkeypatch.setattr(identity, "verify_id_token", lambda token: dict(USER))
+
+    assert identity.restore_session(session_id) == USER
+    stored = identity.session_ref(db, session_id).get().to_dict()
+    assert stored["refresh_token"] == "refresh-token-2"
+    assert stored["exp"] > time.time()
+
+
+def test_failed_refresh_revokes_the_session(client, db, monkeypatch):
+    cookie = session_cookie(start(client, identity.create_session(USER, REFRESH_TOKEN)))
+    session_id = cookie.split(";")[0].split("=", 1)[1]
+    identity.session_ref(db, session_id).update({"exp": int(time.time()) - 1})
+    monkeypatch.setattr(identity, "refresh_id_token",
+                        lambda token: {"error": {"message": "TOKEN_EXPIRED"}})
+
+    assert identity.restore_session(session_id) is None
+    assert identity.session_ref(db, session_id).get().to_dict()["revoked"]
+
+
+def test_unknown_session_ids_sign_no_one_in(db):
+    assert identity.restore_session("not-a-session") is None
@@ -0,0 +1,143 @@
+"""
+Subscription state kept by Stripe webhooks, against local Firestore and
+Stripe fakes.
+"""
+
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+
+pytest.importorskip("stripe")
+pytest.importorskip("flask")
+
+import metrics  # noqa: E402
+import resources  # noqa: E402
+import subscriptions  # noqa: E402
+
+WEBHOOK_SECRET = "whsec_test"
+USER_ID = "user-1"
+CUSTOMER_ID = "cus_test1"
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(monkeypatch):
+    monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", WEBHOOK_SECRET)
+    monkeypatch.setenv("SUBSCRIPTION_CACHE_SECONDS", "0")
+    subscriptions._cache.clear()
+
+
+@pytest.fixture
+def client(db, stripe_server):
+    import server
+
+    return server.app.test_client()
+
+
+def subscription_event(created, status, event_id="evt_1", plan="Pro"):
+    return {
+        "id": event_id, "object": "event", "type": "customer.subscription.updated",
+        "created": created,
+        "data": {"object": {
+            "id": "sub_1", "object": "subscription", "customer": CUSTOMER_ID,
+            "status": status, "current_period_end": created + 30 * 86400,
+            "metadata": {"user_id": USER_ID, "plan": plan},
+        }},
+    }
+
+
+def post_event(client, event, secret=WEBHOOK_SECRET):
+    payload = json.dumps(event)
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(),
+                         hashlib.sha256).hexdigest()
+    return client.post("/stripe/webhook", data=payload,
+                       headers={"Stripe-Signature": f"t={timestamp},v1={signature}",
+                                "Content-Type": "application/json"})
+
+
+def stored_state(db):
+    return subscriptions.subscription_ref(db, USER_ID).get().to_dict()
+
+
+def test_webhook_rejects_invalid_signatures(client, db):
+    response = post_event(client, subscription_event(100, "active"), secret="whsec_other")
+
+    assert response.status_code == 400
+    assert stored_state(db) is None
+
+
+def test_webhook_stores_subscription_state(client, db):
+    response = post_event(client, subscription_event(100, "active"))
+
+    assert response.status_code == 200
+    state = stored_state(db)
+    assert state["status"] == "active"
+    assert state["plan"] == "Pro"
+    assert state["event_created"] == 100
+    assert subscriptions.get_plan(USER_ID) == "Pro"
+
+
+def test_webhook_ignores_out_of_order_events(client, db):
+    post_event(client, subscription_event(200, "active", event_id="evt_new"))
+    post_event(client, subscription_event(100, "canceled", event_id="evt_old"))
+
+    assert stored_state(db)["status"] == "active"
+    assert metrics.snapshot()["subscriptions.stale_events"] == 1
+
+
+def test_webhook_replays_are_idempotent(client, db):
+    event = subscription_event(100, "active")
+    post_event(client, event)
+    first = stored_state(db)
+    post_event(client, event)
+    second = stored_state(db)
+
+    first.pop("synced_at"), second.pop("synced_at")
+    assert first == second
+
+
+def test_stale_state_is_refreshed_from_stripe(db, stripe_server):
+    db.load(f"users/{USER_ID}/meta/subscription",
+            {"stripe_customer_id": CUSTOMER_ID, "synced_at": 0})
+    stripe_server.add_subscription(CUSTOMER_ID, plan="Pro", user_id=USER_ID)
+
+    assert subscriptions.get_plan(USER_ID) == "Pro"
+    assert stripe_server.calls == 1
+    assert stored_state(db)["status"] == "active"
+
+
+def test_refresh_falls_back_to_stored_state_when_stripe_fails(db, stripe_server,
+                                                               monkeypatch):
+    db.load(f"users/{USER_ID}/meta/subscription",
+            {"stripe_customer_id": CUSTOMER_ID, "status": "active", "plan": "Pro",
+             "synced_at": 0})
+    # Nothing listens on port 9 (discard)
+    monkeypatch.setenv("STRIPE_API_BASE", "http://127.0.0.1:9")
+    resources.get_stripe.cache_clear()
+
+    assert subscriptions.get_plan(USER_ID) == "Pro"
+    assert metrics.snapshot()["subscriptions.api_errors"] == 1
+
+
+def test_refresh_keeps_newer_webhook_state(db, stripe_server):
+    db.load(f"users/{USER_ID}/meta/subscription",
+            {"stripe_customer_id": CUSTOMER_ID, "status": "canceled", "synced_at": 0,
+             "event_created": int(time.time()) + 60})
+    stripe_server.add_subscription(CUSTOMER_ID, plan="Pro", user_id=USER_ID)
+
+    assert subscriptions.get_plan(USER_ID) == subscriptions.FREE_PLAN
+    assert stored_state(db)["status"] == "canceled"
+
+
+def test_events_older_than_a_refresh_are_ignored(client, db, stripe_server):
+    db.load(f"users/{USER_ID}/meta/subscription",
+            {"stripe_customer_id": CUSTOMER_ID, "synced_at": 0})
+    stripe_server.add_subscription(CUSTOMER_ID, plan="Pro", user_id=USER_ID)
+    subscriptions.get_subscription(USER_ID)
+
+    post_event(client, subscription_event(int(time.time()) - 60, "canceled"))
+
+    assert stored_state(db)["status"] == "active"
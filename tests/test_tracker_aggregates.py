@@ -0,0 +1,85 @@
+"""
+Application summaries: sharded counters, zero-count deletion and the
+paginated rebuild.
+"""
+
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pandas")
+
+import tracker_aggregates  # noqa: E402
+
+USER_ID = "user-1"
+
+
+def application(company="Acme", position="Data Engineer", status="Applied", day=3):
+    return {"company": company, "position": position, "location": "Berlin",
+            "status": status, "date": datetime(2024, 6, day)}
+
+
+def documents(db):
+    prefix = f"users/{USER_ID}/aggregates/"
+    return {path[len(prefix):]: data for path, data in db._docs.items()
+            if path.startswith(prefix)}
+
+
+def test_high_cardinality_counters_live_in_shards(db):
+    tracker_aggregates.add_application(db, USER_ID, application())
+
+    stored = documents(db)
+    assert "company" not in stored["applications"]
+    assert "terms" not in stored["applications"]
+    summary = tracker_aggregates.summary_from_documents(stored)
+    assert summary["company"]["Acme"]["count"] == 1
+    assert summary["terms"] == {"data": 1, "engineer": 1}
+    assert summary["status"] == {"Applied": 1}
+
+
+def test_counts_that_drop_to_zero_are_deleted(db):
+    application_id = tracker_aggregates.add_application(db, USER_ID, application())
+
+    tracker_aggregates.update_application_status(db, USER_ID, application_id, "Rejected")
+
+    summary = tracker_aggregates.summary_from_documents(documents(db))
+    assert summary["status"] == {"Rejected": 1}
+    assert summary["company"]["Acme"]["count"] == 1
+    assert summary["generation"] == 2
+
+
+def test_rebuild_reads_in_pages_and_replaces_stale_shards(db, monkeypatch):
+    monkeypatch.setattr(tracker_aggregates, "SUMMARY_PAGE_SIZE", 2)
+    for day in range(1, 6):
+        db.load(f"users/{USER_ID}/applications/a{day}", application(company=f"C{day}", day=day))
+    db.load(f"users/{USER_ID}/aggregates/company_0", {"company": {"Gone": {"count": 1}}})
+
+    summary = tracker_aggregates.ensure_summary(db, USER_ID)
+
+    assert summary["total"] == 5
+    assert tracker_aggregates.is_current(summary)
+    stored = tracker_aggregates.summary_from_documents(documents(db))
+    assert set(stored["company"]) == {f"C{day}" for day in range(1, 6)}
+    assert stored["terms_version"] == tracker_aggregates.TERMS_VERSION
+
+
+def test_rebuild_racing_a_write_is_retried(db, monkeypatch):
+    db.load(f"users/{USER_ID}/applications/a1", application())
+    paged = tracker_aggregates._paged_applications
+    builds = []
+
+    def racing(db, user_id):
+        builds.append(1)
+        yield from paged(db, user_id)
+        if len(builds) == 1:
+            # Written after the build read its pages
+            tracker_aggregates.add_application(db, user_id, application(company="Initech"))
+
+    monkeypatch.setattr(tracker_aggregates, "_paged_applications", racing)
+
+    summary = tracker_aggregates.ensure_summary(db, USER_ID)
+
+    assert len(builds) == 2
+    assert summary["total"] == 2
+    stored = tracker_aggregates.summary_from_documents(documents(db))
+    assert stored["total"] == 2 and set(stored["company"]) == {"Acme", "Initech"}
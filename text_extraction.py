@@ -0,0 +1,129 @@
+# text_extraction.py
+
+import io
+import os
+
+from docx import Document
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.utils import open_filename
+
+PDF_EXTENSIONS = (".pdf",)
+DOCX_EXTENSIONS = (".docx",)
+
+# PDF extraction modes, from cheapest to most thorough:
+#   raw  - no layout analysis; characters in content-stream order
+#   fast - groups characters into lines and boxes but skips the costly
+#          reading-order analysis across boxes
+#   full - pdfminer's default layout analysis
+EXTRACTION_MODES = ("raw", "fast", "full")
+
+
+def _layout_params(mode):
+    if mode == "raw":
+        return None
+    if mode == "fast":
+        return LAParams(boxes_flow=None, detect_vertical=False, all_texts=False)
+    if mode == "full":
+        return LAParams()
+    raise ValueError(f"Unknown PDF extraction mode: {mode}")
+
+
+def iter_pdf_pages(file, mode="full", max_pages=0):
+    """
+    Extracts text from a PDF one page at a time.
+
+    Args:
+        file (str or BytesIO): Path or file object of the PDF.
+        mode (str): One of EXTRACTION_MODES.
+        max_pages (int): Maximum number of pages to read (0 for all).
+
+    Yields:
+        str: Text of each page, in order.
+    """
+    laparams = _layout_params(mode)
+    resource_manager = PDFResourceManager(caching=True)
+    output = io.StringIO()
+    device = TextConverter(resource_manager, output, laparams=laparams)
+    interpreter = PDFPageInterpreter(resource_manager, device)
+    try:
+        with open_filename(file, "rb") as fp:
+            for page in PDFPage.get_pages(fp, maxpages=max_pages, caching=True):
+                interpreter.process_page(page)
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+    finally:
+        device.close()
+
+
+def extract_pdf_text(file, mode="full", max_pages=0, char_budget=None):
+    """
+    Extracts text from a PDF file using pdfminer.
+
+    Pages are read lazily, so reading stops as soon as ``char_budget``
+    characters have been collected.
+
+    Args:
+        file (str or BytesIO): Path or file object of the PDF.
+        mode (str): One of EXTRACTION_MODES.
+        max_pages (int): Maximum number of pages to read (0 for all).
+        char_budget (int, optional): Maximum number of characters to return.
+
+    Returns:
+        str: Extracted text from the PDF.
+    """
+    pages = []
+    total = 0
+    for page_text in iter_pdf_pages(file, mode=mode, max_pages=max_pages):
+        pages.append(page_text)
+        total += len(page_text)
+        if char_budget and total >= char_budget:
+            break
+    text = "".join(pages)
+    return text[:char_budget] if char_budget else text
+
+
+def extract_docx_text(file):
+    """
+    Extracts text from a DOCX file using python-docx.
+
+    Args:
+        file (str or BytesIO): Path or file object of the DOCX.
+
+    Returns:
+        str: Extracted text from the DOCX.
+    """
+    doc = Document(file)
+    return "\n".join([para.text for para in doc.paragraphs])
+
+
+def is_supported(path):
+    """
+    Returns True if the file extension is one we can extract text from.
+    """
+    return path.lower().endswith(PDF_EXTENSIONS + DOCX_EXTENSIONS)
+
+
+def extract_text_from_path(path, **pdf_options):
+    """
+    Extracts text from a resume file on disk, based on its extension.
+
+    Args:
+        path (str): Path of a PDF or DOCX file.
+        **pdf_options: Options passed to extract_pdf_text for PDF files.
+
+    Returns:
+        str: Extracted text.
+
+    Raises:
+        ValueError: If the file type is not supported.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PDF_EXTENSIONS:
+        return extract_pdf_text(path, **pdf_options)
+    if extension in DOCX_EXTENSIONS:
+        return extract_docx_text(path)
+    raise ValueError(f"Unsupported file format: {extension}")
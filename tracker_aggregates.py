@@ -0,0 +1,488 @@
+# tracker_aggregates.py
+"""
+Incrementally maintained summaries of a user's job applications.
+
+Every application write also updates the summary documents under
+``users/{uid}/aggregates``: ``applications`` holds the total and the
+counters per week, status, month and location, and the counters per
+company and per position term, whose keys grow with every new company or
+title, are spread by key over ``company_0`` ... and ``terms_0`` ... (see
+COUNTER_SHARDS) so no single document approaches Firestore's size limit.
+An entry whose count drops to zero is deleted rather than kept, and the
+counter maps are exempt from indexing (firestore.indexes.json). The
+tracker dashboard reads these few documents instead of streaming the whole
+applications collection.
+
+Summaries built from scratch record ``terms_version``, the version of the
+tokenizer behind their term counts. A summary with another (or no) version
+is rebuilt from the applications on the next tracker view, so term counts
+never mix tokenizers. A summary created by an application write alone
+carries no version either, since it may be missing earlier applications.
+The rebuild reads the applications in pages outside any transaction and
+is only stored if no application was written meanwhile (``generation``,
+bumped by every write, is unchanged); otherwise it is retried.
+
+Run this module to backfill summaries for existing data:
+    python tracker_aggregates.py <uid> [<uid> ...]
+    python tracker_aggregates.py --all
+"""
+
+import argparse
+import zlib
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+from firebase_admin import firestore
+
+import resources
+from tracker_analytics import SUCCESS_STATUSES, tokenize
+
+APPLICATION_STATUSES = ('Applied', 'Interview Scheduled', 'Offer Received',
+                        'Rejected')
+EPOCH = date(1970, 1, 1)
+
+# Bump when position_terms changes how titles are split into terms
+# (2: regex tokenizer, splitting hyphenated words)
+TERMS_VERSION = 2
+
+# Counter maps keyed by open-ended values, stored in their own sharded documents
+SHARDED_COUNTERS = ('company', 'terms')
+COUNTER_SHARDS = 8
+
+# Applications read per page when rebuilding a summary
+SUMMARY_PAGE_SIZE = 500
+SUMMARY_BUILD_ATTEMPTS = 3
+
+
+def aggregates_ref(db, user_id):
+    return db.collection('users').document(user_id).collection('aggregates')
+
+
+def summary_ref(db, user_id):
+    return aggregates_ref(db, user_id).document('applications')
+
+
+def _shard_id(name, key):
+    # crc32 rather than hash(), which differs between processes
+    return f"{name}_{zlib.crc32(key.encode()) % COUNTER_SHARDS}"
+
+
+def split_documents(counters):
+    """
+    Splits summary counters into the documents that store them.
+
+    Returns:
+        dict: Document ID under ``aggregates`` to the counters it holds.
+    """
+    documents = {'applications': {key: value for key, value in counters.items()
+                                  if key not in SHARDED_COUNTERS}}
+    for name in SHARDED_COUNTERS:
+        for key, value in counters.get(name, {}).items():
+            documents.setdefault(_shard_id(name, key), {name: {}})[name][key] = value
+    return documents
+
+
+def summary_from_documents(documents):
+    """
+    Joins the documents under ``aggregates`` back into one summary.
+
+    Args:
+        documents (dict): Document ID to document data.
+
+    Returns:
+        dict or None: The summary, or None if its main document is missing.
+    """
+    if documents.get('applications') is None:
+        return None
+    summary = dict(documents['applications'])
+    for name in SHARDED_COUNTERS:
+        summary[name] = {}
+    for document_id, data in documents.items():
+        if document_id != 'applications':
+            for name in SHARDED_COUNTERS:
+                summary[name].update((data or {}).get(name, {}))
+    return summary
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.to_datetime(value).date()
+
+
+def _map_key(value):
+    # Firestore map keys can't be empty or start with "__"
+    key = str(value or '').strip()
+    if not key or key.startswith('__'):
+        return 'Unknown'
+    return key
+
+
+def is_current(summary):
+    """
+    Whether a summary's term counts come from the current tokenizer.
+    """
+    return summary.get('terms_version') == TERMS_VERSION
+
+
+def position_terms(position):
+    """
+    Tokenizes a position title into lowercase terms without stopwords.
+    """
+    return tokenize(position)
+
+
+def application_counters(application, sign=1):
+    """
+    Builds the nested counter updates contributed by one application.
+
+    Args:
+        application (dict): Application with date, status, company,
+            position and location fields.
+        sign (int): 1 to add the application, -1 to remove it.
+
+    Returns:
+        dict: Nested map of plain integer deltas.
+    """
+    day = _as_date(application['date'])
+    week_end = day + timedelta(days=6 - day.weekday())
+    successful = application.get('status') in SUCCESS_STATUSES
+
+    terms = Counter(position_terms(application.get('position')))
+    return {
+        'total': sign,
+        'status': {_map_key(application.get('status')): sign},
+        'weekly': {week_end.isoformat(): {'total': sign,
+                                          'successful': sign if successful else 0}},
+        'company': {_map_key(application.get('company')): {
+            'count': sign, 'day_sum': sign * (day - EPOCH).days}},
+        'month': {str(day.month): sign},
+        'location': {_map_key(application.get('location')): sign},
+        'terms': {term: sign * count for term, count in terms.items()},
+    }
+
+
+def _as_increments(counters):
+    increments = {}
+    for key, value in counters.items():
+        if isinstance(value, dict):
+            nested = _as_increments(value)
+            # An empty map would overwrite the stored one when merged
+            if nested:
+                increments[key] = nested
+        elif value:
+            increments[key] = firestore.Increment(value)
+    return increments
+
+
+def _has_changes(delta):
+    if isinstance(delta, dict):
+        return any(_has_changes(value) for value in delta.values())
+    return delta != 0
+
+
+def _counter_writes(delta, stored):
+    """
+    Turns counter deltas for one document into a merge update: Increments,
+    and DELETE_FIELD for map entries (a status, week, company, ...) whose
+    count drops to zero.
+
+    Args:
+        delta (dict): Counters to add, as from application_counters.
+        stored (dict): The document's current data.
+    """
+    updates = {}
+    for key, value in delta.items():
+        if not isinstance(value, dict):
+            if value:
+                updates[key] = firestore.Increment(value)
+            continue
+        entries = {}
+        stored_entries = stored.get(key) or {}
+        for entry, entry_delta in value.items():
+            if not _has_changes(entry_delta):
+                continue
+            if isinstance(entry_delta, dict):
+                # Weekly and company entries: total/count bounds the others
+                count_field = 'total' if 'total' in entry_delta else 'count'
+                count = ((stored_entries.get(entry) or {}).get(count_field, 0)
+                         + entry_delta[count_field])
+                write = _as_increments(entry_delta)
+            else:
+                count = stored_entries.get(entry, 0) + entry_delta
+                write = firestore.Increment(entry_delta)
+            entries[entry] = write if count > 0 else firestore.DELETE_FIELD
+        if entries:
+            updates[key] = entries
+    return updates
+
+
+def _merge_counters(target, counters):
+    for key, value in counters.items():
+        if isinstance(value, dict):
+            _merge_counters(target.setdefault(key, {}), value)
+        else:
+            target[key] = target.get(key, 0) + value
+
+
+def _counter_updates(transaction, aggregates, delta):
+    """
+    Reads the aggregate documents a counter delta touches, in a
+    transaction, and builds their merge updates. Every update also bumps
+    the summary's ``generation``.
+
+    Returns:
+        tuple: (stored, updates), both keyed by document ID under
+        ``aggregates``.
+    """
+    stored, updates = {}, {}
+    for document_id, counters in split_documents(delta).items():
+        if document_id != 'applications' and not _has_changes(counters):
+            # e.g. the company of an application whose status changed
+            continue
+        snapshot = aggregates.document(document_id).get(transaction=transaction)
+        stored[document_id] = snapshot.to_dict() or {}
+        updates[document_id] = _counter_writes(counters, stored[document_id])
+    updates['applications']['generation'] = firestore.Increment(1)
+    return stored, updates
+
+
+def _set_updates(transaction, aggregates, updates):
+    for document_id, document_updates in updates.items():
+        if document_updates:
+            transaction.set(aggregates.document(document_id), document_updates, merge=True)
+
+
+def add_application(db, user_id, application):
+    """
+    Stores a new application and updates the user's summary atomically.
+
+    Args:
+        db: Firestore client.
+        user_id (str): Owner of the application.
+        application (dict): Application fields.
+
+    Returns:
+        str: ID of the new application document.
+    """
+    application_ref = (db.collection('users').document(user_id)
+                       .collection('applications').document())
+    aggregates = aggregates_ref(db, user_id)
+    first_day = (_as_date(application['date']) - EPOCH).days
+
+    @firestore.transactional
+    def write(transaction):
+        stored, updates = _counter_updates(transaction, aggregates,
+                                           application_counters(application))
+        current_first_day = stored['applications'].get('first_day')
+        if current_first_day is None or first_day < current_first_day:
+            updates['applications']['first_day'] = first_day
+        transaction.set(application_ref, application)
+        _set_updates(transaction, aggregates, updates)
+
+    write(db.transaction())
+    return application_ref.id
+
+
+def update_application_status(db, user_id, application_id, status):
+    """
+    Changes an application's status and moves its counters accordingly.
+    """
+    application_ref = (db.collection('users').document(user_id)
+                       .collection('applications').document(application_id))
+    aggregates = aggregates_ref(db, user_id)
+
+    @firestore.transactional
+    def write(transaction):
+        snapshot = application_ref.get(transaction=transaction)
+        if not snapshot.exists:
+            return
+        previous = snapshot.to_dict()
+        if previous.get('status') == status:
+            return
+        delta = application_counters(previous, sign=-1)
+        _merge_counters(delta, application_counters({**previous, 'status': status}))
+        _, updates = _counter_updates(transaction, aggregates, delta)
+        transaction.update(application_ref, {'status': status})
+        _set_updates(transaction, aggregates, updates)
+
+    write(db.transaction())
+
+
+def compute_summary(applications):
+    """
+    Computes a summary document from scratch.
+
+    Args:
+        applications (iterable): Application dicts.
+
+    Returns:
+        dict: Summary with the same layout as the incremental counters.
+    """
+    summary = {'total': 0, 'terms_version': TERMS_VERSION}
+    first_day = None
+    for application in applications:
+        if not application.get('date'):
+            continue
+        _merge_counters(summary, application_counters(application))
+        day = (_as_date(application['date']) - EPOCH).days
+        first_day = day if first_day is None else min(first_day, day)
+    if first_day is not None:
+        summary['first_day'] = first_day
+    return summary
+
+
+def _paged_applications(db, user_id):
+    applications_ref = (db.collection('users').document(user_id)
+                        .collection('applications'))
+    query = applications_ref.limit(SUMMARY_PAGE_SIZE)
+    while True:
+        page = list(query.stream())
+        for snapshot in page:
+            yield snapshot.to_dict()
+        if len(page) < SUMMARY_PAGE_SIZE:
+            return
+        query = applications_ref.limit(SUMMARY_PAGE_SIZE).start_after(page[-1])
+
+
+def _store_summary(db, user_id, summary, generation):
+    """
+    Replaces the user's aggregate documents with a rebuilt summary, unless
+    an application write changed ``generation`` since the build started.
+
+    Returns:
+        bool: Whether the summary was stored.
+    """
+    aggregates = aggregates_ref(db, user_id)
+    documents = split_documents(summary)
+    documents['applications']['generation'] = generation
+    shard_ids = [f"{name}_{shard}" for name in SHARDED_COUNTERS
+                 for shard in range(COUNTER_SHARDS)]
+
+    @firestore.transactional
+    def write(transaction):
+        snapshot = aggregates.document('applications').get(transaction=transaction)
+        if (snapshot.to_dict() or {}).get('generation', 0) != generation:
+            return False
+        for document_id, data in documents.items():
+            transaction.set(aggregates.document(document_id), data)
+        for document_id in shard_ids:
+            if document_id not in documents:
+                transaction.delete(aggregates.document(document_id))
+        return True
+
+    return write(db.transaction())
+
+
+def rebuild_summary(db, user_id):
+    """
+    Rebuilds a user's summary from their applications, read in pages of
+    SUMMARY_PAGE_SIZE outside any transaction.
+
+    A build that raced an application write is discarded and retried; if
+    writes keep racing it, the last build is returned without being stored
+    and the next tracker view tries again.
+
+    Returns:
+        dict: The rebuilt summary.
+    """
+    for _ in range(SUMMARY_BUILD_ATTEMPTS):
+        snapshot = summary_ref(db, user_id).get()
+        generation = (snapshot.to_dict() or {}).get('generation', 0)
+        built = compute_summary(_paged_applications(db, user_id))
+        if _store_summary(db, user_id, built, generation):
+            break
+    return built
+
+
+def ensure_summary(db, user_id):
+    """
+    Returns a user's summary, (re)building it from their applications if
+    it is missing or not current (see is_current).
+
+    Returns:
+        dict: The summary.
+    """
+    documents = {snapshot.id: snapshot.to_dict()
+                 for snapshot in aggregates_ref(db, user_id).stream()}
+    summary = summary_from_documents(documents)
+    if summary is not None and is_current(summary):
+        return summary
+    return rebuild_summary(db, user_id)
+
+
+def backfill_aggregates(db, user_id):
+    """
+    Rebuilds a user's summary from their full applications collection.
+
+    Returns:
+        int: Number of applications summarized.
+    """
+    return rebuild_summary(db, user_id)['total']
+
+
+def insights_from_summary(summary):
+    """
+    Turns a summary document into the data behind the tracker's charts.
+
+    Returns:
+        dict: weekly_success (DataFrame), response_time (Series),
+        monthly (Series), top_terms (list of (term, count)) and
+        locations (Series).
+    """
+    weekly = sorted((week, counts) for week, counts in summary.get('weekly', {}).items()
+                    if counts.get('total', 0) > 0)
+    weekly_success = pd.DataFrame({
+        'date': pd.to_datetime([week for week, _ in weekly]),
+        'is_successful': [counts.get('successful', 0) / counts['total']
+                          for _, counts in weekly],
+    })
+
+    first_day = summary.get('first_day', 0)
+    response_time = pd.Series({
+        company: counts['day_sum'] / counts['count'] - first_day
+        for company, counts in summary.get('company', {}).items()
+        if counts.get('count', 0) > 0
+    }, dtype=float).sort_values(ascending=False)
+
+    monthly = pd.Series({int(month): count
+                         for month, count in summary.get('month', {}).items()
+                         if count > 0}, dtype=int).sort_index()
+
+    top_terms = Counter({term: count for term, count in summary.get('terms', {}).items()
+                         if count > 0}).most_common(10)
+
+    locations = pd.Series({location: count
+                           for location, count in summary.get('location', {}).items()
+                           if count > 0}, dtype=int).sort_values(ascending=False)
+
+    return {
+        'weekly_success': weekly_success,
+        'response_time': response_time,
+        'monthly': monthly,
+        'top_terms': top_terms,
+        'locations': locations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill application summaries.")
+    parser.add_argument("user_ids", nargs="*", help="Users to backfill")
+    parser.add_argument("--all", action="store_true", help="Backfill every user")
+    args = parser.parse_args()
+
+    db = resources.get_db()
+
+    user_ids = args.user_ids
+    if args.all:
+        user_ids = [doc.id for doc in db.collection('users').list_documents()]
+    for user_id in user_ids:
+        count = backfill_aggregates(db, user_id)
+        print(f"{user_id}: {count} applications")
+
+
+if __name__ == "__main__":
+    main()
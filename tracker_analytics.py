@@ -0,0 +1,43 @@
+# tracker_analytics.py
+"""
+Position-title tokenizing shared by the tracker's summaries.
+
+Titles are split with a regex against a fixed stopword set instead of
+running NLTK over them. The term counts stored by tracker_aggregates
+depend on ``tokenize``; changing it means bumping
+tracker_aggregates.TERMS_VERSION so stored summaries are rebuilt.
+"""
+
+import re
+
+SUCCESS_STATUSES = ('Offer Received', 'Interview Scheduled')
+
+# NLTK's English stopword list (without the contractions, which the
+# tokenizer never produces)
+STOP_WORDS = frozenset("""
+    i me my myself we our ours ourselves you your yours yourself yourselves
+    he him his himself she her hers herself it its itself they them their
+    theirs themselves what which who whom this that these those am is are was
+    were be been being have has had having do does did doing a an the and but
+    if or because as until while of at by for with about against between into
+    through during before after above below to from up down in out on off over
+    under again further then once here there when where why how all any both
+    each few more most other some such no nor not only own same so than too
+    very s t can will just don should now d ll m o re ve y ain aren couldn
+    didn doesn hadn hasn haven isn ma mightn mustn needn shan shouldn wasn
+    weren won wouldn
+""".split())
+
+# Runs of letters and digits (underscores excluded), as in word_tokenize
+# followed by an isalnum() filter
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase alphanumeric terms, dropping stopwords.
+
+    Stored summaries depend on this; see tracker_aggregates.TERMS_VERSION.
+    """
+    return [word for word in TOKEN_RE.findall(str(text or '').lower())
+            if word not in STOP_WORDS]